@@ -0,0 +1 @@
+"""This package contains the benchmarking and performance regression tools for Cobble bot."""
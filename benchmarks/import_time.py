@@ -0,0 +1,147 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Import time budget check for the bot's modules.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``
+and its cumulative import time is compared against a budget. The process
+exits with a non-zero status code if any module exceeds its budget so this
+can be used as a regression check.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.import_time [--runs 5] [--scale 1.0]
+
+The median of the runs (at least :data:`MIN_RUNS`) is compared against the
+budget so that a single slow run doesn't fail the check. The budgets leave
+about twice the typical import time as headroom.
+
+Third party libraries that are needed anyway (discord.py and Tortoise) are
+preloaded for most modules so that only the import time of bot's own code
+is measured. The modules that are imported by everything (e.g. ``core.utils``)
+are measured without preloading since they must not pull these libraries in.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PRELOAD = "import discord, discord.ext.commands, discord.ext.menus, tortoise, tortoise.models"
+
+# module name -> (budget in milliseconds, whether to preload third party libraries)
+BUDGETS: Dict[str, Tuple[float, bool]] = {
+    "core": (10, False),
+    "core.constants": (10, False),
+    "core.cosmetics": (10, False),
+    "core.utils": (50, False),
+    "core.rendering": (40, False),
+    "core.responses": (70, False),
+    "core.outbound": (80, True),
+    "core.datamodels": (60, True),
+    "core.models": (80, True),
+    "core.checks": (80, True),
+    "core.views": (80, True),
+    "core.embeds": (80, True),
+    "core.components": (80, True),
+    "core.inventory_cache": (80, True),
+    "core.crafting": (40, False),
+    "core.bot": (150, True),
+}
+
+COG_BUDGET = 100
+
+# The minimum number of runs per module, whatever --runs says.
+MIN_RUNS = 5
+
+
+def _cogs() -> List[str]:
+    return sorted(
+        f"cogs.{filename[:-3]}"
+        for filename in os.listdir("cogs")
+        if filename.endswith(".py") and not filename.startswith("_")
+    )
+
+
+def measure(module: str, preload: bool) -> Optional[float]:
+    """Returns the cumulative import time of the module in milliseconds."""
+    code = f"{PRELOAD}; import {module}" if preload else f"import {module}"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        return None
+
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+
+    return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=MIN_RUNS, help=f"number of runs per module (at least {MIN_RUNS}), the median is used")
+    parser.add_argument("--scale", type=float, default=1.0, help="factor to scale all budgets with (for slow machines)")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    for cog in _cogs():
+        budgets[cog] = (COG_BUDGET, True)
+
+    failed = 0
+    print(f"{'Module':<20} {'Time (ms)':>10} {'Budget (ms)':>12}")
+
+    runs = max(args.runs, MIN_RUNS)
+    for module, (budget, preload) in budgets.items():
+        results = [measure(module, preload) for _ in range(runs)]
+        if any(r is None for r in results):
+            print(f"{module:<20} {'ERROR':>10} {budget * args.scale:>12.1f}")
+            failed += 1
+            continue
+
+        elapsed = statistics.median(results)  # type: ignore
+        budget *= args.scale
+        status = "" if elapsed <= budget else "  OVER BUDGET"
+        if status:
+            failed += 1
+
+        print(f"{module:<20} {elapsed:>10.1f} {budget:>12.1f}{status}")
+
+    if failed:
+        print(f"\n{failed} module(s) exceeded the import time budget.")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,501 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Load test harness that drives the cogs with synthetic interactions.
+
+The bot is set up as usual (extensions, metadata and the command tree) but it
+never connects to Discord. Instead, fake interactions are created for a number
+of simulated players and passed to the command tree so that each command goes
+through the same path as in production (checks, cooldowns, player locks, unit
+of work and metrics). The responses are discarded and the views sent by commands
+are resolved immediately (e.g. the first biome is selected when exploring).
+
+The database is a temporary SQLite file that is populated with the simulated
+players and their starting inventories before the run.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.load_test [--players 1000] [--commands 10] [--concurrency 500] [--outbound-scheduler]
+
+With ``--outbound-scheduler`` the responses go through the outbound scheduler
+(like they do in production) and only the sending of each request is faked.
+
+The throughput (commands per second), latency percentiles, the number of
+database queries, the time spent on responses and the number of responses
+(REST calls) of each command are reported at the end.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from tortoise import Tortoise
+
+import discord
+from discord.http import Route
+
+from core.bot import CobbleBot, Config
+from core.components import RoutedView
+from core.metrics import record_http
+from core.models import InventoryItem, Player
+from core.outbound import OutboundScheduler
+
+BASE_USER_ID = 10 ** 17
+GUILD_IDS = (10 ** 17 - 1, 10 ** 17 - 2, 10 ** 17 - 3)
+
+# (item ID, quantity) given to every simulated player. Durable items are
+# added once per quantity.
+STARTING_INVENTORY: Tuple[Tuple[str, int], ...] = (
+    ("wooden_pickaxe", 2),
+    ("stone_pickaxe", 2),
+    ("fishing_rod", 2),
+    ("oak_wood", 500),
+    ("stone", 200),
+    ("sand", 200),
+    ("raw_beef", 200),
+    ("coal", 200),
+)
+
+# (command path, options, weight)
+SCENARIOS: Tuple[Tuple[Tuple[str, ...], Dict[str, Any], int], ...] = (
+    (("explore",), {}, 3),
+    (("mine",), {}, 3),
+    (("fish",), {}, 3),
+    (("inventory", "view"), {}, 3),
+    (("inventory", "craft"), {"item": "sticks", "quantity": 1}, 2),
+    (("inventory", "craftable"), {}, 1),
+    (("inventory", "smelt"), {"item": "sand", "quantity": 2}, 2),
+    (("inventory", "use"), {"item": "raw_beef", "quantity": 1}, 2),
+    (("leaderboard", "global"), {}, 1),
+    (("leaderboard", "guild"), {}, 1),
+)
+
+
+class FakeOutboundScheduler(OutboundScheduler):
+    """An outbound scheduler that waits for `rest_latency` seconds instead of sending requests."""
+
+    def __init__(self, *, rest_latency: float = 0.0, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.rest_latency = rest_latency
+
+    async def _perform(self, request: Any) -> None:
+        if self.rest_latency:
+            await asyncio.sleep(self.rest_latency)
+
+
+class FakeMessage:
+    """A message returned by the fake followup webhook."""
+
+    def __init__(self, interaction: FakeInteraction, message_id: Optional[int] = None) -> None:
+        self.id = random.getrandbits(63) if message_id is None else message_id
+        self._interaction = interaction
+
+    def _route(self, method: str) -> Route:
+        message_id = "@original" if self.id == self._interaction.id else self.id
+        return self._interaction._webhook_route(method, f"/messages/{message_id}")
+
+    async def edit(self, **kwargs: Any) -> FakeMessage:
+        await self._interaction._respond(self._route("PATCH"), kwargs)
+        return self
+
+    async def delete(self, *, delay: Optional[float] = None) -> None:
+        await self._interaction._respond(self._route("DELETE"), {})
+
+
+class FakeResponse:
+    """Stands in for :class:`discord.InteractionResponse`."""
+
+    def __init__(self, interaction: FakeInteraction) -> None:
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _complete(self, kwargs: Dict[str, Any]) -> None:
+        if self._done:
+            raise discord.InteractionResponded(self._interaction)  # type: ignore
+
+        self._done = True
+        route = Route(
+            "POST",
+            "/interactions/{interaction_id}/{interaction_token}/callback",
+            interaction_id=self._interaction.id,
+            interaction_token=self._interaction.token,
+        )
+        await self._interaction._respond(route, kwargs)
+
+    async def send_message(self, content: Optional[str] = None, **kwargs: Any) -> None:
+        await self._complete(dict(kwargs, content=content))
+
+    async def defer(self, **kwargs: Any) -> None:
+        await self._complete({})
+
+    async def edit_message(self, **kwargs: Any) -> None:
+        await self._complete(kwargs)
+
+    async def send_modal(self, modal: Any) -> None:
+        await self._complete({})
+
+
+class FakeFollowup:
+    """Stands in for the followup :class:`discord.Webhook`."""
+
+    def __init__(self, interaction: FakeInteraction) -> None:
+        self._interaction = interaction
+
+    async def send(self, content: Optional[str] = None, **kwargs: Any) -> FakeMessage:
+        await self._interaction._respond(self._interaction._webhook_route("POST"), dict(kwargs, content=content))
+        return FakeMessage(self._interaction)
+
+
+class FakeInteraction(discord.Interaction):
+    """An interaction whose responses are discarded instead of being sent to Discord.
+
+    Each response waits for `rest_latency` seconds to simulate the round trip
+    to Discord's API. If a `scheduler` is given, the responses are passed to it
+    instead (and it simulates the latency).
+    """
+
+    def __init__(self, *, data: Any, state: Any, rest_latency: float = 0.0, scheduler: Optional[OutboundScheduler] = None) -> None:
+        super().__init__(data=data, state=state)
+        self.rest_latency = rest_latency
+        self.scheduler = scheduler
+        self.responses = 0
+        self._fake_followup = FakeFollowup(self)
+
+        # The data of routed components to use once the command completes.
+        self.clicks: List[Dict[str, Any]] = []
+
+        # Interaction.response is a cached slot; seeding the cache (instead of
+        # overriding the property) lets the bot wrap the response as usual.
+        self._cs_response = FakeResponse(self)  # type: ignore
+
+    @property
+    def followup(self) -> FakeFollowup:  # type: ignore
+        return self._fake_followup
+
+    async def original_response(self) -> FakeMessage:  # type: ignore
+        return FakeMessage(self, self.id)
+
+    async def edit_original_response(self, **kwargs: Any) -> FakeMessage:  # type: ignore
+        await self._respond(self._webhook_route("PATCH", "/messages/@original"), kwargs)
+        return FakeMessage(self, self.id)
+
+    async def delete_original_response(self) -> None:
+        await self._respond(self._webhook_route("DELETE", "/messages/@original"), {})
+
+    def _webhook_route(self, method: str, path: str = "") -> Route:
+        return Route(
+            method,
+            "/webhooks/{webhook_id}/{webhook_token}" + path,
+            webhook_id=self.application_id,
+            webhook_token=self.token,
+        )
+
+    async def _respond(self, route: Route, kwargs: Dict[str, Any]) -> None:
+        self.responses += 1
+        if self.scheduler is not None:
+            payload = {key: value for key, value in kwargs.items() if key != "view"}
+            await self.scheduler.request(route, None, payload=payload)  # type: ignore
+        elif self.rest_latency:
+            started_at = time.perf_counter()
+            await asyncio.sleep(self.rest_latency)
+            record_http(time.perf_counter() - started_at)
+
+        view = kwargs.get("view")
+        if view is not None:
+            resolve_view(self, view)
+
+
+def resolve_view(interaction: FakeInteraction, view: discord.ui.View) -> None:
+    """Resolves a view sent by a command as if the user interacted with it."""
+    if isinstance(view, RoutedView):
+        # Routed selects are used after the command completes, like users
+        # would. Buttons (e.g. of paginators) are never pressed.
+        for item in view.children:
+            if isinstance(item, discord.ui.Select) and item.options:
+                interaction.clicks.append({
+                    "custom_id": item.custom_id,
+                    "component_type": 3,
+                    "values": [random.choice(item.options).value],
+                })
+        return
+
+    # Other views are stopped right away.
+    view.stop()
+
+
+class LoadTest:
+    """Runs the simulated players and collects the results."""
+
+    def __init__(
+        self,
+        bot: CobbleBot,
+        *,
+        players: int,
+        commands: int,
+        concurrency: int,
+        rest_latency: float,
+        scheduler: Optional[OutboundScheduler] = None,
+    ) -> None:
+        self.bot = bot
+        self.players = players
+        self.commands = commands
+        self.concurrency = concurrency
+        self.rest_latency = rest_latency
+        self.scheduler = scheduler
+        self.latencies: Dict[str, List[float]] = {}
+        self.failures: Dict[str, int] = {}
+        self.responses: Dict[str, int] = {}
+
+    def payload(self, user_id: int, path: Tuple[str, ...], options: Dict[str, Any]) -> Dict[str, Any]:
+        command_options = [
+            {"name": name, "type": 4 if isinstance(value, int) else 3, "value": value}
+            for name, value in options.items()
+        ]
+        if len(path) == 2:
+            command_options = [{"name": path[1], "type": 1, "options": command_options}]
+
+        guild_id = GUILD_IDS[user_id % len(GUILD_IDS)]
+        interaction_id = random.getrandbits(63)
+        return {
+            "id": str(interaction_id),
+            "application_id": "1",
+            "type": 2,
+            # Every interaction has its own webhook (and rate limits).
+            "token": f"fake{interaction_id}",
+            "version": 1,
+            "attachment_size_limit": 8388608,
+            "guild_id": str(guild_id),
+            "locale": "en-US",
+            "member": {
+                "user": {"id": str(user_id), "username": f"player{user_id - BASE_USER_ID}", "discriminator": "0", "avatar": None},
+                "roles": [],
+                "joined_at": "2023-01-01T00:00:00+00:00",
+                "deaf": False,
+                "mute": False,
+                "flags": 0,
+                "permissions": "0",
+            },
+            "data": {"id": "1", "name": path[0], "type": 1, "options": command_options},
+        }
+
+    async def invoke(self, user_id: int, path: Tuple[str, ...], options: Dict[str, Any]) -> None:
+        interaction = FakeInteraction(
+            data=self.payload(user_id, path, options),
+            state=self.bot._connection,
+            rest_latency=self.rest_latency,
+            scheduler=self.scheduler,
+        )
+        name = " ".join(path)
+
+        started_at = time.perf_counter()
+        try:
+            await self.bot.tree._call(interaction)
+        except Exception:
+            interaction.command_failed = True
+            logging.exception("Command %r failed", name)
+
+        interactions = [interaction]
+        for data in interaction.clicks:
+            payload = self.payload(user_id, path, options)
+            payload.update(type=3, data=data)
+            component = FakeInteraction(
+                data=payload,
+                state=self.bot._connection,
+                rest_latency=self.rest_latency,
+                scheduler=self.scheduler,
+            )
+            interactions.append(component)
+
+            if not await self.bot.components.dispatch(component):
+                component.command_failed = True
+                logging.error("Component %r of command %r was not dispatched", data["custom_id"], name)
+
+        self.latencies.setdefault(name, []).append(time.perf_counter() - started_at)
+        self.responses[name] = self.responses.get(name, 0) + sum(i.responses for i in interactions)
+        if any(i.command_failed for i in interactions):
+            self.failures[name] = self.failures.get(name, 0) + 1
+
+    async def simulate_player(self, user_id: int, semaphore: asyncio.Semaphore) -> None:
+        paths = [scenario[:2] for scenario in SCENARIOS]
+        weights = [scenario[2] for scenario in SCENARIOS]
+
+        for path, options in random.choices(paths, weights, k=self.commands):
+            async with semaphore:
+                await self.invoke(user_id, path, options)
+
+    async def run(self) -> float:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started_at = time.perf_counter()
+        await asyncio.gather(*(
+            self.simulate_player(BASE_USER_ID + idx, semaphore)
+            for idx in range(self.players)
+        ))
+        return time.perf_counter() - started_at
+
+    def report(self, elapsed: float) -> str:
+        lines = [
+            f"{'command':<22}{'count':>8}{'fail':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'queries':>9}{'http ms':>9}{'calls':>7}{'defers':>8}"
+        ]
+        total = 0
+
+        for name in sorted(self.latencies):
+            samples = sorted(self.latencies[name])
+            total += len(samples)
+            stats = self.bot.metrics.get(name)
+            p50, p95, p99 = (_percentile(samples, q) * 1000 for q in (0.5, 0.95, 0.99))
+            lines.append(
+                f"{name:<22}{len(samples):>8}{self.failures.get(name, 0):>6}"
+                f"{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}{stats.queries.mean:>9.1f}{stats.http.mean * 1000:>9.1f}"
+                f"{self.responses[name] / len(samples):>7.2f}"
+                f"{stats.auto_defers:>8}"
+            )
+
+        everything = sorted(latency for samples in self.latencies.values() for latency in samples)
+        p50, p95, p99 = (_percentile(everything, q) * 1000 for q in (0.5, 0.95, 0.99))
+        lines.append("")
+        lines.append(f"{total} commands in {elapsed:.2f}s ({total / elapsed:.1f} commands/s)")
+        lines.append(f"Latency: p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, mean {statistics.fmean(everything) * 1000:.1f} ms")
+
+        loop_stats = self.bot.loop_monitor.stats()
+        lines.append(f"Event loop lag: p99 {loop_stats['lag_p99'] * 1000:.1f} ms, max {loop_stats['lag_max'] * 1000:.1f} ms")
+
+        if self.scheduler is not None:
+            scheduler_stats = self.scheduler.stats()
+            lines.append(
+                f"Outbound scheduler: {scheduler_stats['dispatched']} requests sent, "
+                f"{scheduler_stats['coalesced']} edits coalesced, {scheduler_stats['delayed']} delayed over 1s"
+            )
+        return "\n".join(lines)
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+
+    return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+async def populate(bot: CobbleBot, players: int, batch_size: int = 1000) -> None:
+    """Creates the simulated players and their starting inventories."""
+    for start in range(0, players, batch_size):
+        user_ids = range(BASE_USER_ID + start, BASE_USER_ID + min(start + batch_size, players))
+        await Player.bulk_create([Player(id=user_id) for user_id in user_ids])
+
+        items: List[InventoryItem] = []
+        for user_id in user_ids:
+            for item_id, quantity in STARTING_INVENTORY:
+                durability = bot.items[item_id].durability
+                if durability is None:
+                    items.append(InventoryItem(player_id=user_id, item_id=item_id, quantity=quantity))
+                else:
+                    items.extend(
+                        InventoryItem(player_id=user_id, item_id=item_id, quantity=1, durability=durability)
+                        for _ in range(quantity)
+                    )
+        await InventoryItem.bulk_create(items)
+
+
+async def main(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        config = Config()
+        config.database_url = f"sqlite://{os.path.join(directory, 'load_test.sqlite3')}"
+        config.auto_sync = False
+        config.metrics_port = None
+        config.user_cache_size = max(config.user_cache_size, args.players)
+        config.outbound_scheduler = args.outbound_scheduler
+        # The simulated players bypass cooldowns (like admins do) so that every
+        # command actually runs. The range is used for constant time lookups.
+        if not args.cooldowns:
+            config.admin_ids = range(BASE_USER_ID, BASE_USER_ID + args.players)  # type: ignore
+
+        bot = CobbleBot(config)
+        if args.outbound_scheduler:
+            bot.outbound = FakeOutboundScheduler(
+                rest_latency=args.rest_latency / 1000,
+                route_rate=config.outbound_route_rate,
+                route_burst=config.outbound_route_burst,
+                global_rate=config.outbound_global_rate,
+            )
+
+        try:
+            await bot._async_setup_hook()
+            await bot.setup_hook()
+            await Tortoise.generate_schemas()
+
+            # Normally set upon logging in.
+            bot._connection.user = discord.ClientUser(
+                state=bot._connection,
+                data={"id": "1", "username": "cobble", "discriminator": "0", "avatar": None, "bot": True},
+            )
+            # The leaderboards would otherwise fetch the names from the API.
+            for idx in range(args.players):
+                bot.user_names[BASE_USER_ID + idx] = f"player{idx}"
+
+            started_at = time.perf_counter()
+            await populate(bot, args.players)
+            print(f"Populated {args.players} players in {time.perf_counter() - started_at:.2f}s")
+
+            test = LoadTest(
+                bot,
+                players=args.players,
+                commands=args.commands,
+                concurrency=args.concurrency,
+                rest_latency=args.rest_latency / 1000,
+                scheduler=bot.outbound if args.outbound_scheduler else None,
+            )
+            elapsed = await test.run()
+            # Let the completion listeners finish before closing.
+            await asyncio.sleep(0.1)
+            print(test.report(elapsed))
+        finally:
+            await bot.close()
+            await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drives the cogs with synthetic interactions and reports throughput and latency.")
+    parser.add_argument("--players", type=int, default=1000, help="number of simulated players")
+    parser.add_argument("--commands", type=int, default=10, help="number of commands run by each player")
+    parser.add_argument("--concurrency", type=int, default=500, help="maximum number of commands running at once")
+    parser.add_argument("--rest-latency", type=float, default=0.0, help="simulated latency of each response in milliseconds")
+    parser.add_argument("--outbound-scheduler", action="store_true", help="send the responses through the outbound scheduler")
+    parser.add_argument("--cooldowns", action="store_true", help="enforce command cooldowns for the simulated players")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(args))
@@ -0,0 +1,391 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Micro-benchmarks for the model operations and other hot paths.
+
+Each benchmark is run for several data sizes (e.g. the number of items already
+in the inventory) and the median time per operation is reported. The models
+use an in-memory SQLite database.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.micro [--filter inventory] [--save] [--compare] [--threshold 0.2]
+
+With ``--save``, the results are stored as the JSON baseline (see ``--baseline``).
+With ``--compare``, the results are compared against the stored baseline and
+the process exits with a non-zero status code if any benchmark got slower by
+more than the threshold (20% by default). Performance related changes to the
+models should include the output of the compare mode.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from types import SimpleNamespace
+
+import argparse
+import asyncio
+import datetime
+import inspect
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from tortoise import Tortoise
+
+from core import constants, datamodels, rendering, unit_of_work
+from core.bot import CobbleBot, Config
+from core.models import InventoryItem, Player
+
+Operation = Callable[[], Union[Awaitable[Any], Any]]
+Setup = Callable[[CobbleBot, int], Awaitable[Operation]]
+
+DEFAULT_BASELINE = os.path.join("benchmarks", "baselines", "micro.json")
+
+BENCHMARKS: Dict[str, Tuple[Setup, Tuple[int, ...]]] = {}
+
+
+def benchmark(name: str, sizes: Tuple[int, ...]) -> Callable[[Setup], Setup]:
+    """Registers a benchmark.
+
+    The decorated function takes the bot and the data size, prepares the data
+    and returns the operation to time. The operation may be a coroutine function.
+    """
+    def decorator(func: Setup) -> Setup:
+        BENCHMARKS[name] = (func, sizes)
+        return func
+
+    return decorator
+
+
+_next_player_id = 0
+
+
+async def create_player(bot: CobbleBot, inventory_size: int = 0) -> Player:
+    """Creates a player with the given number of distinct items in inventory."""
+    global _next_player_id
+    _next_player_id += 1
+
+    player = await Player.create(id=_next_player_id)
+    await InventoryItem.bulk_create([
+        InventoryItem(player=player, item_id=f"filler_{idx}", quantity=1)
+        for idx in range(inventory_size)
+    ])
+    return player
+
+
+def catalog(bot: CobbleBot, size: int) -> Dict[str, datamodels.Item]:
+    """Returns the item catalog extended with copies of the real items up to the given size."""
+    items = dict(bot.items)
+    originals = list(bot.items.values())
+
+    idx = 0
+    while len(items) < size:
+        original = originals[idx % len(originals)]
+        item_id = f"{original.id}_{idx}"
+        items[item_id] = datamodels.Item(**dict(vars(original), id=item_id, display_name=f"{original.display_name} {idx}"))
+        idx += 1
+
+    return items
+
+
+@benchmark("inventory_add_stackable", sizes=(10, 100, 1000))
+async def bench_inventory_add_stackable(bot: CobbleBot, size: int) -> Operation:
+    player = await create_player(bot, size)
+    return lambda: InventoryItem.add(player=player, item_id="oak_wood", quantity=1)
+
+
+@benchmark("inventory_add_stackable_unit_of_work", sizes=(10, 100, 1000))
+async def bench_inventory_add_stackable_unit_of_work(bot: CobbleBot, size: int) -> Operation:
+    player = await create_player(bot, size)
+
+    # Adding the same item twice in one unit of work (as loot rolls often do)
+    # results in a single write.
+    async def operation() -> None:
+        uow = unit_of_work.begin(SimpleNamespace(extras={}))  # type: ignore
+        await InventoryItem.add(player=player, item_id="oak_wood", quantity=1)
+        await InventoryItem.add(player=player, item_id="oak_wood", quantity=1)
+        await uow.commit()
+
+    return operation
+
+
+@benchmark("inventory_add_durable", sizes=(1, 5, 25))
+async def bench_inventory_add_durable(bot: CobbleBot, size: int) -> Operation:
+    player = await create_player(bot, 10)
+    return lambda: InventoryItem.add(player=player, item_id="wooden_pickaxe", quantity=size, durability=10)
+
+
+@benchmark("inventory_remove", sizes=(10, 100, 1000))
+async def bench_inventory_remove(bot: CobbleBot, size: int) -> Operation:
+    player = await create_player(bot, size)
+    item = await InventoryItem.create(player=player, item_id="oak_wood", quantity=10 ** 9)
+    return lambda: item.remove(1)
+
+
+@benchmark("inventory_edit_durability", sizes=(10, 100, 1000))
+async def bench_inventory_edit_durability(bot: CobbleBot, size: int) -> Operation:
+    player = await create_player(bot, size)
+    item = await InventoryItem.create(player=player, item_id="wooden_pickaxe", quantity=1, durability=10 ** 9)
+    return lambda: item.edit_durability(-1)
+
+
+@benchmark("player_add_xp", sizes=(0, 10 ** 3, 10 ** 6))
+async def bench_player_add_xp(bot: CobbleBot, size: int) -> Operation:
+    player = await create_player(bot)
+    player.xp = size
+    return lambda: player.add_xp(1)
+
+
+@benchmark("player_remove_hp", sizes=(0, 10 ** 3, 10 ** 6))
+async def bench_player_remove_hp(bot: CobbleBot, size: int) -> Operation:
+    player = await create_player(bot)
+    player.xp = size
+
+    async def operation() -> None:
+        player.health = constants.MAX_HEALTH
+        await player.remove_hp(0.5)
+
+    return operation
+
+
+@benchmark("progress_bar", sizes=(10, 50, 200))
+async def bench_progress_bar(bot: CobbleBot, size: int) -> Operation:
+    values = [(random.randint(0, 100), 100) for _ in range(64)]
+    values_iter = iter(values * 10 ** 6)
+
+    def operation() -> None:
+        progress, total = next(values_iter)
+        rendering.progress_bar(progress, total, length=size)
+
+    return operation
+
+
+@benchmark("loot_roll", sizes=(5, 50, 500))
+async def bench_loot_roll(bot: CobbleBot, size: int) -> Operation:
+    from cogs.survival import Survival
+
+    player = await create_player(bot, 10)
+    bot.items = catalog(bot, len(bot.items) + size)
+    stackable = [item for item in bot.items.values() if item.durability is None]
+
+    # Every item is obtained with a low probability so a roll yields a few items.
+    table = datamodels.LootTable("benchmark", {
+        item.id: datamodels.LootTableItem(item.id, probability=min(1.0, 2 / size), quantity=(1, 3))
+        for item in stackable[:size]
+    })
+    cog = Survival(bot)
+    return lambda: cog._process_loot_table(player, table)
+
+
+@benchmark("autocomplete_item_name", sizes=(31, 1000, 10000))
+async def bench_autocomplete_item_name(bot: CobbleBot, size: int) -> Operation:
+    from cogs.inventory import Inventory
+
+    bot.items = catalog(bot, size)
+    cog = Inventory(bot)
+    queries = iter(["", "o", "pick", "cooked", "diamond pickaxe", "zzz"] * 10 ** 6)
+    return lambda: cog.autocomplete_item_name(None, next(queries))  # type: ignore
+
+
+@benchmark("autocomplete_item_name_craftable", sizes=(31, 1000, 10000))
+async def bench_autocomplete_item_name_craftable(bot: CobbleBot, size: int) -> Operation:
+    from cogs.inventory import Inventory
+
+    bot.items = catalog(bot, size)
+    cog = Inventory(bot)
+    queries = iter(["", "o", "pick", "cooked", "diamond pickaxe", "zzz"] * 10 ** 6)
+    return lambda: cog.autocomplete_item_name_craftable(None, next(queries))  # type: ignore
+
+
+@benchmark("autocomplete_item_name_owned", sizes=(10, 100, 1000))
+async def bench_autocomplete_item_name_owned(bot: CobbleBot, size: int) -> Operation:
+    from cogs.inventory import Inventory
+
+    bot.items = catalog(bot, size)
+    player = await create_player(bot)
+    await InventoryItem.bulk_create([
+        InventoryItem(player=player, item_id=item_id, quantity=1)
+        for item_id in list(bot.items)[:size]
+    ])
+    cog = Inventory(bot)
+    interaction = SimpleNamespace(user=SimpleNamespace(id=player.pk))
+    queries = iter(["", "o", "pick", "cooked", "diamond pickaxe", "zzz"] * 10 ** 6)
+    return lambda: cog.autocomplete_item_name_owned(interaction, next(queries))  # type: ignore
+
+
+@benchmark("recipes_craftable", sizes=(31, 1000, 10000))
+async def bench_recipes_craftable(bot: CobbleBot, size: int) -> Operation:
+    from core.crafting import RecipeMatrix
+
+    items = catalog(bot, size)
+    recipes = RecipeMatrix(items)
+    quantities = {item_id: random.randint(0, 64) for item_id in list(items)[:200]}
+    return lambda: recipes.craftable(quantities)
+
+
+async def measure(operation: Operation, *, min_time: float, repeat: int) -> Dict[str, Any]:
+    """Returns the timings per operation (in seconds) of the given operation."""
+    # The first call (also serving as warm up) tells whether the operation is asynchronous.
+    result = operation()
+    is_async = inspect.isawaitable(result)
+    if is_async:
+        await result
+
+    async def run(number: int) -> float:
+        started_at = time.perf_counter()
+        if is_async:
+            for _ in range(number):
+                await operation()  # type: ignore
+        else:
+            for _ in range(number):
+                operation()
+        return time.perf_counter() - started_at
+
+    # Calibrate the number of operations so that each run takes about min_time.
+    number = 1
+    while True:
+        elapsed = await run(number)
+        if elapsed >= min_time / 5 or number >= 10 ** 7:
+            break
+        number *= 4
+
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    timings = [await run(number) / number for _ in range(repeat)]
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "iterations": number,
+    }
+
+
+async def run_benchmarks(name_filter: Optional[str], *, min_time: float, repeat: int) -> Dict[str, Dict[str, Any]]:
+    config = Config()
+    config.database_url = "sqlite://:memory:"
+    bot = CobbleBot(config)
+    bot.cache_data()
+    items = bot.items
+
+    await bot.init_database()
+    await Tortoise.generate_schemas()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for name, (setup, sizes) in BENCHMARKS.items():
+            if name_filter and name_filter not in name:
+                continue
+
+            for size in sizes:
+                bot.items = items
+                operation = await setup(bot, size)
+                key = f"{name}[{size}]"
+                results[key] = result = await measure(operation, min_time=min_time, repeat=repeat)
+                print(f"{key:<50}{_format_time(result['median']):>12}", flush=True)
+    finally:
+        await Tortoise.close_connections()
+
+    return results
+
+
+def _format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f} us"
+    return f"{seconds * 1e3:.3f} ms"
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """Prints the comparison with the baseline and returns the names of regressed benchmarks."""
+    regressions: List[str] = []
+    print(f"\n{'benchmark':<50}{'baseline':>12}{'current':>12}{'change':>9}")
+
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            print(f"{key:<50}{'-':>12}{_format_time(result['median']):>12}{'new':>9}")
+            continue
+
+        change = result["median"] / old["median"] - 1
+        status = ""
+        if change > threshold:
+            status = "  REGRESSION"
+            regressions.append(key)
+        elif change < -threshold:
+            status = "  improved"
+
+        print(f"{key:<50}{_format_time(old['median']):>12}{_format_time(result['median']):>12}{change:>+9.1%}{status}")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Runs the micro-benchmarks and optionally compares them with a baseline.")
+    parser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="path to the JSON baseline")
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare the results with the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown considered a regression")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum time (in seconds) of each run")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs of each benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    results = asyncio.run(run_benchmarks(args.filter, min_time=args.min_time, repeat=args.repeat))
+
+    regressions: List[str] = []
+    if args.compare:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)["results"]
+        except FileNotFoundError:
+            sys.exit(f"No baseline found at {args.baseline}, run with --save first.")
+
+        regressions = compare(results, baseline, args.threshold)
+
+    if args.save:
+        stored: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                stored = json.load(f)["results"]
+
+        # Only the benchmarks that were run are replaced (e.g. with --filter).
+        stored.update(results)
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": stored,
+            }, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if regressions:
+        sys.exit(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
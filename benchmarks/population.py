@@ -0,0 +1,309 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Synthetic population generator for testing the bot at production scale.
+
+A SQLite database is filled with players, their inventories and guild
+memberships. The data roughly follows the distributions seen in production:
+
+- XP is log-normally distributed (most players are casual, a few have a lot of
+  XP) and some players never progressed at all.
+- Biome discoveries and deaths become more likely as the XP grows.
+- Inventories favour common items over rare ones. Durable items (tools) are
+  stored one row per item with a random remaining durability.
+- Guild sizes follow a power law so there are a few very large guilds and a
+  long tail of small ones.
+
+The rows are written with batched ``executemany`` calls instead of creating
+model instances since the latter is far too slow for millions of rows.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.population generate [--players 1000000] [--guilds 50000] [--database population.sqlite3]
+    python -m benchmarks.population bench [--database population.sqlite3]
+
+The ``bench`` command times the queries of the leaderboards, inventory view
+and profile lookup against the generated database.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Coroutine, Dict, List, Sequence, Tuple
+
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import random
+import time
+import types
+
+from tortoise import Tortoise, connections
+from tortoise.backends.base.config_generator import expand_db_url
+
+import discord
+
+from cogs.leaderboard import GlobalLeaderboardPaginator, GuildLeaderboardPaginator, LeaderboardPaginator
+from core import constants
+from core.components import ComponentRouter
+from core.datamodels import PlayerFlags
+from core.models import InventoryItem, Player
+
+BASE_USER_ID = 10 ** 17
+BASE_GUILD_ID = 10 ** 16
+
+RARITY_WEIGHTS = {"common": 10, "uncommon": 3, "rare": 1}
+
+PLAYER_SQL = "INSERT INTO player (id, xp, health, created_at, achievements, flags) VALUES (?, ?, ?, ?, ?, ?)"
+INVENTORY_SQL = "INSERT INTO inventoryitem (player_id, item_id, quantity, durability) VALUES (?, ?, ?, ?)"
+GUILD_PLAYER_SQL = "INSERT INTO guildplayer (player_id, guild_id, flags) VALUES (?, ?, ?)"
+
+
+class PopulationGenerator:
+    """Generates the rows of the simulated players in batches."""
+
+    def __init__(self, *, guilds: int, seed: Any = None) -> None:
+        self.guilds = guilds
+        self.random = random.Random(seed)
+        self.now = datetime.datetime.now(datetime.timezone.utc)
+
+        with open("data/items.json") as f:
+            items: Dict[str, Any] = json.load(f)
+        with open("data/biomes.json") as f:
+            biomes: Dict[str, Any] = json.load(f)
+
+        self.stackable = [(item_id, RARITY_WEIGHTS[data["rarity"]]) for item_id, data in items.items() if data.get("durability") is None]
+        self.durable = [(item_id, RARITY_WEIGHTS[data["rarity"]], data["durability"]) for item_id, data in items.items() if data.get("durability") is not None]
+        self.discoveries = [
+            (data["discovery_achievement"], data["discovery_probability"])
+            for data in biomes.values()
+            if data.get("discovery_achievement")
+        ]
+        self._stackable_weights = [weight for _, weight in self.stackable]
+        self._durable_weights = [weight for _, weight, _ in self.durable]
+
+    def xp(self) -> int:
+        if self.random.random() < 0.2:
+            return 0
+        return min(int(self.random.lognormvariate(5.0, 1.5)), 10 ** 7)
+
+    def player(self, user_id: int) -> Tuple[Any, ...]:
+        rng = self.random
+        xp = self.xp()
+
+        # Roughly one exploration per 10 XP.
+        explorations = xp // 10
+        achievements = 0
+        for achievement, probability in self.discoveries:
+            if rng.random() < 1 - (1 - probability) ** explorations:
+                achievements |= achievement
+
+        flags = 0
+        if rng.random() < 1 - math.exp(-xp / 2000):
+            flags |= PlayerFlags.died_once.flag
+        if rng.random() < 0.01:
+            flags |= PlayerFlags.hide_on_leaderboard.flag
+
+        health = rng.randint(1, constants.MAX_HEALTH * 2) / 2
+        created_at = self.now - datetime.timedelta(seconds=rng.randint(0, 2 * 365 * 86400))
+        return (user_id, xp, health, str(created_at), achievements, flags)
+
+    def inventory(self, user_id: int, xp: int) -> List[Tuple[Any, ...]]:
+        rng = self.random
+        rows: List[Tuple[Any, ...]] = []
+
+        # Players with more XP have collected more kinds of items.
+        kinds = min(int(rng.expovariate(1 / (2 + math.log1p(xp)))), len(self.stackable))
+        chosen = {item_id for item_id, _ in (rng.choices(self.stackable, self._stackable_weights, k=kinds) if kinds else ())}
+        for item_id in chosen:
+            rows.append((user_id, item_id, int(rng.lognormvariate(2.0, 1.2)) + 1, None))
+
+        tools = int(rng.expovariate(1 / 1.5)) if xp else 0
+        for item_id, _, max_durability in rng.choices(self.durable, self._durable_weights, k=tools) if tools else ():
+            rows.append((user_id, item_id, 1, rng.randint(1, max_durability)))
+
+        return rows
+
+    def guild_memberships(self, user_id: int) -> List[Tuple[Any, ...]]:
+        rng = self.random
+        count = min(1 + int(rng.expovariate(1.0)), 5)
+        # Log-uniform guild indexes give a power law distribution of guild sizes.
+        guild_ids = {BASE_GUILD_ID + int(self.guilds ** rng.random()) - 1 for _ in range(count)}
+        return [(user_id, guild_id, 0) for guild_id in guild_ids]
+
+    def batch(self, start: int, size: int) -> Tuple[List[Tuple[Any, ...]], List[Tuple[Any, ...]], List[Tuple[Any, ...]]]:
+        players: List[Tuple[Any, ...]] = []
+        inventory: List[Tuple[Any, ...]] = []
+        guild_players: List[Tuple[Any, ...]] = []
+
+        for user_id in range(BASE_USER_ID + start, BASE_USER_ID + start + size):
+            player = self.player(user_id)
+            players.append(player)
+            inventory.extend(self.inventory(user_id, player[1]))
+            guild_players.extend(self.guild_memberships(user_id))
+
+        return players, inventory, guild_players
+
+
+async def init_database(database: str) -> None:
+    await Tortoise.init(config={
+        "connections": {"default": expand_db_url(f"sqlite://{database}")},
+        "apps": {"models": {"models": ["core.models"], "default_connection": "default"}},
+    })
+    await Tortoise.generate_schemas(safe=True)
+
+
+async def generate(args: argparse.Namespace) -> None:
+    await init_database(args.database)
+    try:
+        await _generate(args)
+    finally:
+        await connections.close_all()
+
+
+async def _generate(args: argparse.Namespace) -> None:
+    connection = connections.get("default")
+    generator = PopulationGenerator(guilds=args.guilds, seed=args.seed)
+
+    # Durability of the generated data doesn't matter so the writes are sped
+    # up at the cost of crash safety.
+    await connection.execute_script("PRAGMA synchronous = OFF; PRAGMA journal_mode = MEMORY;")
+
+    started_at = time.perf_counter()
+    counts = [0, 0, 0]
+
+    for start in range(0, args.players, args.batch_size):
+        size = min(args.batch_size, args.players - start)
+        rows = generator.batch(start, size)
+
+        async with connection._in_transaction() as transaction:
+            for sql, values in zip((PLAYER_SQL, INVENTORY_SQL, GUILD_PLAYER_SQL), rows):
+                await transaction.execute_many(sql, values)
+
+        for idx, values in enumerate(rows):
+            counts[idx] += len(values)
+
+        elapsed = time.perf_counter() - started_at
+        print(f"\r{start + size}/{args.players} players ({(start + size) / elapsed:.0f} players/s)", end="", flush=True)
+
+    print()
+    print(f"Generated {counts[0]} players, {counts[1]} inventory items and {counts[2]} "
+          f"guild memberships in {time.perf_counter() - started_at:.1f}s")
+
+
+class _BenchBot:
+    """The parts of the bot that the leaderboard paginators need."""
+
+    def __init__(self) -> None:
+        self.components = ComponentRouter(self)  # type: ignore
+
+
+async def _timed(samples: int, func: Callable[[], Coroutine[Any, Any, Any]]) -> List[float]:
+    timings: List[float] = []
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - started_at)
+
+    return sorted(timings)
+
+
+def _summary(name: str, timings: Sequence[float]) -> str:
+    mean = sum(timings) / len(timings) * 1000
+    p95 = timings[min(int(0.95 * len(timings)), len(timings) - 1)] * 1000
+    return f"{name:<36}{mean:>10.2f}{p95:>10.2f}"
+
+
+async def bench(args: argparse.Namespace) -> None:
+    await init_database(args.database)
+    try:
+        await _bench(args)
+    finally:
+        await connections.close_all()
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+
+    players = await Player.all().count()
+    row = await connections.get("default").execute_query_dict(
+        "SELECT guild_id, COUNT(*) AS members FROM guildplayer GROUP BY guild_id ORDER BY members DESC LIMIT 1"
+    )
+    if not players or not row:
+        raise SystemExit("The database is empty, run the generate command first.")
+
+    largest_guild = discord.Object(row[0]["guild_id"])
+    print(f"{players} players, largest guild has {row[0]['members']} members\n")
+    print(f"{'query':<36}{'mean ms':>10}{'p95 ms':>10}")
+
+    def random_player_id() -> int:
+        return BASE_USER_ID + rng.randrange(players)
+
+    results = [
+        _summary("profile lookup", await _timed(args.samples, lambda: Player.filter(id=random_player_id()).first())),
+        _summary("inventory view", await _timed(args.samples, lambda: InventoryItem.filter(player_id=random_player_id()))),
+    ]
+
+    # The queries are timed directly, get_page() would serve repeated samples
+    # from the paginator's page cache.
+    bot = _BenchBot()
+    interaction = types.SimpleNamespace(guild=largest_guild)
+
+    def leaderboard_query(paginator: LeaderboardPaginator, page: int) -> Coroutine[Any, Any, Any]:
+        offset = paginator.get_offset(page)
+        return paginator.fetch_players(interaction, offset, paginator.PER_PAGE + 1)  # type: ignore
+
+    per_page = LeaderboardPaginator.PER_PAGE
+    paginator: LeaderboardPaginator = GlobalLeaderboardPaginator(bot)  # type: ignore
+    last_page = (players - 1) // per_page
+    for label, page in (("first", 0), ("middle", last_page // 2), ("last", last_page)):
+        timings = await _timed(max(args.samples // 10, 1), lambda: leaderboard_query(paginator, page))
+        results.append(_summary(f"global leaderboard ({label} page)", timings))
+
+    paginator = GuildLeaderboardPaginator(bot)  # type: ignore
+    members = row[0]["members"]
+    for label, page in (("first", 0), ("last", (members - 1) // per_page)):
+        timings = await _timed(max(args.samples // 10, 1), lambda: leaderboard_query(paginator, page))
+        results.append(_summary(f"guild leaderboard ({label} page)", timings))
+
+    print("\n".join(results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generates a synthetic population of players for scale testing.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="populate the database")
+    generate_parser.add_argument("--players", type=int, default=1_000_000)
+    generate_parser.add_argument("--guilds", type=int, default=50_000)
+    generate_parser.add_argument("--batch-size", type=int, default=20_000, help="number of players inserted per transaction")
+
+    bench_parser = subparsers.add_parser("bench", help="time the queries of the commands against the database")
+    bench_parser.add_argument("--samples", type=int, default=200)
+
+    for subparser in (generate_parser, bench_parser):
+        subparser.add_argument("--database", default="population.sqlite3", help="path to the SQLite database file")
+        subparser.add_argument("--seed", type=int, default=None)
+
+    args = parser.parse_args()
+    asyncio.run(generate(args) if args.command == "generate" else bench(args))
@@ -0,0 +1,62 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from core import utils
+from core.cluster import ClusterSupervisor, fetch_recommended_shards, run_stub_worker, run_worker
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Runs the bot's shards in multiple worker processes.")
+    parser.add_argument("--clusters", type=int, default=None, help="number of worker processes (COBBLE_CLUSTERS)")
+    parser.add_argument("--shards", type=int, default=None, help="total number of shards (COBBLE_SHARD_COUNT), fetched from Discord if not given")
+    parser.add_argument("--stub", action="store_true", help="run workers that simulate the gateway instead of connecting to Discord")
+    parser.add_argument("--crash-probability", type=float, default=0.0, help="probability of stub workers crashing on each heartbeat")
+    parser.add_argument("--heartbeat-interval", type=float, default=5.0)
+    parser.add_argument("--heartbeat-timeout", type=float, default=60.0)
+    parser.add_argument("--report-interval", type=float, default=60.0)
+    parser.add_argument("--duration", type=float, default=None, help="stop after the given number of seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(name)s: %(message)s")
+
+    clusters = args.clusters or utils.get_config("COBBLE_CLUSTERS", 1, factory=int)
+    shard_count = args.shards or utils.get_config("COBBLE_SHARD_COUNT", None, factory=int)
+    if shard_count is None:
+        if args.stub:
+            shard_count = clusters
+        else:
+            shard_count = asyncio.run(fetch_recommended_shards(utils.get_config("COBBLE_BOT_TOKEN")))
+
+    supervisor = ClusterSupervisor(
+        shard_count=shard_count,
+        clusters=clusters,
+        target=run_stub_worker if args.stub else run_worker,
+        heartbeat_interval=args.heartbeat_interval,
+        heartbeat_timeout=args.heartbeat_timeout,
+        options={"crash_probability": args.crash_probability},
+    )
+    supervisor.run(report_interval=args.report_interval, duration=args.duration)
@@ -22,28 +22,97 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
 from tortoise import Tortoise
 from discord.ext import commands
 from core import cosmetics
+from core.profiling import SamplingProfiler, MemoryTracker
 
+import asyncio
 import discord
 
 if TYPE_CHECKING:
     from core.bot import CobbleBot
 
 
+# Discord's limit on the length of message content.
+MESSAGE_LIMIT = 2000
+
+
 class Admin(commands.Cog, command_attrs=dict(hidden=True)):
     """Administrative commands for managing bot's behaviour. (Developer only)"""
     def __init__(self, bot: CobbleBot) -> None:
         self.bot = bot
+        self.profiler = SamplingProfiler()
+        self.memory_tracker = MemoryTracker()
+        self._profiler_task: Optional[asyncio.Task[None]] = None
+
+    async def cog_unload(self) -> None:
+        if self._profiler_task is not None:
+            self._profiler_task.cancel()
+        self.profiler.stop()
+
+    def _format_table(self, rows: List[Tuple[str, int, int]], headers: Tuple[str, str, str]) -> List[str]:
+        lines = [f"{headers[0]:<60} {headers[1]:>10} {headers[2]:>10}"]
+        for name, first, second in rows:
+            # keep the end of the name which holds the most useful information
+            name = name if len(name) <= 60 else "..." + name[-57:]
+            lines.append(f"{name:<60} {first:>10} {second:>10}")
+        return lines
+
+    async def _send_code_block(self, destination: discord.abc.Messageable, lines: List[str], header: str = "", **kwargs: Any) -> None:
+        """Sends the lines in a code block, split into as many messages as needed.
+
+        The header and the keyword arguments (e.g. files) are only sent with the
+        first message.
+        """
+        messages: List[str] = []
+        block: List[str] = []
+        size = len(header)
+
+        for line in lines:
+            # Lines that don't fit in a message on their own are cut.
+            line = line[:MESSAGE_LIMIT - len(header) - 8]
+            if block and size + len(line) + 1 > MESSAGE_LIMIT - 8:
+                messages.append("```\n" + "\n".join(block) + "\n```")
+                block = []
+                size = 0
+            block.append(line)
+            size += len(line) + 1
+
+        messages.append("```\n" + "\n".join(block) + "\n```")
+
+        for idx, content in enumerate(messages):
+            if idx == 0:
+                await destination.send(header + content, **kwargs)
+            else:
+                await destination.send(content)
+
+    async def _send_profile_report(self, destination: discord.abc.Messageable, limit: int) -> None:
+        self.profiler.stop()
+        path = self.profiler.dump()
+        assert self.profiler.started_at is not None and self.profiler.stopped_at is not None
+
+        duration = self.profiler.stopped_at - self.profiler.started_at
+        await self._send_code_block(
+            destination,
+            self._format_table(self.profiler.top(limit), ("Function", "Self", "Total")),
+            f"{cosmetics.EMOJI_SUCCESS} Profiled for {duration:.1f} seconds "
+            f"({self.profiler.total_samples} samples). Collapsed stacks written to `{path}`.\n",
+            file=discord.File(path),
+        )
+
+    async def _profile_after(self, destination: discord.abc.Messageable, seconds: float, limit: int) -> None:
+        await asyncio.sleep(seconds)
+        self._profiler_task = None
+        await self._send_profile_report(destination, limit)
 
     async def cog_check(self, ctx: commands.Context[CobbleBot]) -> bool:  # type: ignore
         # Type ignore because Pyright doesn't like cog_check typehints for some reason
         return True if ctx.author.id in self.bot.config.admin_ids else False
 
     @commands.command()
-    async def synctree(self, ctx: commands.Context[CobbleBot], guild_id: Optional[int] = None) -> None:
+    async def synctree(self, ctx: commands.Context[CobbleBot], guild_id: Optional[int] = None, force: bool = False) -> None:
         """Syncs the application command tree.
 
         This command can take an optional guild parameter for the guild ID whose commands should
@@ -53,6 +122,10 @@ class Admin(commands.Cog, command_attrs=dict(hidden=True)):
 
         For convenience, if guild ID of "1" is provided, syncs the commands for the guild in which
         the command was ran in.
+
+        The commands are only synced if they changed since the last sync unless `force` is True.
+        Syncing is also refused if an extension failed to load (since its commands would be
+        removed) unless `force` is True.
         """
         if guild_id is None and self.bot.config.debug_guild_id is not None:
             guild_id = self.bot.config.debug_guild_id if self.bot.config.debug_mode else None
@@ -62,12 +135,24 @@ class Admin(commands.Cog, command_attrs=dict(hidden=True)):
         else:
             guild = None
 
-        commands = await self.bot.tree.sync(guild=guild)
+        if self.bot.failed_extensions and not force:
+            await ctx.send(
+                f"{cosmetics.EMOJI_ERROR} These extensions failed to load and their commands would be removed: "
+                f"{', '.join(self.bot.failed_extensions)}. Pass `force` to sync anyway."
+            )
+            return
+
+        result = await self.bot.tree.sync_if_changed(guild=guild, force=force)  # type: ignore
         report = f"Scope: {'Global' if guild is None else 'Guild'}\n" \
                  f"Guild ID: {guild_id}\n" \
-                 f"Commands Synced: {len(commands)}"
+                 f"Added: {', '.join(result.added) or '-'}\n" \
+                 f"Removed: {', '.join(result.removed) or '-'}\n" \
+                 f"Changed: {', '.join(result.changed) or '-'}"
 
-        await ctx.send(f"{cosmetics.EMOJI_SUCCESS} Synced the command tree successfully. ```{report}```")
+        if result.synced:
+            await ctx.send(f"{cosmetics.EMOJI_SUCCESS} Synced the command tree successfully. ```{report}```")
+        else:
+            await ctx.send(f"{cosmetics.EMOJI_WARNING} No changes since last sync, skipped syncing. Pass `force` to sync anyway. ```{report}```")
 
     @commands.command()
     async def reload(self, ctx: commands.Context[CobbleBot], extension: str) -> None:
@@ -98,10 +183,145 @@ class Admin(commands.Cog, command_attrs=dict(hidden=True)):
         await Tortoise.generate_schemas()
         await ctx.send(f"{cosmetics.EMOJI_SUCCESS} Done!")
 
+    @commands.command()
+    async def stats(self, ctx: commands.Context[CobbleBot]) -> None:
+        """Shows the per-command latency and error statistics.
+
+        The latencies are in milliseconds. DB, HTTP and CPU columns are the average
+        time spent on database queries, Discord HTTP requests and local compute.
+        """
+        metrics = self.bot.metrics
+        if not metrics.commands:
+            await ctx.send(f"{cosmetics.EMOJI_WARNING} No commands have been invoked yet.")
+            return
+
+        rows = [f"{'Command':<20} {'Calls':>6} {'p50':>6} {'p95':>6} {'p99':>6} {'DB':>6} {'HTTP':>6} {'CPU':>6} {'Qry':>5} {'Err':>4} {'CD':>4}"]
+        ordered = sorted(metrics.commands.items(), key=lambda x: x[1].invocations, reverse=True)
+
+        for name, stats in ordered:
+            rows.append(
+                f"{name[:20]:<20} {stats.invocations:>6} "
+                f"{stats.total.quantile(0.5) * 1000:>6.0f} {stats.total.quantile(0.95) * 1000:>6.0f} "
+                f"{stats.total.quantile(0.99) * 1000:>6.0f} {stats.db.mean * 1000:>6.1f} "
+                f"{stats.http.mean * 1000:>6.1f} {stats.compute.mean * 1000:>6.1f} "
+                f"{stats.queries.mean:>5.1f} {stats.errors:>4} {stats.cooldowns:>4}"
+            )
+
+        gauges = [
+            f"{group}: " + ", ".join(f"{k}={round(v, 3) if isinstance(v, float) else v}" for k, v in values.items())
+            for group, values in metrics.gauges().items()
+        ]
+
+        await self._send_code_block(ctx, rows)
+        if gauges:
+            await self._send_code_block(ctx, gauges)
+
+    @commands.group(invoke_without_command=True)
+    async def profile(self, ctx: commands.Context[CobbleBot]) -> None:
+        """Manages the sampling profiler. Use `start` and `stop` subcommands."""
+        status = "running" if self.profiler.running else "not running"
+        await ctx.send(f"The profiler is currently {status}.")
+
+    @profile.command(name="start")
+    async def profile_start(self, ctx: commands.Context[CobbleBot], seconds: float = 30.0, limit: int = 10) -> None:
+        """Starts the sampling profiler for given number of seconds.
+
+        Once finished, the top `limit` functions are shown and the collapsed stacks
+        (that can be used to generate flamegraphs) are attached.
+        """
+        if self.profiler.running:
+            await ctx.send(f"{cosmetics.EMOJI_ERROR} The profiler is already running.")
+            return
+
+        self.profiler.start()
+        self._profiler_task = asyncio.create_task(self._profile_after(ctx.channel, seconds, limit))
+        await ctx.send(f"{cosmetics.EMOJI_SUCCESS} Started profiling for {seconds} seconds.")
+
+    @profile.command(name="stop")
+    async def profile_stop(self, ctx: commands.Context[CobbleBot], limit: int = 10) -> None:
+        """Stops the sampling profiler early and shows the results."""
+        if not self.profiler.running:
+            await ctx.send(f"{cosmetics.EMOJI_ERROR} The profiler is not running.")
+            return
+
+        if self._profiler_task is not None:
+            self._profiler_task.cancel()
+            self._profiler_task = None
+
+        await self._send_profile_report(ctx, limit)
+
+    @commands.group(invoke_without_command=True)
+    async def memory(self, ctx: commands.Context[CobbleBot]) -> None:
+        """Manages the tracemalloc memory tracing. Use `start`, `snapshot` and `stop` subcommands."""
+        if not self.memory_tracker.tracing:
+            await ctx.send("Memory tracing is not running.")
+            return
+
+        traced = self.memory_tracker.traced_memory()
+        await ctx.send(f"Memory tracing is running. Current: `{traced['current'] / 1024:.1f} KiB`, Peak: `{traced['peak'] / 1024:.1f} KiB`")
+
+    @memory.command(name="start")
+    async def memory_start(self, ctx: commands.Context[CobbleBot], frames: int = 1) -> None:
+        """Starts tracing memory allocations storing the given number of frames per allocation."""
+        self.memory_tracker.start(frames)
+        await ctx.send(f"{cosmetics.EMOJI_SUCCESS} Started tracing memory allocations.")
+
+    @memory.command(name="snapshot")
+    async def memory_snapshot(self, ctx: commands.Context[CobbleBot], limit: int = 10) -> None:
+        """Takes a memory snapshot and shows the top allocations.
+
+        If a snapshot was taken before, the difference from that snapshot is shown as
+        well. The snapshot is dumped to the profiles directory.
+        """
+        if not self.memory_tracker.tracing:
+            await ctx.send(f"{cosmetics.EMOJI_ERROR} Memory tracing is not running. Use `?memory start` first.")
+            return
+
+        snapshot, previous = self.memory_tracker.snapshot()
+        path = self.memory_tracker.dump(snapshot)
+
+        top = [(loc, size // 1024, count) for loc, size, count in self.memory_tracker.top(snapshot, limit)]
+        await self._send_code_block(
+            ctx,
+            self._format_table(top, ('Location', 'KiB', 'Blocks')),
+            f"{cosmetics.EMOJI_SUCCESS} Snapshot written to `{path}`.\n**Top allocations**",
+        )
+
+        if previous is not None:
+            diff = [(loc, size // 1024, count) for loc, size, count in self.memory_tracker.diff(snapshot, previous, limit)]
+            await self._send_code_block(ctx, self._format_table(diff, ('Location', 'KiB', 'Blocks')), "**Difference from previous snapshot**")
+
+    @memory.command(name="stop")
+    async def memory_stop(self, ctx: commands.Context[CobbleBot]) -> None:
+        """Stops tracing memory allocations."""
+        self.memory_tracker.stop()
+        await ctx.send(f"{cosmetics.EMOJI_SUCCESS} Stopped tracing memory allocations.")
+
+    @commands.command()
+    async def caches(self, ctx: commands.Context[CobbleBot]) -> None:
+        """Shows the sizes of the bot's in-memory caches and the memory configuration."""
+        config = self.bot.config
+        sizes = "\n".join(f"{name:<14} {size:>10}" for name, size in self.bot.cache_sizes().items())
+        settings = f"Memory budget mode: {config.memory_budget}\n" \
+                   f"Member cache: {config.member_cache}\n" \
+                   f"Chunk guilds at startup: {config.chunk_guilds}\n" \
+                   f"Intents: members={config.members_intent}, message_content={config.message_content_intent}\n" \
+                   f"User names cache size: {config.user_cache_size}"
+
+        # ru_maxrss is in kilobytes on Linux
+        try:
+            import resource
+        except ImportError:  # Windows
+            rss = ""
+        else:
+            rss = f"\nPeak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB"
+
+        await ctx.send(f"```\n{sizes}\n``````\n{settings}{rss}\n```")
+
     @commands.command()
     async def reloadmeta(self, ctx: commands.Context[CobbleBot]) -> None:
         """Reloads the JSON metadata cache."""
-        self.bot.cache_data()
+        await self.bot.load_metadata()
         await ctx.send(f"{cosmetics.EMOJI_SUCCESS} Done!")
 
 
@@ -22,13 +22,12 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List, Union, Any
-from typing_extensions import Self
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union, Any
 from discord import app_commands
-from discord.ext import commands, menus
+from discord.ext import commands
 from core.models import InventoryItem, Player
-from core.constants import MAX_HEALTH
-from core import checks, views, cosmetics, datamodels
+from core.constants import MAX_HEALTH, SMELTING_FUEL, SMELTS_PER_FUEL
+from core import checks, views, cosmetics, datamodels, unit_of_work
 
 import math
 import random
@@ -37,31 +36,67 @@ import discord
 if TYPE_CHECKING:
     from core.bot import CobbleBot
 
-class InventoryViewSource(menus.ListPageSource):
-    bot: CobbleBot
+async def _get_profile(interaction: discord.Interaction) -> Player:
+    # Commands have it set by the has_survival_profile() check, components don't.
+    profile = interaction.extras.get("survival_profile")
+    if profile is None:
+        profile = await checks.get_survival_profile(interaction)
+    return profile
+
+
+async def _fetch_unit(player: Player, item_id: str, unit_id: int) -> Optional[InventoryItem]:
+    """Returns the inventory item (stack or durable unit) with the given ID or None if it no longer exists."""
+    for unit in await InventoryItem.fetch_all(player, item_id):
+        if unit.pk == unit_id:
+            return unit
+    return None
+
+
+class InventoryPaginator(views.RoutedPaginator):
+    """Paginates the items shown by ``/inventory view``."""
+
+    PER_PAGE = 6
+
+    def __init__(self, bot: CobbleBot) -> None:
+        super().__init__(bot, "inventory.view", ttl=60.0)
+
+    async def get_page(self, interaction: discord.Interaction, page_number: int, *args: str) -> views.Page:
+        items = await InventoryItem.fetch_all(await _get_profile(interaction))
+        last = max(math.ceil(len(items) / self.PER_PAGE) - 1, 0)
+        page_number = min(page_number, last)
+
+        offset = page_number * self.PER_PAGE
+        return views.Page(page_number, items[offset:offset + self.PER_PAGE], last)
+
+    async def format_page(self, interaction: discord.Interaction, page: views.Page, *args: str) -> Dict[str, Any]:
+        if not page.entries:
+            return {
+                "content": f"{cosmetics.EMOJI_WARNING} Nothing to show yet. The inventory is empty.",
+                "embed": None,
+                "view": None,
+            }
 
-    async def format_page(self, menu: views.Paginator, page: List[InventoryItem]) -> discord.Embed:
         embed = discord.Embed(
             title=":school_satchel: Inventory",
             description="Use the buttons to navigate.\n\n",
             color=discord.Color.dark_embed(),
         )
-        embed.set_author(name=menu.interaction.user.display_name, icon_url=menu.interaction.user.display_avatar.url)
+        embed.set_author(name=interaction.user.display_name, icon_url=interaction.user.display_avatar.url)
         assert embed.description is not None
 
         embed.description += "\n".join((
-            f"{menu.first_page.emoji} Move to first page",
-            f"{menu.prev_page.emoji} Move to previous page",
-            f"{menu.stop_page.emoji} Stop the pagination",
-            f"{menu.next_page.emoji} Move to next page",
-            f"{menu.last_page.emoji} Move to last page",
+            f"{self.EMOJIS[self.FIRST]} Move to first page",
+            f"{self.EMOJIS[self.PREVIOUS]} Move to previous page",
+            f"{self.EMOJIS[self.STOP]} Stop the pagination",
+            f"{self.EMOJIS[self.NEXT]} Move to next page",
+            f"{self.EMOJIS[self.LAST]} Move to last page",
         ))
 
         embed.description += "\n"
         embed.description += "\u2800" * 36
 
-        for inv_item in page:
-            item = menu.bot.items[inv_item.item_id]
+        for inv_item in page.entries:
+            item = self.bot.items[inv_item.item_id]
             stats = f"Quantity: `{inv_item.quantity}`\n"
 
             if item.durability is not None:
@@ -69,111 +104,88 @@ class InventoryViewSource(menus.ListPageSource):
 
             embed.add_field(name=f"{item.name(bold=False)}", value=stats, inline=True)
 
-        return embed
+        return {"embed": embed}
+
+
+class InventoryDiscardPaginator(views.RoutedPaginator):
+    """Paginates the durable units of an item for ``/inventory discard``, one unit per page."""
+
+    buttons = (views.RoutedPaginator.PREVIOUS, views.RoutedPaginator.STOP, views.RoutedPaginator.NEXT)
+
+    def __init__(self, bot: CobbleBot) -> None:
+        super().__init__(bot, "inventory.discard.units", ttl=60.0)
+
+    async def get_page(self, interaction: discord.Interaction, page_number: int, *args: str) -> views.Page:
+        item_id, = args
+        units = await InventoryItem.fetch_all(await _get_profile(interaction), item_id)
+        last = max(len(units) - 1, 0)
+        page_number = min(page_number, last)
 
+        return views.Page(page_number, units[page_number] if units else None, last)
 
-class InventoryDiscardSource(menus.ListPageSource):
-    entries: List[InventoryItem]
+    async def format_page(self, interaction: discord.Interaction, page: views.Page, *args: str) -> Dict[str, Any]:
+        item_id, = args
+        data = self.bot.items[item_id]
+        unit: Optional[InventoryItem] = page.entries
 
-    def __init__(self, entries: List[InventoryItem]):
-        super().__init__(entries, per_page=1)
+        if unit is None:
+            return {"content": f"No more {data.name()} left in your inventory.", "embed": None, "view": None}
 
-    async def format_page(self, menu: InventoryDiscardView, page: InventoryItem) -> Any:
-        # page should always have one element only.
-        data = menu.bot.items[page.item_id]
-        
         embed = discord.Embed(
             title=data.name(),
             description=f"{data.description}",
             color=discord.Color.dark_embed(),
         )
 
-        embed.add_field(name="Durability", value=f"`{page.durability}`/`{data.durability}`")
-        embed.set_footer(text=f"Item {menu.current_page + 1}/{self.get_max_pages()}")
+        embed.add_field(name="Durability", value=f"`{unit.durability}`/`{data.durability}`")
+        embed.set_footer(text=f"Item {page.number + 1}/{page.last + 1}")  # type: ignore  # last is always known
 
         return {
             "content": "Multiple items found of similar name, use the paginator below to discard the items.",
-            "embed": embed
+            "embed": embed,
         }
-    
-    def remove_item(self, item: InventoryItem) -> bool:
-        self.entries.remove(item)
-        self._max_pages -= 1
-        return self.get_max_pages() == 0
-
 
-class InventoryDiscardView(views.Paginator):
-    _source: InventoryDiscardSource
+    def extra_items(self, interaction: discord.Interaction, page: views.Page, *args: str) -> List[discord.ui.Item[Any]]:
+        item_id, = args
+        custom_id = self.bot.components.custom_id("inventory.discard.ask", interaction.user, page.number, item_id, page.entries.pk)
+        return [discord.ui.Button(row=1, label="Discard Item", emoji="\U0001f5d1", style=discord.ButtonStyle.red, custom_id=custom_id)]
 
-    def __init__(self, *, items: List[InventoryItem], bot: CobbleBot, user: discord.abc.Snowflake):
-        super().__init__(timeout=60.0, user=user, source=InventoryDiscardSource(items), bot=bot)
 
-        self.discard_in_progress = False
-        self.remove_item(self.last_page)
-        self.remove_item(self.first_page)
-
-    async def show_page(self, page_number: int):
-        if self.discard_in_progress:
-            await self.interaction.followup.send(
-                f"{cosmetics.EMOJI_ERROR} Please finish the currently in progress confirmation to go to next item.",
-                ephemeral=True,
-            )
-        else:
-            await super().show_page(page_number)
-
-    @discord.ui.button(row=1, label="Discard Item", emoji="\U0001f5d1", style=discord.ButtonStyle.red)
-    async def discard_current(self, interaction: discord.Interaction, button: discord.ui.Button[Self]) -> None:
-        self.discard_in_progress = True
-        await interaction.response.defer()
-        assert interaction.message is not None
+class Inventory(commands.GroupCog):
+    """View and manage items in your inventory."""
 
-        # So many type ignores because of the hacky implementation of views.Paginator
-        item: InventoryItem = await self._source.get_page(self.current_page)  # type: ignore
-        data = self.bot.items[item.item_id]  # type: ignore
+    # Commands that modify the inventory and are serialized per player. The discard
+    # command only asks for a confirmation, the removal is serialized by its route.
+    SERIALIZED_COMMANDS = ("craft", "smelt", "use")
 
-        confirmation = views.Confirmation(user=self.user)
-        embed = discord.Embed(
-            title=f"{cosmetics.EMOJI_DANGER} Are you sure?",
-            description=f"You are about to discard `1` {data.name()}. After discarding, the item will be lost.",
-            color=discord.Color.dark_embed(),
-        )
+    def __init__(self, bot: CobbleBot) -> None:
+        self.bot = bot
+        self._inject_command_extras()
 
-        message = await interaction.followup.send(view=confirmation, embed=embed, wait=True)
+    async def cog_load(self) -> None:
+        # The pagination and the discard confirmations are handled statelessly
+        # so that nothing waits (or holds the player) while the user decides.
+        self.view_paginator = InventoryPaginator(self.bot)
+        self.discard_paginator = InventoryDiscardPaginator(self.bot)
 
-        if await confirmation.wait():
-            # Timed out
-            await message.delete()
-        else:
-            if confirmation.confirmed:
-                # Non-stackable items are always 1 in quantity though 1 is passed explicitly
-                # here to avoid problems if stackable durable items are added in future.
-                await item.remove(quantity=1)  # type: ignore
-                msg = f"Discarded `1` {data.name()}."
-
-                if self._source.remove_item(item):  # type: ignore
-                    await interaction.message.delete()
-                    msg += " No more items of this name left."
-                else:
-                    self.discard_in_progress = False
-                    await self.show_page(self.current_page - 1)
-                    msg += " You can continue to discard items from above message."
-            else:
-                msg = "Action canceled, no changes made. You can continue to discard items from above message."
+        router = self.bot.components
+        router.add_route("inventory.discard", self._discard_confirmed, ttl=30.0, once=True, extras={"serialized": True})
+        router.add_route("inventory.discard.ask", self._discard_unit_ask, ttl=60.0)
+        router.add_route("inventory.discard.unit", self._discard_unit_confirmed, ttl=60.0, once=True, extras={"serialized": True})
 
-            await message.delete()
-            await interaction.followup.send(msg, ephemeral=True)
+    async def cog_unload(self) -> None:
+        self.view_paginator.close()
+        self.discard_paginator.close()
 
-        self.discard_in_progress = False
-
-class Inventory(commands.GroupCog):
-    """View and manage items in your inventory."""
-    def __init__(self, bot: CobbleBot) -> None:
-        self.bot = bot
-        self._inject_command_extras()
+        router = self.bot.components
+        router.remove_route("inventory.discard")
+        router.remove_route("inventory.discard.ask")
+        router.remove_route("inventory.discard.unit")
 
     def _inject_command_extras(self) -> None:
         for command in self.walk_app_commands():
             command.extras["guild_user"] = True
+            command.extras["serialized"] = command.name in self.SERIALIZED_COMMANDS
 
     def _is_usable(self, item: datamodels.Item) -> bool:
         return any((
@@ -194,35 +206,7 @@ class Inventory(commands.GroupCog):
         else:
             return False
 
-    @app_commands.command()
-    @checks.has_survival_profile()
-    async def view(self, interaction: discord.Interaction):
-        """View your inventory."""
-        items = await InventoryItem.filter(player=interaction.extras["survival_profile"])
-
-        if len(items) == 0:
-            return await interaction.response.send_message(f"{cosmetics.EMOJI_WARNING} Nothing to show yet. The inventory is empty.")
-
-        source = InventoryViewSource(items, per_page=6)
-        paginator = views.Paginator(timeout=60.0, bot=self.bot, user=interaction.user, source=source)
-        await paginator.start_pagination(interaction)
-
-
-    @app_commands.command()
-    async def info(self, interaction: discord.Interaction, item: str):
-        """Shows general information about a specific item.
-
-        Parameters
-        ----------
-        item:
-            The name of item.
-        """
-        item = item.lower().replace(" ", "_")
-
-        if item not in self.bot.items:
-            raise checks.GenericError("Unknown item name provided.")
-
-        data = self.bot.items[item]
+    def _item_info_embed(self, data: datamodels.Item) -> discord.Embed:
         embed = discord.Embed(
             title=data.name(bold=False),
             description=data.description,
@@ -254,6 +238,18 @@ class Inventory(commands.GroupCog):
                 value=str(data.crafting_quantity),
             )
 
+        graph = self.bot.recipe_graph
+        if any(dependency in graph for dependency in graph.dependencies(data.id)):
+            # Made from other craftable or smeltable items.
+            embed.add_field(
+                name="Base Materials",
+                value="\n".join(
+                    f"{amount}x {self.bot.items[reqitem].name(bold=False)}"
+                    for reqitem, amount in graph.base_materials(data.id).items()
+                ),
+                inline=False,
+            )
+
         if data.smelting_recipe is not None:
             reqitem = self.bot.items[data.smelting_recipe]
             embed.add_field(
@@ -273,6 +269,30 @@ class Inventory(commands.GroupCog):
         if other_info:
             embed.add_field(name="Other Information", value=other_info, inline=False)
 
+        return embed
+
+    @app_commands.command()
+    @checks.has_survival_profile()
+    async def view(self, interaction: discord.Interaction):
+        """View your inventory."""
+        await self.view_paginator.start(interaction)
+
+
+    @app_commands.command()
+    async def info(self, interaction: discord.Interaction, item: str):
+        """Shows general information about a specific item.
+
+        Parameters
+        ----------
+        item:
+            The name of item.
+        """
+        item = item.lower().replace(" ", "_")
+
+        if item not in self.bot.items:
+            raise checks.GenericError("Unknown item name provided.")
+
+        embed = self.bot.embeds.get("item_info", item, lambda: self._item_info_embed(self.bot.items[item]))
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command()
@@ -294,13 +314,12 @@ class Inventory(commands.GroupCog):
         if item not in self.bot.items:
             raise checks.GenericError("Unknown item name provided.")
 
-        data = await InventoryItem.filter(player=interaction.extras["survival_profile"], item_id=item)
+        data = await InventoryItem.fetch_all(interaction.extras["survival_profile"], item)
 
         if not data:
             raise checks.GenericError("You don't have this item!")
         if len(data) != 1:
-            view = InventoryDiscardView(items=data, bot=self.bot, user=interaction.user)
-            await view.start_pagination(interaction)
+            await self.discard_paginator.start(interaction, item)
             return
         else:
             inv_item = data[0]
@@ -309,29 +328,82 @@ class Inventory(commands.GroupCog):
         if quantity > inv_item.quantity:
             raise checks.GenericError(f"You don't have this much quantity. You only have `{inv_item.quantity}` {item_data.name()}.")
 
-        confirmation = views.Confirmation(user=interaction.user, timeout=30)
+        confirmation = views.RoutedConfirmation(self.bot.components, "inventory.discard", interaction.user, item, quantity, inv_item.pk)
         embed = discord.Embed(
             title=f"{cosmetics.EMOJI_DANGER} Are you sure?",
             description=f"You are about to discard `{quantity}` {item_data.name()}. After discarding, the item will be lost.",
             color=discord.Color.dark_embed(),
         )
 
-        msg = await interaction.followup.send(view=confirmation, embed=embed, wait=True)
+        await interaction.followup.send(view=confirmation, embed=embed)
 
-        if await confirmation.wait():
-            raise checks.GenericError("Action timed out. No changes made.")
+    async def _discard_confirmed(self, interaction: discord.Interaction[CobbleBot], choice: str, item_id: str, quantity: str, unit_id: str) -> None:
+        # Handles the buttons of the /inventory discard confirmation. The item
+        # may have changed since the confirmation was sent.
+        item_data = self.bot.items[item_id]
 
-        if confirmation.confirmed:
-            await inv_item.remove(quantity)
-            message = f"Discarded `{quantity}` {item_data.name()}"
-        else:
+        if choice != views.RoutedConfirmation.CONFIRM:
             message = f"Action canceled. No changes were made."
+        else:
+            current = await _fetch_unit(await _get_profile(interaction), item_id, int(unit_id))
+            if current is None or current.quantity < int(quantity):
+                message = f"{cosmetics.EMOJI_WARNING} You no longer have `{quantity}` {item_data.name()}. No changes were made."
+            else:
+                await current.remove(int(quantity))
+                message = f"Discarded `{quantity}` {item_data.name()}"
 
-        await msg.edit(content=message, embed=None, view=None)
+        await interaction.response.edit_message(content=message, embed=None, view=None)
+
+    async def _discard_unit_ask(self, interaction: discord.Interaction[CobbleBot], page_number: str, item_id: str, unit_id: str) -> None:
+        # Handles the discard button of the /inventory discard paginator.
+        data = self.bot.items[item_id]
+        embed = discord.Embed(
+            title=f"{cosmetics.EMOJI_DANGER} Are you sure?",
+            description=f"You are about to discard `1` {data.name()}. After discarding, the item will be lost.",
+            color=discord.Color.dark_embed(),
+        )
+
+        view = views.RoutedConfirmation(self.bot.components, "inventory.discard.unit", interaction.user, item_id, page_number, unit_id)
+        await interaction.response.edit_message(content=None, embed=embed, view=view)
+
+    async def _discard_unit_confirmed(
+        self,
+        interaction: discord.Interaction[CobbleBot],
+        choice: str,
+        item_id: str,
+        page_number: str,
+        unit_id: str,
+    ) -> None:
+        # Handles the confirmation of a unit discarded from the paginator, which
+        # is then shown again.
+        data = self.bot.items[item_id]
+        profile = await _get_profile(interaction)
+
+        if choice != views.RoutedConfirmation.CONFIRM:
+            message = "Action canceled, no changes made."
+        else:
+            # Written right away so that the paginator shows the remaining units.
+            async with unit_of_work.transaction():
+                current = await _fetch_unit(profile, item_id, int(unit_id))
+                if current is not None:
+                    # Non-stackable items are always 1 in quantity though 1 is passed explicitly
+                    # here to avoid problems if stackable durable items are added in future.
+                    await current.remove(quantity=1)
+
+            if current is None:
+                message = f"This {data.name()} is no longer in your inventory."
+            else:
+                message = f"Discarded `1` {data.name()}."
+
+        # The previous unit is shown after a discard, like the paginator used to.
+        page = int(page_number) - (choice == views.RoutedConfirmation.CONFIRM)
+        kwargs = await self.discard_paginator.render(interaction, max(page, 0), item_id)
+        await interaction.response.edit_message(**kwargs)
+        await interaction.followup.send(message, ephemeral=True)
 
     @app_commands.command()
     @checks.has_survival_profile()
-    async def craft(self, interaction: discord.Interaction, item: str, quantity: int = 1):
+    async def craft(self, interaction: discord.Interaction, item: str, quantity: app_commands.Range[int, 1] = 1, auto: bool = False):
         """Craft an item.
 
         Parameters
@@ -340,7 +412,13 @@ class Inventory(commands.GroupCog):
             The name of item.
         quantity:
             The amount to craft. Defaults to 1.
+        auto:
+            Whether to craft or smelt the missing intermediate items (e.g. sticks) first.
         """
+        # Discord enforces the minimum in the client but doesn't validate it.
+        if quantity < 1:
+            raise checks.GenericError("The quantity must be at least 1.")
+
         embed = discord.Embed(title="<a:minecraft_crafting_table_working:1118527217400549466> Crafting...")
         await interaction.response.send_message(embed=embed)
 
@@ -355,25 +433,30 @@ class Inventory(commands.GroupCog):
         if item_data.crafting_recipe is None:
             raise checks.GenericError("This item is not craftable.")
 
-        for item_id, crafting_quantity in item_data.crafting_recipe.items():
-            required_item_data = self.bot.items[item_id]
-            required_item = await InventoryItem.filter(
-                player=profile,
-                item_id=item_id,
-            ).first()
+        if auto:
+            return await self._auto_craft(interaction, item, quantity)
 
-            error_message = ""
-            if required_item is None:
-                error_message = f"{cosmetics.EMOJI_WARNING} You need `{crafting_quantity}` {required_item_data.name()}. You have none."
-            else:
-                required_quantity = crafting_quantity * quantity
-                if required_quantity > required_item.quantity:
-                    error_message = f"{cosmetics.EMOJI_WARNING} You need `{required_quantity}` {required_item_data.name()}. You currently have `{required_item.quantity}` of it."
-                else:
-                    await required_item.remove(required_quantity)
+        required_items: Dict[str, InventoryItem] = {}
+        for inv_item in await InventoryItem.fetch_all(profile, *item_data.crafting_recipe):
+            required_items.setdefault(inv_item.item_id, inv_item)
 
-            if error_message:
-                return await interaction.edit_original_response(content=error_message, embed=None)
+        # All the missing materials are reported at once.
+        quantities = {item_id: inv_item.quantity for item_id, inv_item in required_items.items()}
+        shortages = self.bot.recipes.shortages(item, quantity, quantities)
+
+        if shortages:
+            error_message = "\n".join(
+                f"{cosmetics.EMOJI_WARNING} You need `{required_quantity}` {self.bot.items[item_id].name()}. "
+                + (f"You currently have `{owned_quantity}` of it." if owned_quantity else "You have none.")
+                for item_id, required_quantity, owned_quantity in shortages
+            )
+            if any(item_id in self.bot.recipe_graph for item_id, _, _ in shortages):
+                error_message += "\n:bulb: Use the `auto` option to make the missing items first."
+            return await interaction.edit_original_response(content=error_message, embed=None)
+
+        # Only remove the materials once it's known that all of them are available.
+        for item_id, inv_item in required_items.items():
+            await inv_item.remove(item_data.crafting_recipe[item_id] * quantity)
 
         # At this point, all conditions have been passed and player should be eligible to
         # craft the given item so add it to inventory.
@@ -381,6 +464,95 @@ class Inventory(commands.GroupCog):
         await InventoryItem.add(player=profile, item_id=item, quantity=quantity_crafted, durability=item_data.durability)
         await interaction.edit_original_response(content=f":carpentry_saw: Crafted `{quantity_crafted}` {item_data.name()}", embed=None)
 
+    async def _auto_craft(self, interaction: discord.Interaction, item_id: str, quantity: int) -> None:
+        profile: Player = interaction.extras["survival_profile"]
+        graph = self.bot.recipe_graph
+
+        owned = await InventoryItem.fetch_all(profile, *graph.dependencies(item_id))
+        quantities: Dict[str, int] = {}
+        for inv_item in owned:
+            quantities[inv_item.item_id] = quantities.get(inv_item.item_id, 0) + inv_item.quantity
+
+        plan = graph.plan(item_id, quantity, quantities)
+
+        if plan.missing:
+            error_message = "\n".join(
+                f"{cosmetics.EMOJI_WARNING} You need `{missing_quantity}` more {self.bot.items[missing_id].name()}."
+                for missing_id, missing_quantity in plan.missing.items()
+            )
+            return await interaction.edit_original_response(content=error_message, embed=None)
+
+        # Only the net changes are applied so the intermediate items that are
+        # used up by later steps are never written. The command's unit of work
+        # writes all of them in a single transaction.
+        for consumed_id, consumed_quantity in plan.consumed.items():
+            for inv_item in owned:
+                if consumed_quantity == 0:
+                    break
+                if inv_item.item_id != consumed_id:
+                    continue
+
+                removed = min(inv_item.quantity, consumed_quantity)
+                await inv_item.remove(removed)
+                consumed_quantity -= removed
+
+        for produced_id, produced_quantity in plan.produced.items():
+            durability = self.bot.items[produced_id].durability
+            await InventoryItem.add(player=profile, item_id=produced_id, quantity=produced_quantity, durability=durability)
+
+        fuel_data = self.bot.items[SMELTING_FUEL]
+        lines = []
+        xp_gained = 0
+
+        for step in plan.steps:
+            data = self.bot.items[step.item_id]
+            if step.method == "smelt":
+                xp_gained += random.randint(1, 5)
+                lines.append(f":wood: Smelted `{step.produced}` {data.name()} using `{step.fuel}` {fuel_data.name()}")
+            else:
+                lines.append(f":carpentry_saw: Crafted `{step.produced}` {data.name()}")
+
+        embed = discord.Embed(
+            title=":carpentry_saw: Crafting",
+            description="\n".join(lines),
+            color=discord.Color.dark_embed(),
+        )
+        if xp_gained:
+            embed.set_footer(text=f"+{xp_gained} XP")
+
+        await interaction.edit_original_response(embed=embed)
+        if xp_gained:
+            await profile.add_xp(xp_gained, interaction)
+
+    @app_commands.command()
+    @checks.has_survival_profile()
+    async def craftable(self, interaction: discord.Interaction):
+        """Shows the items that you can craft with your inventory."""
+        quantities: Dict[str, int] = {}
+        for inv_item in await InventoryItem.fetch_all(interaction.extras["survival_profile"]):
+            quantities[inv_item.item_id] = quantities.get(inv_item.item_id, 0) + inv_item.quantity
+
+        craftable = self.bot.recipes.craftable(quantities)
+
+        if not craftable:
+            return await interaction.response.send_message(f"{cosmetics.EMOJI_WARNING} You don't have the materials to craft anything yet.")
+
+        entries = sorted(craftable.items(), key=lambda entry: self.bot.items[entry[0]].display_name)
+        lines = [
+            f"{self.bot.items[item_id].name()} - up to `{crafts}` (makes `{crafts * self.bot.recipes.crafting_quantities[item_id]}`)"
+            for item_id, crafts in entries[:25]
+        ]
+        if len(entries) > 25:
+            lines.append(f"...and {len(entries) - 25} more.")
+
+        embed = discord.Embed(
+            title=":carpentry_saw: Craftable Items",
+            description="\n".join(lines),
+            color=discord.Color.dark_embed(),
+        )
+        embed.set_footer(text="Use /inventory craft to craft these items.")
+        await interaction.response.send_message(embed=embed)
+
     @app_commands.command()
     @checks.has_survival_profile()
     async def smelt(self, interaction: discord.Interaction, item: str, quantity: int = 1):
@@ -406,7 +578,7 @@ class Inventory(commands.GroupCog):
         await interaction.response.send_message(embed=embed)
 
         profile: Player = interaction.extras["survival_profile"]
-        inv_item = await InventoryItem.filter(player=profile, item_id=item).first()
+        inv_item = await InventoryItem.fetch(profile, item)
 
         if inv_item is None:
             return await interaction.edit_original_response(
@@ -420,8 +592,8 @@ class Inventory(commands.GroupCog):
             )
 
         item_formed = self.bot.items[data.smelting_product]
-        coal = await InventoryItem.filter(player=profile, item_id="coal").first()
-        coal_data = self.bot.items["coal"]
+        coal = await InventoryItem.fetch(profile, SMELTING_FUEL)
+        coal_data = self.bot.items[SMELTING_FUEL]
 
         if coal is None:
             return await interaction.edit_original_response(
@@ -429,7 +601,7 @@ class Inventory(commands.GroupCog):
                 embed=None,
             )
 
-        required_fuel = math.ceil(quantity / 4)
+        required_fuel = math.ceil(quantity / SMELTS_PER_FUEL)
         if coal.quantity < required_fuel:
             message = f"{cosmetics.EMOJI_WARNING} You need `{required_fuel}` {coal_data.name()} " \
                       f"to smelt `{quantity}` {data.name()}. You only have `{coal.quantity}` of coal."
@@ -475,7 +647,7 @@ class Inventory(commands.GroupCog):
         await interaction.response.defer()
 
         profile = interaction.extras["survival_profile"]
-        inv_item = await InventoryItem.filter(item_id=item, player=profile).first()
+        inv_item = await InventoryItem.fetch(profile, item)
 
         if inv_item is None:
             raise checks.GenericError("You don't have this item.")
@@ -489,40 +661,75 @@ class Inventory(commands.GroupCog):
         else:
             raise checks.GenericError("This item cannot be used.")
 
-    # There seems to be a bug with autocompletion for integer options in discord.py.
-    # so these callbacks are commented until the problem is resolved.
+    # Discord sends the partially typed value of integer options as is so it may not
+    # be a valid integer. This callback is commented until it handles that.
 
     # @smelt.autocomplete("quantity")  # type: ignore
     # async def autocomplete_required_coal(self, interaction: discord.Interaction, current: int) -> List[app_commands.Choice[int]]:
     #     return [app_commands.Choice(name=f"Coal required: {math.ceil(current / 4)}", value=current)]
 
-    # @craft.autocomplete("quantity")  # type: ignore
-    # async def autocomplete_required_material(self, interaction: discord.Interaction, current: int) -> List[app_commands.Choice[int]]:
-    #     item_id = interaction.namespace.item.replace(" ", "_").lower()
-    #     item = self.bot.items.get(item_id)
-    #     if item is None:
-    #         return [app_commands.Choice(name=f"Invalid item name", value=current)]
-    #     if not item.crafting_recipe:
-    #         return [app_commands.Choice(name=f"Item not craftable", value=current)]
+    @craft.autocomplete("quantity")
+    async def autocomplete_craft_quantity(self, interaction: discord.Interaction, current: Any) -> List[app_commands.Choice[int]]:
+        item_id = str(interaction.namespace.item or "").replace(" ", "_").lower()
+        if item_id not in self.bot.recipes:
+            return []
 
-    #     material = [f"{q*current}x {n}" for q, n in item.crafting_recipe.items()]
-    #     return [app_commands.Choice(name=f"Required: {', '.join(material)}", value=current)]
+        data = self.bot.items[item_id]
+        quantities = dict(await self.bot.owned_items.get(interaction.user.id))
+        max_crafts = self.bot.recipes.max_crafts(item_id, quantities)
+
+        if max_crafts == 0:
+            return [app_commands.Choice(name=f"You don't have the materials to craft {data.display_name}", value=1)]
+
+        try:
+            current = int(current)
+        except (TypeError, ValueError):
+            current = 0
+
+        suggested = [current] if 0 < current < max_crafts else []
+        suggested.append(max_crafts)
 
-    @use.autocomplete("item")
-    async def autocomplete_item_name_usable(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
         return [
-            app_commands.Choice(name=f"{item.display_name}", value=item_id)
-            for item_id, item in self.bot.items.items()
-            if current.lower() in item.display_name.lower() and self._is_usable(item)
+            app_commands.Choice(
+                name=f"{crafts} (makes {crafts * data.crafting_quantity} {data.display_name}, max {max_crafts})",
+                value=crafts,
+            )
+            for crafts in suggested
         ]
 
+    async def _autocomplete_owned_items(
+        self,
+        interaction: discord.Interaction,
+        current: str,
+        predicate: Optional[Callable[[datamodels.Item], Any]] = None,
+    ) -> List[app_commands.Choice[str]]:
+        # Only the items that the player owns are suggested. These come from the
+        # owned items index so typing doesn't query the database on every keystroke.
+        current = current.lower()
+        choices: List[app_commands.Choice[str]] = []
+
+        for item_id, quantity in await self.bot.owned_items.get(interaction.user.id):
+            item = self.bot.items.get(item_id)
+            if item is None or (predicate is not None and not predicate(item)):
+                continue
+            if current in item.display_name.lower():
+                choices.append(app_commands.Choice(name=f"{item.display_name} ({quantity}x)", value=item_id))
+                if len(choices) == 25:
+                    break
+
+        return choices
+
+    @use.autocomplete("item")
+    async def autocomplete_item_name_usable(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        return await self._autocomplete_owned_items(interaction, current, self._is_usable)
+
     @smelt.autocomplete("item")
     async def autocomplete_item_name_smeltable(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
-        return [
-            app_commands.Choice(name=f"{item.display_name}", value=item_id)
-            for item_id, item in self.bot.items.items()
-            if current.lower() in item.display_name.lower() and item.smelting_product
-        ]
+        return await self._autocomplete_owned_items(interaction, current, lambda item: item.smelting_product)
+
+    @discard.autocomplete("item")
+    async def autocomplete_item_name_owned(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        return await self._autocomplete_owned_items(interaction, current)
 
     @craft.autocomplete("item")
     async def autocomplete_item_name_craftable(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
@@ -533,7 +740,6 @@ class Inventory(commands.GroupCog):
         ]
 
     @info.autocomplete("item")
-    @discard.autocomplete("item")
     async def autocomplete_item_name(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
         return [
             app_commands.Choice(name=f"{item.display_name}", value=item_id)
@@ -22,130 +22,211 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from discord import app_commands
 from discord.ext import commands
+from core.cache import LRUCache
 from core.models import Player, GuildPlayer
 from core import checks, views
 
+import asyncio
+import contextvars
 import discord
+import logging
+import math
 
 if TYPE_CHECKING:
     from core.bot import CobbleBot
 
+    PageKey = Tuple[Optional[int], int]
+
+
+_log = logging.getLogger(__name__)
+
+
+class LeaderboardPaginator(views.RoutedPaginator):
+    """Base class of the leaderboard paginators.
+
+    The fetched pages are shared by all users for `cache_ttl` seconds, and
+    the pages adjacent to a shown page are fetched in the background so that
+    navigating to them doesn't wait on the database. Only the query is done
+    ahead of time; names are resolved when a page is shown since that may
+    need API calls.
+    """
 
-class LeaderboardSource(views.LazyPaginationSource):
     TOP_THREE_EMOJIS = ["\U0001f947", "\U0001f948", "\U0001f949"]
+    PER_PAGE = 10
 
-    def __init__(self, per_page: int) -> None:
-        self.per_page = per_page
+    def __init__(self, bot: CobbleBot, name: str, *, ttl: float = 30.0, cache_size: int = 1000, cache_ttl: float = 10.0) -> None:
+        super().__init__(bot, name, ttl=ttl)
 
-        super().__init__()
+        self._pages: LRUCache[PageKey, List[Player]] = LRUCache(cache_size, ttl=cache_ttl)
+        self._prefetches: Dict[PageKey, asyncio.Task[List[Player]]] = {}
 
-    async def resolve_player_name(self, menu: views.LazyPaginator, player: Player) -> str:
-        user = menu.bot.get_user(player.id)
-        if user is None:
-            try:
-                user = menu.bot.fetch_user(player.id)
-            except discord.HTTPException:
-                return '_Unknown User_'
+    def close(self) -> None:
+        super().close()
+
+        for task in self._prefetches.values():
+            task.cancel()
+        self._prefetches.clear()
+
+    def scope(self, interaction: discord.Interaction) -> Optional[int]:
+        """Returns the ID of the guild whose players are ranked, None for all players."""
+        return None
+
+    async def resolve_player_name(self, player: Player) -> str:
+        name = await self.bot.resolve_user_name(player.id)
+        if name is None:
+            return '_Unknown User_'
 
-        return str(user)
+        return name
 
     def get_offset(self, page_number: int) -> int:
-        return page_number * self.per_page
+        return page_number * self.PER_PAGE
+
+    async def fetch_players(self, interaction: discord.Interaction, offset: int, limit: int) -> List[Player]:
+        """Returns the players ranked from ``offset`` on, sorted in descending order w.r.t. XP."""
+        raise NotImplementedError
+
+    async def get_page(self, interaction: discord.Interaction, page_number: int, *args: str) -> views.Page:
+        players = await self._fetch_page(interaction, page_number)
+        if not players and page_number > 0:
+            # Past the end (e.g. players were deleted), the last page is shown
+            # instead. It is queried directly since the cached pages may be
+            # older than the count.
+            count = await self.count_players(interaction)
+            page_number = max(math.ceil(count / self.PER_PAGE) - 1, 0)
+            players = await self._query(interaction, (self.scope(interaction), page_number))
+
+        if len(players) > self.PER_PAGE:
+            page = views.Page(page_number, players[:self.PER_PAGE], None)
+        else:
+            page = views.Page(page_number, players, page_number)
+
+        self._prefetch(interaction, page)
+        return page
+
+    async def _fetch_page(self, interaction: discord.Interaction, page_number: int) -> List[Player]:
+        key = (self.scope(interaction), page_number)
+        players = self._pages.get(key)
+        if players is not None:
+            return players
+
+        task = self._prefetches.get(key)
+        if task is not None:
+            try:
+                return await asyncio.shield(task)
+            except Exception:
+                # Retried below; the error is raised again if it persists.
+                pass
+
+        return await self._query(interaction, key)
 
+    async def _query(self, interaction: discord.Interaction, key: PageKey) -> List[Player]:
+        # One extra player is fetched to know whether there's a next page.
+        players = await self.fetch_players(interaction, self.get_offset(key[1]), self.PER_PAGE + 1)
+        self._pages[key] = players
+        return players
 
-class GlobalLeaderboardSource(LeaderboardSource):
-    def __init__(self, per_page: int) -> None:
-        super().__init__(per_page=per_page)
+    def _prefetch(self, interaction: discord.Interaction, page: views.Page) -> None:
+        scope = self.scope(interaction)
+        for adjacent in (page.number + 1, page.number - 1):
+            if adjacent < 0 or (adjacent > page.number and not page.has_next):
+                continue
 
-    async def get_page(self, page_number: int) -> List[Player]:
-        offset = self.get_offset(page_number)
-        players = await Player.filter().limit(self.per_page).offset(offset).order_by("-xp")
+            key = (scope, adjacent)
+            if key in self._pages or key in self._prefetches:
+                continue
 
-        if not players:
-            # No more players, end reached
-            self.set_last_page(page_number - 1)
-            assert self.last_page is not None
+            # The task runs in an empty context so that its queries aren't
+            # recorded for the command that happened to start it.
+            task = contextvars.Context().run(asyncio.create_task, self._query(interaction, key))
+            self._prefetches[key] = task
+            task.add_done_callback(lambda task, key=key: self._prefetch_done(key, task))
 
-            return await self.get_page(self.last_page)
+    def _prefetch_done(self, key: PageKey, task: asyncio.Task[Any]) -> None:
+        if self._prefetches.get(key) is task:
+            del self._prefetches[key]
 
-        return players
+        if not task.cancelled() and task.exception() is not None:
+            _log.debug("Failed to prefetch leaderboard page %r", key, exc_info=task.exception())
+
+    async def count_players(self, interaction: discord.Interaction) -> int:
+        """Returns the number of players on the leaderboard."""
+        raise NotImplementedError
+
+
+class GlobalLeaderboardPaginator(LeaderboardPaginator):
+    def __init__(self, bot: CobbleBot) -> None:
+        super().__init__(bot, "leaderboard.global", ttl=30.0)
 
-    async def format_page(self, menu: views.LazyPaginator, page: List[Player]):
-        # page contains list of players on current page which are sorted
-        # in descending order w.r.t to XP.
+    async def fetch_players(self, interaction: discord.Interaction, offset: int, limit: int) -> List[Player]:
+        return await Player.filter().limit(limit).offset(offset).order_by("-xp")
+
+    async def count_players(self, interaction: discord.Interaction) -> int:
+        return await Player.all().count()
+
+    async def format_page(self, interaction: discord.Interaction, page: views.Page, *args: str) -> Dict[str, Any]:
+        players: List[Player] = page.entries
         embed = discord.Embed(title=":military_medal: Leaderboard • Global", description="", color=discord.Color.dark_embed())
         assert embed.description is not None
         
-        offset = self.get_offset(menu.current_page)
+        offset = self.get_offset(page.number)
 
-        for idx, player in enumerate(page):
+        for idx, player in enumerate(players):
             flags = player.get_flags()
             if flags.hide_on_leaderboard:
                 name = '_Hidden User_'
             else:
-                name = await self.resolve_player_name(menu, player)
+                name = await self.resolve_player_name(player)
 
             rank = offset + idx + 1
             prefix = self.TOP_THREE_EMOJIS[rank - 1] if rank <= 3 else f"{rank}. "
 
             embed.description += f"{prefix} {name} ({player.xp} XP)\n"
 
-        embed.set_footer(text=f"Page {menu.current_page + 1}")
-        return embed
+        embed.set_footer(text=f"Page {page.number + 1}")
+        return {"embed": embed}
 
 
-class GuildLeaderboardSource(LeaderboardSource):
-    TOP_THREE_EMOJIS = ["\U0001f947", "\U0001f948", "\U0001f949"]
-
-    def __init__(self, per_page: int, guild: discord.Guild) -> None:
-        self.guild = guild
-        self._players: List[Player] = []  # cached players (rank higher -> lower)
+class GuildLeaderboardPaginator(LeaderboardPaginator):
+    def __init__(self, bot: CobbleBot) -> None:
+        super().__init__(bot, "leaderboard.guild", ttl=30.0)
 
-        super().__init__(per_page=per_page)
+    def scope(self, interaction: discord.Interaction) -> Optional[int]:
+        assert interaction.guild is not None
+        return interaction.guild.id
 
-    async def get_page(self, page_number: int) -> List[GuildPlayer]:
-        offset = page_number * self.per_page
+    async def fetch_players(self, interaction: discord.Interaction, offset: int, limit: int) -> List[Player]:
+        assert interaction.guild is not None
         # I don't think this is possible without raw SQL.
-        sql = f"""SELECT player_id FROM guildplayer INNER JOIN player ON 
-                 guildplayer.player_id = player.id ORDER BY player.xp DESC
-                 LIMIT {self.per_page} OFFSET {offset};"""
-
-        players = await GuildPlayer.raw(sql)
-        if not players:
-            # No more players, end reached
-            self.set_last_page(page_number - 1)
-            assert self.last_page is not None
+        sql = f"""SELECT player.* FROM guildplayer INNER JOIN player ON 
+                 guildplayer.player_id = player.id WHERE guildplayer.guild_id = {interaction.guild.id}
+                 ORDER BY player.xp DESC LIMIT {limit} OFFSET {offset};"""
 
-            return await self.get_page(self.last_page)
+        return await Player.raw(sql)  # type: ignore
 
-        return players  # type: ignore
-
-    def exhausted(self) -> bool:
-        return self.last_page is not None
-
-    def is_paginating(self) -> bool:
-        return True
+    async def count_players(self, interaction: discord.Interaction) -> int:
+        assert interaction.guild is not None
+        return await GuildPlayer.filter(guild_id=interaction.guild.id).count()
 
-    async def format_page(self, menu: views.LazyPaginator, page: List[GuildPlayer]):
+    async def format_page(self, interaction: discord.Interaction, page: views.Page, *args: str) -> Dict[str, Any]:
+        players: List[Player] = page.entries
         embed = discord.Embed(title=":military_medal: Leaderboard • Guild", description="", color=discord.Color.dark_embed())
         assert embed.description is not None
 
-        offset = self.get_offset(menu.current_page)
+        offset = self.get_offset(page.number)
 
-        for idx, guild_player in enumerate(page):
-            await guild_player.fetch_related("player")
-            name = await self.resolve_player_name(menu, guild_player.player)
+        for idx, player in enumerate(players):
+            name = await self.resolve_player_name(player)
 
             rank = offset + idx + 1
             prefix = self.TOP_THREE_EMOJIS[rank - 1] if rank <= 3 else f"{rank}. "
 
-            embed.description += f"{prefix} {name} ({guild_player.player.xp} XP)\n"
+            embed.description += f"{prefix} {name} ({player.xp} XP)\n"
 
-        embed.set_footer(text=f"Page {menu.current_page + 1} • Only users who have used the bot command at least once in the server are shown.")
-        return embed
+        embed.set_footer(text=f"Page {page.number + 1} • Only users who have used the bot command at least once in the server are shown.")
+        return {"embed": embed}
 
 
 class Leaderboard(commands.GroupCog):
@@ -153,20 +234,20 @@ class Leaderboard(commands.GroupCog):
     def __init__(self, bot: CobbleBot) -> None:
         self.bot = bot
 
+    async def cog_load(self) -> None:
+        self.global_paginator = GlobalLeaderboardPaginator(self.bot)
+        self.guild_paginator = GuildLeaderboardPaginator(self.bot)
+
+    async def cog_unload(self) -> None:
+        self.global_paginator.close()
+        self.guild_paginator.close()
+
     @app_commands.command(name="global")
     @checks.has_survival_profile()
     async def _global(self, interaction: discord.Interaction) -> None:
         """Shows the global survival leaderboard."""
         await interaction.response.defer()
-
-        source = GlobalLeaderboardSource(per_page=10)
-        paginator = views.LazyPaginator(
-            timeout=30.0,
-            bot=self.bot,
-            user=interaction.user,
-            source=source,
-        )
-        await paginator.start_pagination(interaction)
+        await self.global_paginator.start(interaction)
 
     @app_commands.command()
     @app_commands.guild_only()
@@ -175,15 +256,7 @@ class Leaderboard(commands.GroupCog):
         """Shows the guild survival leaderboard."""
         assert interaction.guild is not None
         await interaction.response.defer()
-
-        source = GuildLeaderboardSource(per_page=10, guild=interaction.guild)
-        paginator = views.LazyPaginator(
-            timeout=30.0,
-            bot=self.bot,
-            user=interaction.user,
-            source=source,
-        )
-        await paginator.start_pagination(interaction)
+        await self.guild_paginator.start(interaction)
 
 
 async def setup(bot: CobbleBot):
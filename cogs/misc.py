@@ -42,17 +42,21 @@ class Misc(commands.Cog):
         """Shows the current websocket latency of the bot."""
         await interaction.response.send_message(f":ping_pong: Pong! In {round(self.bot.latency * 1000)}ms")
 
-    @app_commands.command()
-    async def info(self, interaction: discord.Interaction) -> None:
-        """Shows information about Cobble bot."""
+    def _info_embed(self) -> discord.Embed:
         embed = discord.Embed(
             title="Cobble Bot",
             description="Minecraft inspired bot bringing realistic survival experience to Discord servers.",
             color=discord.Color.dark_embed(),
         )
-        embed.set_thumbnail(url=self.bot.user.display_avatar.url)  # type: ignore
         embed.add_field(name="Source", value="Cobble is an open source project. Check the [code repository](https://github.com/izxxr/cobble-bot)")
         embed.set_footer(text="Created with ♥ by @izxxr")
+        return embed
+
+    @app_commands.command()
+    async def info(self, interaction: discord.Interaction) -> None:
+        """Shows information about Cobble bot."""
+        embed = self.bot.embeds.get("info", None, self._info_embed)
+        embed = self.bot.embeds.overlay(embed, thumbnail=self.bot.user.display_avatar.url)  # type: ignore
         await interaction.response.send_message(embed=embed)
 
 async def setup(bot: CobbleBot):
@@ -26,8 +26,7 @@ from typing import TYPE_CHECKING
 from discord import app_commands
 from discord.ext import commands
 from core.models import Player
-from core.constants import MAX_HEALTH
-from core import cosmetics, checks, views, utils
+from core import cosmetics, checks, views, rendering
 
 import discord
 
@@ -41,18 +40,19 @@ class Profile(commands.GroupCog):
         self.bot = bot
         self._inject_command_extras()
 
+    async def cog_load(self) -> None:
+        # The deletion is confirmed statelessly so that /profile delete doesn't
+        # wait (and hold the player) while the user decides.
+        self.bot.components.add_route("profile.delete", self._delete_confirmed, once=True, extras={"serialized": True})
+
+    async def cog_unload(self) -> None:
+        self.bot.components.remove_route("profile.delete")
+
     def _inject_command_extras(self) -> None:
         for command in self.walk_app_commands():
             command.extras["guild_user"] = True
 
-    @app_commands.command()
-    async def start(self, interaction: discord.Interaction):
-        """Start your journey by creating a survival profile."""
-        if await Player.exists(id=interaction.user.id):
-            return await interaction.response.send_message(f'{cosmetics.EMOJI_ERROR} Your profile already exists.')
-
-        await Player.create(id=interaction.user.id)
-
+    def _welcome_embed(self) -> discord.Embed:
         embed = discord.Embed(
             title=":pick: Welcome!",
             description="You have successfully created your survival profile.\n\n" \
@@ -92,6 +92,17 @@ class Profile(commands.GroupCog):
             inline=False
         )
 
+        return embed
+
+    @app_commands.command()
+    async def start(self, interaction: discord.Interaction):
+        """Start your journey by creating a survival profile."""
+        if await Player.exists(id=interaction.user.id):
+            return await interaction.response.send_message(f'{cosmetics.EMOJI_ERROR} Your profile already exists.')
+
+        await Player.create(id=interaction.user.id)
+
+        embed = self.bot.embeds.get("welcome", None, self._welcome_embed)
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command()
@@ -105,23 +116,25 @@ class Profile(commands.GroupCog):
             color=discord.Color.red(),
         )
 
-        view = views.Confirmation(user=interaction.user)
-        view.confirm_button.style = discord.ButtonStyle.danger
-        view.cancel_button.style = discord.ButtonStyle.gray
-
+        view = views.RoutedConfirmation(
+            self.bot.components,
+            "profile.delete",
+            interaction.user,
+            style=discord.ButtonStyle.danger,
+        )
         await interaction.response.send_message(embed=embed, view=view)
 
-        if await view.wait():
-            message = f"{cosmetics.EMOJI_WARNING} Timed out. No changes were made."
+    async def _delete_confirmed(self, interaction: discord.Interaction[CobbleBot], choice: str) -> None:
+        # Handles the buttons of the /profile delete message.
+        if choice != views.RoutedConfirmation.CONFIRM:
+            message = f"{cosmetics.EMOJI_SUCCESS} Action cancelled. No changes were made."
         else:
-            if view.confirmed:
-                profile = interaction.extras["survival_profile"]
-                await profile.delete()
-                message = f"{cosmetics.EMOJI_WARNING} Survival profile deleted successfully."
-            else:
-                message = f"{cosmetics.EMOJI_SUCCESS} Action cancelled. No changes were made."
+            profile = await checks.get_survival_profile(interaction)
+            await profile.delete()
+            self.bot.inventories.invalidate(profile.pk)
+            message = f"{cosmetics.EMOJI_WARNING} Survival profile deleted successfully."
 
-        await interaction.edit_original_response(content=message, embed=None, view=None)
+        await interaction.response.edit_message(content=message, embed=None, view=None)
 
     @app_commands.command()
     @checks.has_survival_profile()
@@ -139,18 +152,10 @@ class Profile(commands.GroupCog):
         else:
             embed.add_field(
                 name=f"Level {profile.level}",
-                value=f"{utils.progress_bar(profile.level_xp, required_xp)} ({profile.level_xp}/{required_xp})",
+                value=f"{rendering.progress_bar(profile.level_xp, required_xp)} ({profile.level_xp}/{required_xp})",
             )
 
-        full_hearts = int(profile.health // 1)
-        half_heart = True if (profile.health % 1) == 0.5 else False
-        empty_hearts = int(MAX_HEALTH - profile.health)
-
-        embed.add_field(
-            name="Health",
-            value=f"{cosmetics.EMOJI_HEALTH*full_hearts}{cosmetics.EMOJI_HEALTH_HALF if half_heart else ''}{cosmetics.EMOJI_HEALTH_EMPTY*empty_hearts}",
-            inline=False,
-        )
+        embed.add_field(name="Health", value=rendering.health_bar(profile.health), inline=False)
 
         total = 0
         discovered = 0
@@ -25,9 +25,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Optional, List, Tuple
 from discord.ext import commands
 from discord import app_commands, ui
-from tortoise.expressions import Q
 from core.models import Player, InventoryItem
-from core import checks, datamodels, views, cosmetics
+from core import checks, components, datamodels, cosmetics, responses, unit_of_work
 
 import discord
 import random
@@ -52,51 +51,24 @@ PICKAXES_IDS = (
 )
 
 
-class ExplorationBiomeSelectView(views.AuthorizedView):
-    def __init__(self, user: discord.abc.Snowflake, bot: CobbleBot):
-        super().__init__(timeout=180.0, user=user)
-
-        self.selected_biome: Optional[datamodels.Biome] = None
-        self.selector = ExplorationBiomeSelect(bot)
-        self.add_item(self.selector)
-
-
-class ExplorationBiomeSelect(ui.Select[ExplorationBiomeSelectView]):
-    def __init__(self, bot: CobbleBot) -> None:
-        super().__init__(placeholder="Select a biome.")
-        self.bot = bot
-
-    async def callback(self, interaction: discord.Interaction[CobbleBot]) -> None:  # type: ignore
-        assert self.view is not None
-
-        await interaction.response.defer()
-        self.view.stop()
-        self.view.selected_biome = self.bot.biomes[self.values[0]]
-
-    def populate(self, player: Player) -> None:
-        biomes = self.bot.biomes
-
-        for biome_id, biome in biomes.items():
-            if not biome.discovered(player):
-                continue
-
-            self.add_option(
-                label=biome.display_name,
-                value=biome_id,
-                description=biome.description,
-                emoji=biome.emoji,
-            )
-
-
 class Survival(commands.Cog):
     """Commands for collecting resources and valuables."""
     def __init__(self, bot: CobbleBot) -> None:
         self.bot = bot
         self._inject_command_extras()
 
+    async def cog_load(self) -> None:
+        # The biome selection is handled statelessly so that /explore doesn't
+        # wait (and hold the player) while the user picks a biome.
+        self.bot.components.add_route("explore", self._explore_biome, once=True, extras={"serialized": True})
+
+    async def cog_unload(self) -> None:
+        self.bot.components.remove_route("explore")
+
     def _inject_command_extras(self) -> None:
         for command in self.walk_app_commands():
             command.extras["guild_user"] = True
+            command.extras["serialized"] = True
 
     async def _process_loot_table(self, profile: Player, table: datamodels.LootTable) -> ObtainedLootT:
         obtained_loot: ObtainedLootT = []
@@ -159,8 +131,23 @@ class Survival(commands.Cog):
         """Explore different biomes and collect valuables and other resources."""
         profile: Player = interaction.extras["survival_profile"]
 
-        view = ExplorationBiomeSelectView(interaction.user, self.bot)
-        view.selector.populate(profile)
+        select = ui.Select(
+            custom_id=self.bot.components.custom_id("explore", interaction.user),
+            placeholder="Select a biome.",
+        )
+        for biome_id, biome in self.bot.biomes.items():
+            if not biome.discovered(profile):
+                continue
+
+            select.add_option(
+                label=biome.display_name,
+                value=biome_id,
+                description=biome.description,
+                emoji=biome.emoji,
+            )
+
+        view = components.RoutedView()
+        view.add_item(select)
 
         embed = discord.Embed(
             title=":hiking_boot: Explore • Select Biome",
@@ -172,19 +159,17 @@ class Survival(commands.Cog):
         )
 
         await interaction.response.send_message(embed=embed, view=view)
-        if await view.wait():
-            return await interaction.edit_original_response(
-                embed=None,
-                view=None,
-                content=f"{cosmetics.EMOJI_ERROR} Timed out."
-            )
 
-        embed = discord.Embed(
-            title="<a:minecraft_steve_walk_side:1118071620360216606> Exploring...",
-            color=discord.Color.dark_embed(),
-        )
+    async def _explore_biome(self, interaction: discord.Interaction[CobbleBot]) -> None:
+        # Handles the biome selected from the /explore message.
+        profile = await checks.get_survival_profile(interaction)
+        values: List[str] = interaction.data.get("values", [])  # type: ignore
+        biome = self.bot.biomes.get(values[0]) if values else None
 
-        await interaction.edit_original_response(embed=embed, view=None)
+        if biome is None or not biome.discovered(profile):
+            raise checks.GenericError("This biome cannot be explored.")
+
+        await interaction.response.defer()
 
         hp = random.choice((0, 0.5))
         dead = await profile.remove_hp(hp, interaction, "You died while exploring the secrets that shouldn't be explored.")
@@ -192,20 +177,18 @@ class Survival(commands.Cog):
         if dead:
             return await interaction.delete_original_response()
 
-        assert view.selected_biome is not None
-
-        loot_table = self.bot.loot_tables["exploration_" + view.selected_biome.id]
+        loot_table = self.bot.loot_tables["exploration_" + biome.id]
         loot = await self._process_loot_table(profile, loot_table)
         xp_gained = len(loot) * random.randint(1, 5)
 
         embed = self._generate_loot_embed(
             loot,
             title=":hiking_boot: Exploration",
-            description=f"You explored the {view.selected_biome.name()}",
+            description=f"You explored the {biome.name()}",
             xp_gained=xp_gained,
         )
 
-        await interaction.edit_original_response(embed=embed)
+        await interaction.edit_original_response(embed=embed, view=None)
         await profile.add_xp(xp_gained, interaction)
 
         discovered_biome = None
@@ -223,7 +206,7 @@ class Survival(commands.Cog):
         achievements.value |= discovered_biome.discovery_achievement
 
         profile.achievements = achievements.value  # type: ignore
-        await profile.save()
+        await unit_of_work.save(profile)
 
         embed = discord.Embed(
             title=":sunrise_over_mountains: New biome discovered",
@@ -236,7 +219,7 @@ class Survival(commands.Cog):
         embed.add_field(name="Rarity", value=discovered_biome.rarity.title())
         embed.set_image(url=discovered_biome.background)
 
-        await interaction.followup.send(embed=embed, content=f"{interaction.user.mention}")
+        await responses.notify(interaction, embed, mention=True)
 
     @app_commands.command()
     @app_commands.checks.dynamic_cooldown(checks.cooldown_factory(1, 60))
@@ -248,7 +231,7 @@ class Survival(commands.Cog):
         )
 
         profile = interaction.extras["survival_profile"]
-        invitem = await InventoryItem.filter(player=profile, item_id="fishing_rod").first()
+        invitem = await InventoryItem.fetch(profile, "fishing_rod")
 
         if invitem is None:
             fishing_rod = self.bot.items["fishing_rod"]
@@ -272,7 +255,7 @@ class Survival(commands.Cog):
 
         broken = await invitem.edit_durability(-random.randint(1, 2)*len(obtained_loot))
         if broken:
-            await interaction.followup.send(embed=self._item_break_embed("fishing_rod"))
+            await responses.notify(interaction, self._item_break_embed("fishing_rod"))
 
     @app_commands.command()
     @checks.has_survival_profile()
@@ -283,7 +266,7 @@ class Survival(commands.Cog):
 
         player: Player = interaction.extras["survival_profile"]
 
-        pickaxes = await InventoryItem.filter(Q(item_id__in=PICKAXES_IDS), player=player)
+        pickaxes = await InventoryItem.fetch_all(player, *PICKAXES_IDS)
         pickaxes.sort(key=lambda x: PICKAXES_IDS.index(x.item_id))
 
         if not pickaxes:
@@ -315,7 +298,7 @@ class Survival(commands.Cog):
     
         broken = await pickaxe.edit_durability(-random.randint(1, 2)*len(loot))
         if broken:
-            await interaction.followup.send(embed=self._item_break_embed(pickaxe.item_id))
+            await responses.notify(interaction, self._item_break_embed(pickaxe.item_id))
 
 async def setup(bot: CobbleBot):
     await bot.add_cog(Survival(bot))
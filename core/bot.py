@@ -22,26 +22,44 @@
 
 from __future__ import annotations
 
-from typing import List, Optional, Dict, Any
+from typing import Awaitable, Callable, List, Optional, Dict, Any
+from dataclasses import dataclass, field
 from discord import app_commands
 from tortoise import Tortoise
-from core import utils, cosmetics, datamodels
+from core import utils, cosmetics, datamodels, responses, unit_of_work
 from discord.ext import commands
 from discord.utils import MISSING
 from core.checks import GenericError
+from core.locks import PlayerLocks, PlayerBusy
+from core.metrics import Metrics
+from core.cache import LRUCache
+from core.embeds import EmbedCache
+from core.outbound import OutboundScheduler
+from core.deferral import AutoDefer
+from core.components import ComponentRouter
+from core.inventory_cache import InventoryCache, OwnedItemsIndex
+from core.crafting import RecipeGraph, RecipeMatrix
+from core.loop_monitor import LoopMonitor
+from tortoise.backends.base.config_generator import expand_db_url
 from core.models import GuildPlayer
 
 import os
 import json
+import time
+import hashlib
+import asyncio
 import logging
 import discord
 
 __all__ = (
     'CobbleBot',
+    'ShardedCobbleBot',
 )
 
 _log = logging.getLogger()
 
+DATABASE_URL = "sqlite://db.sqlite3"
+
 LOOT_TABLES_PATHS = [
     "data/loot_tables/exploration_plains.json",
     "data/loot_tables/exploration_desert.json",
@@ -59,12 +77,236 @@ class Config:
     """This class holds the configuration values for the bot."""
     def __init__(self) -> None:
         self.token: str = utils.get_config("COBBLE_BOT_TOKEN", MISSING)
-        self.admin_ids: List[int] = [int(x) for x in utils.get_config("COBBLE_ADMIN_IDS", "").split(",")]
+        self.admin_ids: List[int] = [int(x) for x in utils.get_config("COBBLE_ADMIN_IDS", "").split(",") if x]
         self.debug_mode: bool = utils.get_config("COBBLE_DEBUG_MODE", False)
         self.debug_guild_id: Optional[int] = utils.get_config("COBBLE_GUILD_ID", None, factory=int)
+        self.metrics_host: str = utils.get_config("COBBLE_METRICS_HOST", "127.0.0.1")
+        self.metrics_port: Optional[int] = utils.get_config("COBBLE_METRICS_PORT", None, factory=int)
+        self.load_jishaku: bool = utils.get_config("COBBLE_LOAD_JISHAKU", False, cast_bool=True)
+        self.loop_block_threshold: float = utils.get_config("COBBLE_LOOP_BLOCK_THRESHOLD", 0.5, factory=float)
+        self.loop_debug: bool = utils.get_config("COBBLE_LOOP_DEBUG", False, cast_bool=True)
+        self.auto_sync: bool = utils.get_config("COBBLE_AUTO_SYNC", True, cast_bool=True)
+        self.tree_hashes_path: str = utils.get_config("COBBLE_TREE_HASHES_PATH", "tree_hashes.json")
+        self.database_url: str = utils.get_config("COBBLE_DATABASE_URL", DATABASE_URL)
+        self.outbound_scheduler: bool = utils.get_config("COBBLE_OUTBOUND_SCHEDULER", True, cast_bool=True)
+        self.outbound_route_rate: float = utils.get_config("COBBLE_OUTBOUND_ROUTE_RATE", 2.5, factory=float)
+        self.outbound_route_burst: int = utils.get_config("COBBLE_OUTBOUND_ROUTE_BURST", 5, factory=int)
+        self.outbound_global_rate: float = utils.get_config("COBBLE_OUTBOUND_GLOBAL_RATE", 0.0, factory=float)
+        self.auto_defer_budget: float = utils.get_config("COBBLE_AUTO_DEFER_BUDGET", 2.0, factory=float)
+
+        # The inventory cache assumes that a player's commands are all handled
+        # by the same process. When running multiple clusters, players using
+        # the bot in guilds of different clusters could see stale inventories
+        # so the cluster workers disable it.
+        self.inventory_cache: bool = utils.get_config("COBBLE_INVENTORY_CACHE", True, cast_bool=True)
+        self.inventory_cache_size: int = utils.get_config("COBBLE_INVENTORY_CACHE_SIZE", 10000, factory=int)
+        self.inventory_cache_ttl: float = utils.get_config("COBBLE_INVENTORY_CACHE_TTL", 600.0, factory=float)
+        self.owned_items_ttl: float = utils.get_config("COBBLE_OWNED_ITEMS_TTL", 30.0, factory=float)
+
+        # Memory budget mode: gameplay only needs user IDs from interactions so
+        # member caching, chunking and the privileged intents can be disabled
+        # to keep memory usage flat regardless of the size of guilds.
+        self.memory_budget: bool = utils.get_config("COBBLE_MEMORY_BUDGET", False, cast_bool=True)
+        self.member_cache: bool = utils.get_config("COBBLE_MEMBER_CACHE", not self.memory_budget, cast_bool=True)
+        self.chunk_guilds: bool = utils.get_config("COBBLE_CHUNK_GUILDS", not self.memory_budget, cast_bool=True)
+        self.members_intent: bool = utils.get_config("COBBLE_MEMBERS_INTENT", not self.memory_budget, cast_bool=True)
+        self.message_content_intent: bool = utils.get_config("COBBLE_MESSAGE_CONTENT_INTENT", not self.memory_budget, cast_bool=True)
+        self.user_cache_size: int = utils.get_config("COBBLE_USER_CACHE_SIZE", 1000 if self.memory_budget else 10000, factory=int)
+
+    def intents(self) -> discord.Intents:
+        """Returns the gateway intents to use.
+
+        Without the message content intent, the prefix (admin) commands can still
+        be used by mentioning the bot.
+        """
+        return discord.Intents(
+            guilds=True,
+            messages=True,
+            message_content=self.message_content_intent,
+            members=self.members_intent,
+        )
+
+    def member_cache_flags(self) -> discord.MemberCacheFlags:
+        if self.member_cache and self.members_intent:
+            return discord.MemberCacheFlags.from_intents(self.intents())
+
+        return discord.MemberCacheFlags.none()
+
+@dataclass
+class TreeSyncResult:
+    """The result of :meth:`CobbleCommandTree.sync_if_changed`."""
+
+    scope: str
+    synced: bool
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+
+    def report(self) -> str:
+        if not self.synced:
+            return f"{self.scope}: commands unchanged, sync skipped"
+
+        parts = [
+            f"{label} {', '.join(names)}"
+            for label, names in (("added", self.added), ("removed", self.removed), ("changed", self.changed))
+            if names
+        ]
+        return f"{self.scope}: synced ({'; '.join(parts) or 'forced'})"
+
 
 class CobbleCommandTree(app_commands.CommandTree):
     """The app command tree."""
+
+    def command_hashes(self, *, guild: Optional[discord.abc.Snowflake] = None) -> Dict[str, str]:
+        """Returns the stable hash of each command's payload for the given scope."""
+        hashes: Dict[str, str] = {}
+        for command in self.get_commands(guild=guild):
+            payload = json.dumps(command.to_dict(self), sort_keys=True, separators=(",", ":"))
+            key = f"{command.name} (context menu)" if isinstance(command, app_commands.ContextMenu) else command.name
+            hashes[key] = hashlib.sha256(payload.encode()).hexdigest()
+        return hashes
+
+    def _load_synced_hashes(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.client.config.tree_hashes_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    async def sync_if_changed(
+            self,
+            *,
+            guild: Optional[discord.abc.Snowflake] = None,
+            force: bool = False,
+        ) -> TreeSyncResult:
+        """Syncs the commands of the given scope only if they changed since last sync.
+
+        The hashes of the synced command payloads are stored locally in the file
+        given by COBBLE_TREE_HASHES_PATH and compared with the current commands.
+        If `force` is True, the commands are synced regardless.
+        """
+        scope = "global" if guild is None else f"guild:{guild.id}"
+        stored = self._load_synced_hashes()
+        previous = stored.get(scope, {})
+        current = self.command_hashes(guild=guild)
+
+        result = TreeSyncResult(
+            scope=scope,
+            synced=False,
+            added=sorted(current.keys() - previous.keys()),
+            removed=sorted(previous.keys() - current.keys()),
+            changed=sorted(k for k in current.keys() & previous.keys() if current[k] != previous[k]),
+        )
+
+        if not force and scope in stored and not (result.added or result.removed or result.changed):
+            return result
+
+        await self.sync(guild=guild)
+        result.synced = True
+
+        stored[scope] = current
+        with open(self.client.config.tree_hashes_path, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+
+        return result
+
+    async def _call(self, interaction: discord.Interaction[CobbleBot]) -> None:
+        command = interaction.command
+        if interaction.type is not discord.InteractionType.application_command or command is None:
+            return await self._call_in_unit_of_work(interaction, super()._call)
+
+        await self.invoke(interaction, command.qualified_name, command.extras, super()._call)
+
+    async def invoke(
+            self,
+            interaction: discord.Interaction[CobbleBot],
+            name: str,
+            extras: Dict[Any, Any],
+            callback: Callable[[discord.Interaction[CobbleBot]], Awaitable[None]],
+        ) -> None:
+        """Runs the callback for an interaction the same way as commands.
+
+        This tracks metrics, serializes the callback (if ``extras["serialized"]``
+        is set) and runs it in a unit of work. Used for application commands
+        and routed components.
+
+        The callback is responsible for handling errors and setting
+        :attr:`discord.Interaction.command_failed`.
+        """
+        metrics = interaction.client.metrics
+        guard = self._guard_response(interaction, name, extras)
+        try:
+            with metrics.track(name):
+                await self._call_serialized(interaction, extras, callback)
+        finally:
+            if guard is not None:
+                guard.stop()
+            if interaction.command_failed:
+                metrics.record_error(name)
+
+    def _guard_response(self, interaction: discord.Interaction[CobbleBot], name: str, extras: Dict[Any, Any]) -> Optional[AutoDefer]:
+        # Commands that have not responded within the budget are deferred so
+        # that slow database work doesn't exceed Discord's response deadline.
+        # Commands that must respond with a modal can opt out.
+        budget = interaction.client.config.auto_defer_budget
+        if budget <= 0 or not extras.get("auto_defer", True):
+            return None
+
+        metrics = interaction.client.metrics
+        guard = AutoDefer(interaction, budget, on_defer=lambda: metrics.record_auto_defer(name))
+        guard.start()
+        return guard
+
+    async def _call_serialized(
+            self,
+            interaction: discord.Interaction[CobbleBot],
+            extras: Dict[Any, Any],
+            callback: Callable[[discord.Interaction[CobbleBot]], Awaitable[None]],
+        ) -> None:
+        if not extras.get("serialized", False):
+            return await self._call_in_unit_of_work(interaction, callback)
+
+        # State changing commands of the same player are run one at a time so
+        # that they never read or write the same rows concurrently.
+        locks = interaction.client.player_locks
+        try:
+            await locks.acquire(interaction.user.id)
+        except PlayerBusy as err:
+            interaction.command_failed = True
+            return await self.on_error(interaction, err)
+
+        try:
+            await self._call_in_unit_of_work(interaction, callback)
+        finally:
+            locks.release(interaction.user.id)
+
+    async def _call_in_unit_of_work(
+            self,
+            interaction: discord.Interaction[CobbleBot],
+            callback: Callable[[discord.Interaction[CobbleBot]], Awaitable[None]],
+        ) -> None:
+        # Each interaction gets its own unit of work. The changes made to models
+        # during the command are only written once the command completes.
+        # Similarly, the notices (e.g. level ups) are sent once the changes
+        # they announce are written, unless they can go with the initial
+        # response of the command.
+        uow = unit_of_work.begin(interaction)
+        composer = responses.begin(interaction)
+
+        try:
+            await callback(interaction)
+        except Exception:
+            uow.rollback()
+            composer.discard()
+            raise
+
+        if interaction.command_failed:
+            uow.rollback()
+            composer.discard()
+        else:
+            await uow.commit()
+            await composer.flush()
+
     async def on_error(  # type: ignore  # As always, Pyright is dumb.
             self,
             interaction: discord.Interaction[CobbleBot],
@@ -79,6 +321,9 @@ class CobbleCommandTree(app_commands.CommandTree):
         if isinstance(error, GenericError):
             await send(f'{cosmetics.EMOJI_ERROR} {error.message}')
         elif isinstance(error, app_commands.CommandOnCooldown):
+            if interaction.command is not None:
+                interaction.client.metrics.record_cooldown(interaction.command.qualified_name)
+
             minutes, seconds = divmod(round(error.retry_after), 60)
             if minutes == 0:
                 message = f"you retry in **{seconds} seconds**."
@@ -97,37 +342,90 @@ class CobbleBot(commands.Bot):
     ----------
     config: :class:`Config`
         The bot's configuration.
+    metrics: :class:`Metrics`
+        The per-command metrics of the bot.
+    player_locks: :class:`PlayerLocks`
+        The locks used for serializing state changing commands of players.
+    user_names: :class:`LRUCache`
+        The names of users that are not in the gateway cache (e.g. fetched for
+        leaderboards), mapped by user ID.
+    embeds: :class:`EmbedCache`
+        The cache for embeds rendered from static data and metadata.
+    components: :class:`ComponentRouter`
+        The router for stateless components.
+    inventories: :class:`InventoryCache`
+        The cache of player inventories. Only used if the COBBLE_INVENTORY_CACHE
+        is enabled.
+    owned_items: :class:`OwnedItemsIndex`
+        The index of items owned by players, used by autocompletes.
+    outbound: :class:`OutboundScheduler`
+        The scheduler of interaction responses. Only used if the
+        COBBLE_OUTBOUND_SCHEDULER is enabled.
+    loop_monitor: :class:`LoopMonitor`
+        The monitor for event loop lag and blocking calls.
+    failed_extensions: List[:class:`str`]
+        The extensions that failed to load in :meth:`init_extensions`.
+    startup_timings: Dict[:class:`str`, :class:`float`]
+        The time taken (in seconds) by each startup phase. The ``setup_hook`` and
+        ``ready`` entries are measured from the call to :meth:`launch`.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, config: Optional[Config] = None, **options: Any) -> None:
+        config = config or Config()
+        metrics = Metrics()
+
         super().__init__(
             command_prefix=commands.when_mentioned_or('?'),
-            intents=discord.Intents(
-                guilds=True,
-                messages=True,
-                message_content=True,
-                members=True,
-            ),
+            intents=config.intents(),
+            member_cache_flags=config.member_cache_flags(),
+            chunk_guilds_at_startup=config.chunk_guilds,
             description="A minecraft-inspired bot bringing fun survival experience to Discord servers.",
             allowed_mentions=discord.AllowedMentions(replied_user=True, everyone=False, roles=False),
             max_messages=None,
             tree_cls=CobbleCommandTree,
+            http_trace=metrics.http_trace_config(),
+            **options,
         )
 
-        self.config: Config = MISSING
+        self.config = config
+        self.metrics = metrics
+        self.player_locks = PlayerLocks()
+        self.user_names: LRUCache[int, str] = LRUCache(config.user_cache_size)
+        self.embeds = EmbedCache()
+        self.components = ComponentRouter(self)
+        self.inventories = InventoryCache(config.inventory_cache_size, idle_ttl=config.inventory_cache_ttl)
+        if config.inventory_cache:
+            self.inventories.install()
+        self.owned_items = OwnedItemsIndex(self.inventories, config.inventory_cache_size, ttl=config.owned_items_ttl)
+        self.outbound = OutboundScheduler(
+            route_rate=config.outbound_route_rate,
+            route_burst=config.outbound_route_burst,
+            global_rate=config.outbound_global_rate,
+        )
+        self.loop_monitor: LoopMonitor = MISSING
+        self.startup_timings: Dict[str, float] = {}
+        self.failed_extensions: List[str] = []
+        self._launched_at = time.perf_counter()
+        self.metrics.register_gauges("player_locks", self.player_locks.stats)
+        self.metrics.register_gauges("cache", self.cache_sizes)
+        self.metrics.register_gauges("components", self.components.stats)
+        self.metrics.register_gauges("inventories", self.inventories.stats)
+        self.metrics.register_gauges("owned_items", self.owned_items.stats)
 
         # Data caches
         self.items: Dict[str, datamodels.Item] = {}
         self.biomes: Dict[str, datamodels.Biome] = {}
         self.loot_tables: Dict[str, datamodels.LootTable] = {}
+        self.recipes = RecipeMatrix(self.items)
+        self.recipe_graph = RecipeGraph(self.items)
 
     async def launch(self) -> None:
         """Initializes and starts the bot.
 
         Raises a ValueError if COBBLE_BOT_TOKEN is not provided.
         """
+        self._launched_at = time.perf_counter()
         discord.utils.setup_logging()
-        self.config = Config()
 
         if self.config.token is MISSING:
             raise ValueError('COBBLE_BOT_TOKEN environment variable missing')
@@ -137,6 +435,47 @@ class CobbleBot(commands.Bot):
     async def on_ready(self) -> None:
         _log.info(f'Logged in and connected as {self.user} ({self.user.id})')  # type: ignore
 
+        if "ready" not in self.startup_timings:
+            self.startup_timings["ready"] = time.perf_counter() - self._launched_at
+            _log.info("Startup timings: %s", ", ".join(f"{phase}={duration:.3f}s" for phase, duration in self.startup_timings.items()))
+
+    async def on_interaction(self, interaction: discord.Interaction[CobbleBot]) -> None:
+        await self.components.dispatch(interaction)
+
+    async def resolve_user_name(self, user_id: int) -> Optional[str]:
+        """Resolves the name of a user using the cache, fetching the user if needed.
+
+        Returns None if the user could not be fetched.
+        """
+        user = self.get_user(user_id)
+        if user is not None:
+            return str(user)
+
+        name = self.user_names.get(user_id)
+        if name is None:
+            try:
+                user = await self.fetch_user(user_id)
+            except discord.HTTPException:
+                return None
+
+            name = self.user_names[user_id] = str(user)
+
+        return name
+
+    def cache_sizes(self) -> Dict[str, int]:
+        """Returns the number of entries in the bot's in-memory caches."""
+        return {
+            "guilds": len(self.guilds),
+            "users": len(self.users),
+            "members": sum(len(guild.members) for guild in self.guilds),
+            "channels": sum(len(guild.channels) for guild in self.guilds),
+            "emojis": len(self.emojis),
+            "messages": len(self.cached_messages),
+            "user_names": len(self.user_names),
+            "embeds": len(self.embeds),
+            "player_locks": len(self.player_locks),
+        }
+
     async def on_app_command_completion(self, interaction: discord.Interaction, command: app_commands.Command[Any, Any, Any]) -> None:
         if interaction.guild is None or not command.extras.get("guild_user", False):
             return
@@ -157,53 +496,75 @@ class CobbleBot(commands.Bot):
         If `ignore_errors` is False, any extension loading error will be raised and
         remaining extensions will not be loaded. Otherwise, the error will be logged
         but the extensions loading will not be halted.
+
+        The jishaku extension is only loaded if COBBLE_LOAD_JISHAKU is enabled.
         """
         if unload_all:
-            for extension in self.extensions:
+            for extension in list(self.extensions):
                 await self.unload_extension(extension)
 
-        loaded = 0
-        total = 0
-
-        for filename in os.listdir('cogs'):
-            if not filename.endswith('.py') or filename.startswith('_'):
-                continue
+        extensions = [
+            filename[:-3]
+            for filename in os.listdir('cogs')
+            if filename.endswith('.py') and not filename.startswith('_')
+        ]
 
-            ext = filename[:-3]
-            total += 1
+        async def load(ext: str) -> bool:
             try:
                 await self.load_extension(f'cogs.{ext}')
             except Exception:
                 if not ignore_errors:
                     raise
                 logging.error('An error occured while loading extension %r' % ext)
-            else:
-                loaded += 1
+                return False
+            return True
 
-        await self.load_extension('jishaku')
-        logging.info(f'Loaded {loaded} extensions. {total - loaded} extensions could not be loaded.')
+        results = await asyncio.gather(*(load(ext) for ext in extensions))
+        loaded = sum(results)
+        self.failed_extensions = [ext for ext, ok in zip(extensions, results) if not ok]
 
+        if self.config.load_jishaku:
+            await self.load_extension('jishaku')
+
+        logging.info(f'Loaded {loaded} extensions. {len(extensions) - loaded} extensions could not be loaded.')
 
     async def init_database(self) -> None:
-        await Tortoise.init(db_url='sqlite://db.sqlite3', modules=dict(models=['core.models']))  # type: ignore
+        # The instrumented engine reports query timings for the command metrics.
+        # It is built on the SQLite client so other backends are used as is.
+        connection = expand_db_url(self.config.database_url)
+        if self.config.database_url.startswith("sqlite://"):
+            connection["engine"] = "core.db"
+        else:
+            _log.warning("Query timings are only recorded for SQLite databases.")
+
+        await Tortoise.init(config={
+            "connections": {"default": connection},
+            "apps": {"models": {"models": ["core.models"], "default_connection": "default"}},
+        })
 
     def cache_data(self) -> None:
-        """Caches the data stored in JSON files in data directory."""
+        """Caches the data stored in JSON files in data directory.
+
+        The caches are replaced at once after all the files are loaded so this
+        can safely be called from another thread (see :meth:`load_metadata`).
+        """
         _log.info("Preparing cache for survival data")
 
+        items: Dict[str, datamodels.Item] = {}
+        biomes: Dict[str, datamodels.Biome] = {}
+        loot_tables: Dict[str, datamodels.LootTable] = {}
+
         with open('data/items.json') as f:
             file = json.loads(f.read())
 
             for item_id, data in file.items():
-                item = datamodels.Item(item_id, **data)
-                self.items[item_id] = item
+                items[item_id] = datamodels.Item(item_id, **data)
 
         with open('data/biomes.json') as f:
             file = json.loads(f.read())
 
             for biome_id, data in file.items():
-                biome = datamodels.Biome(biome_id, **data)
-                self.biomes[biome_id] = biome
+                biomes[biome_id] = datamodels.Biome(biome_id, **data)
 
         _log.info("Caching loot tables")
 
@@ -211,19 +572,104 @@ class CobbleBot(commands.Bot):
             with open(path) as f:
                 file = json.loads(f.read())
                 loot_table_name = None
-                items: Dict[str, datamodels.LootTableItem] = {}
+                loot_table_items: Dict[str, datamodels.LootTableItem] = {}
 
                 for item_id, data in file.items():
                     if item_id == "name":
                         loot_table_name = data
                     else:
-                        item = datamodels.LootTableItem(item_id, **data)
-                        items[item_id] = item
+                        loot_table_items[item_id] = datamodels.LootTableItem(item_id, **data)
 
                 assert loot_table_name is not None
-                self.loot_tables[loot_table_name] = datamodels.LootTable(loot_table_name, items)
+                loot_tables[loot_table_name] = datamodels.LootTable(loot_table_name, loot_table_items)
+
+        recipes = RecipeMatrix(items)
+        recipe_graph = RecipeGraph(items)
+
+        self.items = items
+        self.biomes = biomes
+        self.loot_tables = loot_tables
+        self.recipes = recipes
+        self.recipe_graph = recipe_graph
+
+    async def load_metadata(self) -> None:
+        """Runs :meth:`cache_data` in a separate thread to avoid blocking the event loop.
+
+        The cached embeds are invalidated since they may be rendered from the
+        old metadata.
+        """
+        await asyncio.to_thread(self.cache_data)
+        self.embeds.invalidate()
+
+    async def _timed(self, phase: str, coro: Awaitable[Any]) -> None:
+        started_at = time.perf_counter()
+        try:
+            await coro
+        finally:
+            self.startup_timings[phase] = time.perf_counter() - started_at
 
     async def setup_hook(self) -> None:
-        await self.init_extensions()
-        await self.init_database()
-        self.cache_data()
\ No newline at end of file
+        self.loop_monitor = LoopMonitor(threshold=self.config.loop_block_threshold)
+        self.loop_monitor.start(debug=self.config.loop_debug)
+        self.metrics.register_gauges("loop", self.loop_monitor.stats)
+
+        if self.config.outbound_scheduler:
+            # The gateway (and hence interaction handling) is started after
+            # this so it inherits the adapter.
+            if self.outbound.install():
+                self.metrics.register_gauges("outbound", self.outbound.stats)
+
+        # None of these depend on each other (cogs only access the database and
+        # metadata when commands are invoked) so they are run concurrently.
+        await asyncio.gather(
+            self._timed("extensions", self.init_extensions()),
+            self._timed("database", self.init_database()),
+            self._timed("metadata", self.load_metadata()),
+        )
+
+        if self.config.metrics_port is not None:
+            await self._timed(
+                "metrics_server",
+                self.metrics.start_server(self.config.metrics_host, self.config.metrics_port),
+            )
+
+        if self.config.auto_sync:
+            if self.failed_extensions:
+                # The commands of the failed extensions are missing from the
+                # tree so syncing it would delete them.
+                _log.error(
+                    "Not syncing the command tree since these extensions failed to load: %s",
+                    ", ".join(self.failed_extensions),
+                )
+            else:
+                await self._timed("tree_sync", self.sync_tree())
+
+        self.startup_timings["setup_hook"] = time.perf_counter() - self._launched_at
+
+    async def sync_tree(self, *, force: bool = False) -> List[TreeSyncResult]:
+        """Syncs the global commands (and debug guild commands in debug mode) if they changed."""
+        scopes: List[Optional[discord.abc.Snowflake]] = [None]
+        if self.config.debug_mode and self.config.debug_guild_id is not None:
+            scopes.append(discord.Object(self.config.debug_guild_id))
+
+        results: List[TreeSyncResult] = []
+        for guild in scopes:
+            result = await self.tree.sync_if_changed(guild=guild, force=force)  # type: ignore
+            _log.info("Command tree %s", result.report())
+            results.append(result)
+
+        return results
+
+    async def close(self) -> None:
+        if self.loop_monitor is not MISSING:
+            self.loop_monitor.stop()
+
+        self.outbound.close()
+        await self.metrics.close()
+        await super().close()
+
+class ShardedCobbleBot(CobbleBot, commands.AutoShardedBot):
+    """The cobble bot running a subset of shards, used by cluster workers.
+
+    See :mod:`core.cluster` for more information.
+    """
@@ -0,0 +1,132 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import Generic, Iterator, Optional, Tuple, TypeVar, Union, overload
+from collections import OrderedDict
+
+import time
+
+__all__ = (
+    'LRUCache',
+)
+
+K = TypeVar("K")
+V = TypeVar("V")
+T = TypeVar("T")
+
+
+class LRUCache(Generic[K, V]):
+    """A mapping-like cache that evicts the least recently used entries.
+
+    Parameters
+    ----------
+    maxsize: :class:`int`
+        The maximum number of entries. Once exceeded, the least recently used
+        entry is evicted.
+    ttl: Optional[:class:`float`]
+        The number of seconds after which an entry expires. If None, entries
+        only get evicted when the cache is full.
+    """
+
+    def __init__(self, maxsize: int, *, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, Tuple[V, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(list(self._data))
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and (time.monotonic() - stored_at) > self.ttl
+
+    @overload
+    def get(self, key: K) -> Optional[V]:
+        ...
+
+    @overload
+    def get(self, key: K, default: T) -> Union[V, T]:
+        ...
+
+    def get(self, key: K, default: Optional[T] = None) -> Optional[Union[V, T]]:
+        try:
+            value, stored_at = self._data[key]
+        except KeyError:
+            return default
+
+        if self._expired(stored_at):
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def __getitem__(self, key: K) -> V:
+        try:
+            value, stored_at = self._data[key]
+        except KeyError:
+            raise KeyError(key) from None
+
+        if self._expired(stored_at):
+            del self._data[key]
+            raise KeyError(key)
+
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K, default: Optional[T] = None) -> Optional[Union[V, T]]:
+        try:
+            return self._data.pop(key)[0]
+        except KeyError:
+            return default
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def expire(self) -> int:
+        """Removes all the expired entries. Returns the number of removed entries."""
+        if self.ttl is None:
+            return 0
+
+        expired = [key for key, (_, stored_at) in self._data.items() if self._expired(stored_at)]
+        for key in expired:
+            del self._data[key]
+
+        return len(expired)
@@ -32,6 +32,7 @@ if TYPE_CHECKING:
 
 __all__ = (
     'GenericError',
+    'get_survival_profile',
     'has_survival_profile',
     'cooldown_factory',
 )
@@ -44,15 +45,24 @@ class GenericError(app_commands.AppCommandError):
         self.message = message
 
 
+async def get_survival_profile(interaction: Interaction) -> Player:
+    """Returns the survival profile of the user and stores it in ``interaction.extras["survival_profile"]``.
+
+    Raises GenericError if the user has no survival profile.
+    """
+    profile = await Player.filter(id=interaction.user.id).first()
+    if profile is None:
+        raise GenericError('No survival profile created yet. Use `/profile start` to create one.')
+
+    interaction.extras["survival_profile"] = profile
+    return profile
+
+
 def has_survival_profile():
     """Check to ensure that the user running a command has a survival profile."""
     async def predicate(interaction: Interaction) -> bool:
-        profile = await Player.filter(id=interaction.user.id).first()
-        if profile:
-            interaction.extras["survival_profile"] = profile
-            return True
-
-        raise GenericError('No survival profile created yet. Use `/profile start` to create one.')
+        await get_survival_profile(interaction)
+        return True
 
     return app_commands.check(predicate)
 
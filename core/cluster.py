@@ -0,0 +1,369 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import random
+import signal
+import time
+
+if TYPE_CHECKING:
+    from multiprocessing.process import BaseProcess
+    from multiprocessing.queues import Queue
+
+    WorkerTarget = Callable[[int, List[int], int, "Queue[Dict[str, Any]]", Dict[str, Any]], None]
+
+__all__ = (
+    'WorkerState',
+    'ClusterSupervisor',
+    'fetch_recommended_shards',
+    'split_shards',
+    'run_worker',
+    'run_stub_worker',
+)
+
+_log = logging.getLogger(__name__)
+
+
+def split_shards(shard_count: int, clusters: int) -> List[List[int]]:
+    """Splits the shard IDs in contiguous chunks, one for each cluster."""
+    clusters = max(min(clusters, shard_count), 1)
+    per_cluster = math.ceil(shard_count / clusters)
+    return [
+        list(range(start, min(start + per_cluster, shard_count)))
+        for start in range(0, shard_count, per_cluster)
+    ]
+
+
+async def fetch_recommended_shards(token: str) -> int:
+    """Fetches the number of shards recommended by Discord for the bot."""
+    import discord
+
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(token)
+        data = await http.get_bot_gateway()
+    finally:
+        await http.close()
+
+    return data[0]
+
+
+def run_worker(
+        cluster_id: int,
+        shard_ids: List[int],
+        shard_count: int,
+        queue: Queue[Dict[str, Any]],
+        options: Dict[str, Any],
+    ) -> None:
+    """The entry point of a worker process running a subset of shards."""
+    from core.bot import Config, ShardedCobbleBot
+    from tortoise import run_async  # type: ignore
+
+    config = Config()
+    # Only the first cluster syncs the command tree and each cluster gets its
+    # own metrics port.
+    config.auto_sync = config.auto_sync and cluster_id == 0
+    if config.metrics_port is not None:
+        config.metrics_port += cluster_id
+
+    # A player's commands can be handled by any cluster (the one running the
+    # shard of the guild they are used in) so a per-process inventory cache
+    # would go stale, and the player locks don't serialize a player's commands
+    # that are handled by different clusters.
+    if options.get("clusters", 1) > 1:
+        if config.inventory_cache:
+            _log.warning("Disabling the inventory cache of cluster %d since it isn't shared between clusters", cluster_id)
+            config.inventory_cache = False
+        _log.warning(
+            "Player locks of cluster %d aren't shared between clusters, commands of a "
+            "player used in guilds on different clusters can run concurrently",
+            cluster_id,
+        )
+
+    bot = ShardedCobbleBot(config, shard_ids=shard_ids, shard_count=shard_count)
+    interval = options.get("heartbeat_interval", 5.0)
+
+    async def report_health() -> None:
+        while True:
+            queue.put({
+                "cluster_id": cluster_id,
+                "ready": bot.is_ready(),
+                "guilds": len(bot.guilds),
+                "latencies": {shard_id: latency for shard_id, latency in bot.latencies},
+            })
+            await asyncio.sleep(interval)
+
+    async def main() -> None:
+        # Terminating the worker closes the bot gracefully.
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
+        reporter = asyncio.create_task(report_health())
+        try:
+            await bot.launch()
+        finally:
+            reporter.cancel()
+
+    # Interrupts are handled by the supervisor.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_async(main())
+
+
+def run_stub_worker(
+        cluster_id: int,
+        shard_ids: List[int],
+        shard_count: int,
+        queue: Queue[Dict[str, Any]],
+        options: Dict[str, Any],
+    ) -> None:
+    """A worker that simulates the gateway connection instead of connecting to Discord.
+
+    This is useful for testing the supervisor locally. If `crash_probability`
+    is given in the options, the worker crashes randomly with that probability
+    on every heartbeat.
+    """
+    interval = options.get("heartbeat_interval", 5.0)
+    crash_probability = options.get("crash_probability", 0.0)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    time.sleep(random.uniform(0.1, 0.5))  # "connecting"
+    while True:
+        queue.put({
+            "cluster_id": cluster_id,
+            "ready": True,
+            "guilds": len(shard_ids) * 100,
+            "latencies": {shard_id: random.uniform(0.03, 0.1) for shard_id in shard_ids},
+        })
+        if random.random() < crash_probability:
+            raise SystemExit(1)
+
+        time.sleep(interval)
+
+
+@dataclass
+class WorkerState:
+    """The state of a worker process as seen by the supervisor."""
+
+    cluster_id: int
+    shard_ids: List[int]
+    process: Optional[BaseProcess] = None
+    started_at: float = 0.0
+    last_heartbeat: Optional[float] = None
+    restarts: int = 0
+    failures: int = 0
+    health: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class ClusterSupervisor:
+    """Spawns and supervises the worker processes of a cluster.
+
+    Each worker runs a subset of shards. Workers that crash (exit with non-zero
+    code) or stop sending heartbeats are restarted with an exponential backoff.
+
+    The player locks are per process. A guild always lands on the same shard
+    but a player can use the bot in guilds on different clusters, so with more
+    than one cluster the commands of a player are not serialized across them.
+
+    Parameters
+    ----------
+    shard_count: :class:`int`
+        The total number of shards.
+    clusters: :class:`int`
+        The number of worker processes to spread the shards over.
+    target:
+        The function run by worker processes, :func:`run_worker` by default.
+    heartbeat_interval: :class:`float`
+        The interval in which workers report their health.
+    heartbeat_timeout: :class:`float`
+        The number of seconds without a heartbeat after which a worker is
+        considered stuck and restarted.
+    options:
+        Additional options passed to the worker target.
+    """
+
+    def __init__(
+            self,
+            *,
+            shard_count: int,
+            clusters: int,
+            target: WorkerTarget = run_worker,
+            heartbeat_interval: float = 5.0,
+            heartbeat_timeout: float = 60.0,
+            max_backoff: float = 60.0,
+            options: Optional[Dict[str, Any]] = None,
+        ) -> None:
+        self.shard_count = shard_count
+        self.target = target
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_backoff = max_backoff
+        self.options = dict(options or {}, heartbeat_interval=heartbeat_interval)
+
+        self._context = multiprocessing.get_context("spawn")
+        self._queue: Queue[Dict[str, Any]] = self._context.Queue()
+        self._restart_at: Dict[int, float] = {}
+        self._stopping = False
+
+        self.workers = [
+            WorkerState(cluster_id=idx, shard_ids=shard_ids)
+            for idx, shard_ids in enumerate(split_shards(shard_count, clusters))
+        ]
+        self.options["clusters"] = len(self.workers)
+
+    def _spawn(self, worker: WorkerState) -> None:
+        worker.process = self._context.Process(
+            target=self.target,
+            args=(worker.cluster_id, worker.shard_ids, self.shard_count, self._queue, self.options),
+            name=f"cobble-cluster-{worker.cluster_id}",
+            daemon=True,
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.last_heartbeat = None
+        worker.health = {}
+        _log.info("Started cluster %d (shards %s, PID %s)", worker.cluster_id, worker.shard_ids, worker.process.pid)
+
+    def _schedule_restart(self, worker: WorkerState, reason: str) -> None:
+        if worker.cluster_id in self._restart_at:
+            return
+
+        backoff = min(2 ** worker.failures, self.max_backoff)
+        worker.restarts += 1
+        worker.failures += 1
+        self._restart_at[worker.cluster_id] = time.monotonic() + backoff
+        _log.warning("Cluster %d %s, restarting in %.0f seconds", worker.cluster_id, reason, backoff)
+
+    def _receive_heartbeats(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                data = self._queue.get(timeout=remaining)
+            except Exception:  # queue.Empty
+                return
+
+            worker = self.workers[data["cluster_id"]]
+            worker.last_heartbeat = time.monotonic()
+            worker.health = data
+
+    def check_workers(self) -> None:
+        """Restarts the workers that crashed or stopped responding."""
+        now = time.monotonic()
+
+        for worker in self.workers:
+            restart_at = self._restart_at.get(worker.cluster_id)
+            if restart_at is not None:
+                if now >= restart_at:
+                    del self._restart_at[worker.cluster_id]
+                    self._spawn(worker)
+                continue
+
+            process = worker.process
+            if process is None:
+                continue
+
+            if not process.is_alive():
+                if process.exitcode == 0:
+                    _log.info("Cluster %d exited gracefully", worker.cluster_id)
+                    worker.process = None
+                else:
+                    self._schedule_restart(worker, f"crashed with exit code {process.exitcode}")
+                continue
+
+            last_seen = worker.last_heartbeat or worker.started_at
+            if now - last_seen > self.heartbeat_timeout:
+                process.kill()
+                process.join()
+                self._schedule_restart(worker, f"sent no heartbeat for {now - last_seen:.0f} seconds")
+            elif now - worker.started_at > self.max_backoff:
+                # The worker has been stable for a while so the backoff is reset.
+                worker.failures = 0
+
+    def health(self) -> Dict[str, Any]:
+        """Returns the aggregated health of all workers."""
+        latencies = [
+            latency
+            for worker in self.workers
+            if worker.alive
+            for latency in worker.health.get("latencies", {}).values()
+            if math.isfinite(latency)
+        ]
+        return {
+            "clusters": len(self.workers),
+            "alive": sum(worker.alive for worker in self.workers),
+            "ready": sum(bool(worker.alive and worker.health.get("ready")) for worker in self.workers),
+            "shards": self.shard_count,
+            "guilds": sum(worker.health.get("guilds", 0) for worker in self.workers if worker.alive),
+            "restarts": sum(worker.restarts for worker in self.workers),
+            "avg_latency": (sum(latencies) / len(latencies)) if latencies else None,
+        }
+
+    def stop(self, *args: Any) -> None:
+        self._stopping = True
+
+    def run(self, *, report_interval: float = 60.0, duration: Optional[float] = None) -> None:
+        """Starts the workers and supervises them until stopped (or for `duration` seconds)."""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        for worker in self.workers:
+            self._spawn(worker)
+
+        started_at = last_report = time.monotonic()
+
+        try:
+            while not self._stopping:
+                self._receive_heartbeats(timeout=1.0)
+                self.check_workers()
+
+                now = time.monotonic()
+                if now - last_report >= report_interval:
+                    last_report = now
+                    _log.info("Cluster health: %s", self.health())
+                if duration is not None and now - started_at >= duration:
+                    break
+        finally:
+            self.shutdown()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Terminates all the workers."""
+        for worker in self.workers:
+            if worker.alive:
+                worker.process.terminate()  # type: ignore
+
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout)
+                if worker.process.is_alive():
+                    worker.process.kill()
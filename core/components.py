@@ -0,0 +1,321 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional
+from discord import app_commands, ui
+from core.cache import LRUCache
+from core.checks import GenericError
+from core import cosmetics
+
+import discord
+import logging
+import secrets
+import time
+
+if TYPE_CHECKING:
+    from core.bot import CobbleBot
+
+    ComponentCallback = Callable[..., Awaitable[None]]
+
+__all__ = (
+    'PREFIX',
+    'ComponentRoute',
+    'ComponentRouter',
+    'RoutedView',
+)
+
+_log = logging.getLogger(__name__)
+
+# The prefix of custom IDs handled by the router. Custom IDs without it belong
+# to regular views.
+PREFIX = "cobble"
+
+# Discord's limit on the length of custom IDs.
+MAX_CUSTOM_ID_LENGTH = 100
+
+
+class RoutedView(ui.View):
+    """A view made of components handled by the :class:`ComponentRouter`.
+
+    The view only serves to lay out the components when sending a message.
+    It never times out and is never added to the view store, so it can be
+    discarded right after the message is sent.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(timeout=None)
+
+    def is_finished(self) -> bool:
+        # discord.py doesn't store finished views.
+        return True
+
+
+class ComponentRoute:
+    """A handler of components registered in :class:`ComponentRouter`.
+
+    Attributes
+    ----------
+    name: :class:`str`
+        The name of route. This is part of custom IDs.
+    callback:
+        The handler. It takes the interaction followed by the arguments
+        encoded in the custom ID.
+    ttl: :class:`float`
+        The number of seconds after which the components expire.
+    once: :class:`bool`
+        Whether the components of a message can only be used once. Components
+        that only differ by their first argument (e.g. the confirm and cancel
+        buttons of a message) share the claim, so using one uses up all of them.
+    clear_on_expire: :class:`bool`
+        Whether the message is replaced with a timed out notice when an expired
+        component is used. Otherwise only the components are removed.
+    extras: :class:`dict`
+        The extras used when running the handler, same as :attr:`app_commands.Command.extras`
+        (e.g. ``serialized``).
+    """
+
+    __slots__ = ('name', 'callback', 'ttl', 'once', 'clear_on_expire', 'extras')
+
+    def __init__(
+        self,
+        name: str,
+        callback: ComponentCallback,
+        *,
+        ttl: float,
+        once: bool,
+        clear_on_expire: bool,
+        extras: Dict[str, Any],
+    ) -> None:
+        self.name = name
+        self.callback = callback
+        self.ttl = ttl
+        self.once = once
+        self.clear_on_expire = clear_on_expire
+        self.extras = extras
+
+
+class ComponentRouter:
+    """Dispatches component interactions to handlers based on their custom IDs.
+
+    Unlike views, no state is held in memory while waiting for users to interact.
+    The state is encoded in the custom ID instead, in the following format::
+
+        cobble:<route>:<user ID>:<issued at>:<arguments...>
+
+    Only the user the component was sent to can use it and it expires after
+    the route's TTL. Since nothing is held in memory, the components keep
+    working across restarts.
+
+    The exception are single use components. Their claims are kept in memory
+    until the components expire, so single use components issued before the
+    router was created (i.e. before a restart) are treated as expired rather
+    than risking a second use.
+
+    State that doesn't fit into a custom ID can be stored with :meth:`stash`.
+    Stashed values are only kept in memory for a limited time.
+
+    Parameters
+    ----------
+    bot: :class:`CobbleBot`
+        The bot.
+    stash_size: :class:`int`
+        The maximum number of stashed values.
+    stash_ttl: :class:`float`
+        The number of seconds after which stashed values expire.
+    """
+
+    def __init__(self, bot: CobbleBot, *, stash_size: int = 10000, stash_ttl: float = 900.0) -> None:
+        self.bot = bot
+        self._routes: Dict[str, ComponentRoute] = {}
+        self._stash: LRUCache[str, Any] = LRUCache(stash_size, ttl=stash_ttl)
+        # Custom IDs store the issue time in whole seconds.
+        self._started_at = int(time.time())
+
+        # The claims of single use components that have been used, mapped to
+        # the time the components expire. Unlike the stash, claims are never
+        # evicted before then, otherwise the component could be used again.
+        self._claims: Dict[str, float] = {}
+        self._claims_pruned_at = time.monotonic()
+
+    def add_route(
+        self,
+        name: str,
+        callback: ComponentCallback,
+        *,
+        ttl: float = 180.0,
+        once: bool = False,
+        clear_on_expire: bool = True,
+        extras: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Registers a handler for the components of the given route.
+
+        Raises ValueError if the name is invalid or already registered.
+        """
+        if not name or ":" in name:
+            raise ValueError(f"invalid route name {name!r}")
+        if name in self._routes:
+            raise ValueError(f"route {name!r} is already registered")
+
+        self._routes[name] = ComponentRoute(
+            name,
+            callback,
+            ttl=ttl,
+            once=once,
+            clear_on_expire=clear_on_expire,
+            extras=extras or {},
+        )
+
+    def remove_route(self, name: str) -> None:
+        self._routes.pop(name, None)
+
+    def custom_id(self, name: str, user: discord.abc.Snowflake, *args: Any) -> str:
+        """Returns the custom ID for a component of the given route.
+
+        The arguments are converted to strings and passed to the route's
+        handler when the component is used.
+        """
+        if name not in self._routes:
+            raise ValueError(f"route {name!r} is not registered")
+
+        parts = [PREFIX, name, str(user.id), _to_base36(int(time.time()))]
+        for arg in args:
+            arg = str(arg)
+            if ":" in arg:
+                raise ValueError(f"custom ID arguments cannot contain ':' ({arg!r})")
+            parts.append(arg)
+
+        custom_id = ":".join(parts)
+        if len(custom_id) > MAX_CUSTOM_ID_LENGTH:
+            raise ValueError(f"custom ID for route {name!r} is too long, consider using stash()")
+
+        return custom_id
+
+    def stash(self, value: Any) -> str:
+        """Stores a value and returns the key to pass in a custom ID."""
+        key = secrets.token_urlsafe(6)
+        self._stash[key] = value
+        return key
+
+    def unstash(self, key: str) -> Any:
+        """Returns a stashed value.
+
+        Raises GenericError if the value has expired.
+        """
+        try:
+            return self._stash[key]
+        except KeyError:
+            raise GenericError("This interaction has expired, please run the command again.") from None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routes": len(self._routes),
+            "stashed": len(self._stash),
+            "used": len(self._claims),
+        }
+
+    def _claim(self, key: str, expires_at: float) -> bool:
+        """Claims a single use component. Returns False if it was already used."""
+        now = time.monotonic()
+        if now - self._claims_pruned_at > 60:
+            self._claims_pruned_at = now
+            current = time.time()
+            self._claims = {key: expiry for key, expiry in self._claims.items() if expiry > current}
+
+        if key in self._claims:
+            return False
+
+        self._claims[key] = expires_at
+        return True
+
+    async def dispatch(self, interaction: discord.Interaction[CobbleBot]) -> bool:
+        """Dispatches a component interaction to its route's handler.
+
+        Returns False if the interaction is not for a routed component.
+        """
+        if interaction.type is not discord.InteractionType.component:
+            return False
+
+        custom_id: str = interaction.data.get("custom_id", "")  # type: ignore
+        if not custom_id.startswith(PREFIX + ":"):
+            return False
+
+        try:
+            _, name, user_id, issued_at, *args = custom_id.split(":")
+            route = self._routes[name]
+            issued_at = int(issued_at, 36)
+            user_id = int(user_id)
+        except (ValueError, KeyError):
+            _log.debug("Ignoring component with unknown custom ID %r", custom_id)
+            return False
+
+        if interaction.user.id != user_id:
+            await interaction.response.send_message(f'{cosmetics.EMOJI_ERROR} You cannot interact with this!')
+            return True
+
+        # Single use components issued before a restart may have been used
+        # already, their claims are lost.
+        if time.time() - issued_at > route.ttl or (route.once and issued_at < self._started_at):
+            if route.clear_on_expire:
+                await interaction.response.edit_message(content=f"{cosmetics.EMOJI_ERROR} Timed out.", embed=None, view=None)
+            else:
+                await interaction.response.edit_message(view=None)
+            return True
+
+        # The first argument tells apart the components of the same message.
+        claim = ":".join((name, str(user_id), str(issued_at), *args[1:]))
+
+        async def callback(interaction: discord.Interaction[CobbleBot]) -> None:
+            # This runs after acquiring the player lock for serialized routes
+            # so repeated clicks are seen here one at a time.
+            if route.once and not self._claim(claim, issued_at + route.ttl):
+                return await interaction.response.defer()
+
+            try:
+                await route.callback(interaction, *args)
+            except app_commands.AppCommandError as err:
+                interaction.command_failed = True
+                await self.bot.tree.on_error(interaction, err)
+            except Exception:
+                interaction.command_failed = True
+                raise
+            finally:
+                # Failed attempts don't use up the component.
+                if route.once and interaction.command_failed:
+                    self._claims.pop(claim, None)
+
+        try:
+            await self.bot.tree.invoke(interaction, f"component:{name}", route.extras, callback)
+        except Exception:
+            _log.exception("Ignoring exception in component route %r", name)
+
+        return True
+
+
+def _to_base36(value: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    result = ""
+    while True:
+        value, rem = divmod(value, 36)
+        result = digits[rem] + result
+        if value == 0:
+            return result
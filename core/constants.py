@@ -22,3 +22,6 @@
 
 XP_FACTOR = 100
 MAX_HEALTH = 8
+
+SMELTING_FUEL = "coal"
+SMELTS_PER_FUEL = 4
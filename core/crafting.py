@@ -0,0 +1,338 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Mapping, NamedTuple, Tuple
+from core.constants import SMELTING_FUEL, SMELTS_PER_FUEL
+
+if TYPE_CHECKING:
+    from core.datamodels import Item
+
+__all__ = (
+    'RecipeMatrix',
+    'Recipe',
+    'PlanStep',
+    'CraftingPlan',
+    'RecipeGraph',
+)
+
+
+class RecipeMatrix:
+    """The crafting recipes compiled into a recipe × item requirement matrix.
+
+    Each row is the recipe of a craftable item and each column is an item
+    used as an ingredient. Since recipes only have a few ingredients, rows
+    are stored sparsely as ``(column, amount)`` pairs.
+
+    An inventory is turned into a vector of owned quantities (one entry per
+    column) once, after which every recipe is evaluated against it in a
+    single pass.
+
+    Parameters
+    ----------
+    items: Mapping[:class:`str`, :class:`Item`]
+        The item catalog.
+    """
+
+    def __init__(self, items: Mapping[str, Item]) -> None:
+        columns: Dict[str, int] = {}
+        recipes: List[str] = []
+        rows: List[Tuple[Tuple[int, int], ...]] = []
+
+        for item_id, item in items.items():
+            if not item.crafting_recipe:
+                continue
+
+            recipes.append(item_id)
+            rows.append(tuple(
+                (columns.setdefault(ingredient, len(columns)), amount)
+                for ingredient, amount in item.crafting_recipe.items()
+            ))
+
+        self.columns = columns
+        self.ingredients = tuple(columns)
+        self.recipes = tuple(recipes)
+        self.crafting_quantities = {item_id: items[item_id].crafting_quantity for item_id in recipes}
+        self._rows = dict(zip(recipes, rows))
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._rows
+
+    def vector(self, quantities: Mapping[str, int]) -> List[int]:
+        """Returns the inventory vector, i.e. the owned quantity of each column."""
+        return [quantities.get(item_id, 0) for item_id in self.columns]
+
+    def max_crafts(self, item_id: str, quantities: Mapping[str, int]) -> int:
+        """Returns the number of times the given item can be crafted.
+
+        Raises KeyError if the item is not craftable.
+        """
+        ingredients = self.ingredients
+        return min(quantities.get(ingredients[column], 0) // amount for column, amount in self._rows[item_id])
+
+    def craftable(self, quantities: Mapping[str, int]) -> Dict[str, int]:
+        """Returns the number of times each item can be crafted, mapped by item ID.
+
+        Items that cannot be crafted even once are not included.
+        """
+        vector = self.vector(quantities)
+        result: Dict[str, int] = {}
+
+        for item_id, row in self._rows.items():
+            crafts = min(vector[column] // amount for column, amount in row)
+            if crafts > 0:
+                result[item_id] = crafts
+
+        return result
+
+    def shortages(self, item_id: str, crafts: int, quantities: Mapping[str, int]) -> List[Tuple[str, int, int]]:
+        """Returns the missing ingredients for crafting an item the given number of times.
+
+        Each entry is a tuple of the ingredient's item ID, the required quantity
+        and the owned quantity. Raises KeyError if the item is not craftable
+        and ValueError if ``crafts`` is less than one.
+        """
+        if crafts < 1:
+            raise ValueError("crafts must be at least 1")
+
+        ingredients = self.ingredients
+        result: List[Tuple[str, int, int]] = []
+
+        for column, amount in self._rows[item_id]:
+            ingredient = ingredients[column]
+            required = amount * crafts
+            owned = quantities.get(ingredient, 0)
+            if owned < required:
+                result.append((ingredient, required, owned))
+
+        return result
+
+
+class Recipe(NamedTuple):
+    method: str
+    """Either ``craft`` or ``smelt``."""
+
+    item_id: str
+    """The produced item."""
+
+    ingredients: Tuple[Tuple[str, int], ...]
+    """The consumed items and their amounts for a single run."""
+
+    yields: int
+    """The produced quantity of a single run."""
+
+
+class PlanStep(NamedTuple):
+    method: str
+    item_id: str
+    runs: int
+    produced: int
+    fuel: int
+
+
+class CraftingPlan:
+    """The steps needed to craft an item, in the order they are to be performed.
+
+    Attributes
+    ----------
+    steps: List[:class:`PlanStep`]
+        The crafts and smelts. Ingredients always come before the items that
+        are made from them.
+    consumed: Dict[:class:`str`, :class:`int`]
+        The quantities taken from the inventory (including smelting fuel),
+        mapped by item ID.
+    produced: Dict[:class:`str`, :class:`int`]
+        The quantities added to the inventory, mapped by item ID. Intermediate
+        items that are used up by the later steps are not included.
+    missing: Dict[:class:`str`, :class:`int`]
+        The base materials that are missing from the inventory, mapped by item
+        ID. The plan can only be performed if this is empty.
+    """
+
+    __slots__ = ('steps', 'consumed', 'produced', 'missing')
+
+    def __init__(self) -> None:
+        self.steps: List[PlanStep] = []
+        self.consumed: Dict[str, int] = {}
+        self.produced: Dict[str, int] = {}
+        self.missing: Dict[str, int] = {}
+
+
+class RecipeGraph:
+    """The dependency graph of crafting and smelting recipes.
+
+    Each item that can be crafted or smelted has an edge to every item it is
+    made from (including the fuel for smelting). The graph is checked for
+    cycles on construction so that expanding a recipe always terminates.
+
+    Parameters
+    ----------
+    items: Mapping[:class:`str`, :class:`Item`]
+        The item catalog.
+
+    Raises
+    ------
+    ValueError
+        The recipes contain a cycle.
+    """
+
+    def __init__(self, items: Mapping[str, Item]) -> None:
+        recipes: Dict[str, Recipe] = {}
+
+        for item_id, item in items.items():
+            if item.crafting_recipe:
+                recipes[item_id] = Recipe("craft", item_id, tuple(item.crafting_recipe.items()), item.crafting_quantity)
+            elif item.smelting_recipe is not None:
+                recipes[item_id] = Recipe("smelt", item_id, ((item.smelting_recipe, 1),), 1)
+
+        self.recipes = recipes
+        self._dependencies: Dict[str, FrozenSet[str]] = {}
+        self._base_materials: Dict[str, Dict[str, int]] = {}
+        self._check_cycles()
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.recipes
+
+    def _edges(self, item_id: str) -> List[str]:
+        recipe = self.recipes.get(item_id)
+        if recipe is None:
+            return []
+
+        edges = [ingredient for ingredient, _ in recipe.ingredients]
+        if recipe.method == "smelt":
+            edges.append(SMELTING_FUEL)
+        return edges
+
+    def _check_cycles(self) -> None:
+        # Iterative depth first search; an edge to an item that is still on
+        # the stack closes a cycle.
+        visiting, visited = 1, 2
+        state: Dict[str, int] = {}
+
+        for root in self.recipes:
+            if root in state:
+                continue
+
+            path = [root]
+            stack = [iter(self._edges(root))]
+            state[root] = visiting
+
+            while stack:
+                item_id = next(stack[-1], None)
+                if item_id is None:
+                    state[path.pop()] = visited
+                    stack.pop()
+                elif state.get(item_id) == visiting:
+                    cycle = path[path.index(item_id):] + [item_id]
+                    raise ValueError(f"Recipe cycle detected: {' -> '.join(cycle)}")
+                elif item_id not in state:
+                    state[item_id] = visiting
+                    path.append(item_id)
+                    stack.append(iter(self._edges(item_id)))
+
+    def dependencies(self, item_id: str) -> FrozenSet[str]:
+        """Returns every item that the given item is (directly or indirectly) made from."""
+        try:
+            return self._dependencies[item_id]
+        except KeyError:
+            pass
+
+        result = set()
+        for ingredient in self._edges(item_id):
+            result.add(ingredient)
+            result.update(self.dependencies(ingredient))
+
+        dependencies = self._dependencies[item_id] = frozenset(result)
+        return dependencies
+
+    def base_materials(self, item_id: str) -> Dict[str, int]:
+        """Returns the base materials needed to make the given item once with an empty inventory.
+
+        Raises KeyError if the item can't be crafted or smelted. The returned
+        dictionary must not be modified.
+        """
+        try:
+            return self._base_materials[item_id]
+        except KeyError:
+            pass
+
+        materials = self._base_materials[item_id] = self.plan(item_id, 1, {}).missing
+        return materials
+
+    def plan(self, item_id: str, runs: int, quantities: Mapping[str, int]) -> CraftingPlan:
+        """Plans making an item the given number of times with the given inventory.
+
+        The owned quantities are used first and any missing intermediate items
+        are crafted or smelted from base materials. Raises KeyError if the item
+        can't be crafted or smelted and ValueError if ``runs`` is less than one.
+        """
+        if runs < 1:
+            raise ValueError("runs must be at least 1")
+
+        plan = CraftingPlan()
+        stock = dict(quantities)
+        self._expand(self.recipes[item_id], runs, stock, plan)
+
+        for owned_id, quantity in stock.items():
+            change = quantity - quantities.get(owned_id, 0)
+            if change < 0:
+                plan.consumed[owned_id] = -change
+            elif change > 0:
+                plan.produced[owned_id] = change
+
+        return plan
+
+    def _take(self, item_id: str, quantity: int, stock: Dict[str, int], plan: CraftingPlan) -> None:
+        available = stock.get(item_id, 0)
+        used = min(available, quantity)
+        stock[item_id] = available - used
+        quantity -= used
+
+        if quantity == 0:
+            return
+
+        recipe = self.recipes.get(item_id)
+        if recipe is None:
+            plan.missing[item_id] = plan.missing.get(item_id, 0) + quantity
+            return
+
+        runs = -(-quantity // recipe.yields)
+        self._expand(recipe, runs, stock, plan)
+        # Whatever is left over stays in the inventory.
+        stock[item_id] -= quantity
+
+    def _expand(self, recipe: Recipe, runs: int, stock: Dict[str, int], plan: CraftingPlan) -> None:
+        for ingredient, amount in recipe.ingredients:
+            self._take(ingredient, amount * runs, stock, plan)
+
+        fuel = 0
+        if recipe.method == "smelt":
+            fuel = -(-runs // SMELTS_PER_FUEL)
+            self._take(SMELTING_FUEL, fuel, stock, plan)
+
+        produced = runs * recipe.yields
+        stock[recipe.item_id] = stock.get(recipe.item_id, 0) + produced
+        plan.steps.append(PlanStep(recipe.method, recipe.item_id, runs, produced, fuel))
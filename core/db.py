@@ -0,0 +1,77 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Tortoise database engine that instruments the SQLite client.
+
+This module can be used as the ``engine`` of a Tortoise connection. It behaves
+exactly like ``tortoise.backends.sqlite`` but reports the time taken by each
+query to :mod:`core.metrics`.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+from tortoise.backends.base.client import ConnectionWrapper, TransactionContext
+from tortoise.backends.sqlite.client import SqliteClient, TransactionWrapper
+from core import metrics
+
+import time
+
+__all__ = (
+    'InstrumentedSqliteClient',
+    'client_class',
+)
+
+
+class _TimedConnectionWrapper(ConnectionWrapper):
+    __slots__ = ('started_at',)
+
+    async def __aenter__(self):
+        self.started_at = time.perf_counter()
+        return await super().__aenter__()
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await super().__aexit__(exc_type, exc_val, exc_tb)
+        metrics.record_query(time.perf_counter() - self.started_at)
+
+
+class _InstrumentedTransactionWrapper(TransactionWrapper):
+    def acquire_connection(self) -> ConnectionWrapper:
+        return _TimedConnectionWrapper(self._lock, self)
+
+    async def commit(self) -> None:
+        started_at = time.perf_counter()
+        await super().commit()
+        metrics.record_query(time.perf_counter() - started_at)
+
+
+class InstrumentedSqliteClient(SqliteClient):
+    """SQLite client reporting the query timings to :mod:`core.metrics`."""
+
+    def acquire_connection(self) -> ConnectionWrapper:
+        return _TimedConnectionWrapper(self._lock, self)
+
+    def _in_transaction(self) -> TransactionContext:
+        return TransactionContext(_InstrumentedTransactionWrapper(self))
+
+
+client_class = InstrumentedSqliteClient
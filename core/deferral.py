@@ -0,0 +1,176 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+import asyncio
+import discord
+import logging
+
+if TYPE_CHECKING:
+    from discord import Interaction
+
+__all__ = (
+    'AutoDefer',
+    'GuardedResponse',
+)
+
+_log = logging.getLogger(__name__)
+
+
+class GuardedResponse:
+    """Wraps the response of an interaction guarded by :class:`AutoDefer`.
+
+    Responses are serialized with the automatic deferral so that the two never
+    race. Once the interaction has been deferred automatically:
+
+    - messages sent through :meth:`send_message` are sent as followups instead,
+    - edits through :meth:`edit_message` edit the original message instead,
+    - further calls to :meth:`defer` do nothing,
+    - :meth:`send_modal` raises :class:`~core.checks.GenericError` since a modal
+      can only be sent as the initial response.
+
+    Other attributes are looked up on the wrapped response.
+    """
+
+    __slots__ = ('_response', '_interaction', '_lock', 'auto_deferred')
+
+    def __init__(self, interaction: Interaction, response: Any) -> None:
+        self._interaction = interaction
+        self._response = response
+        self._lock = asyncio.Lock()
+        self.auto_deferred = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+    def is_done(self) -> bool:
+        return self._response.is_done()
+
+    async def defer(self, **kwargs: Any) -> Any:
+        async with self._lock:
+            if self.auto_deferred:
+                return None
+            return await self._response.defer(**kwargs)
+
+    async def send_message(self, *args: Any, **kwargs: Any) -> Any:
+        async with self._lock:
+            if self.auto_deferred:
+                # Followups cannot be deleted after a delay.
+                kwargs.pop("delete_after", None)
+                return await self._interaction.followup.send(*args, **kwargs)
+            return await self._response.send_message(*args, **kwargs)
+
+    async def edit_message(self, **kwargs: Any) -> Any:
+        async with self._lock:
+            if self.auto_deferred:
+                # The original message of a deferred component interaction is
+                # the message the component is attached to.
+                kwargs.pop("delete_after", None)
+                kwargs.pop("suppress_embeds", None)
+                return await self._interaction.edit_original_response(**kwargs)
+            return await self._response.edit_message(**kwargs)
+
+    async def send_modal(self, modal: Any) -> Any:
+        async with self._lock:
+            if self.auto_deferred:
+                from core.checks import GenericError
+                raise GenericError("This took too long to respond, please try again.")
+            return await self._response.send_modal(modal)
+
+    async def _auto_defer(self) -> bool:
+        # A response being sent at the same time means that the command
+        # responded in time (or is about to) so there's nothing to do.
+        if self._lock.locked() or self._response.is_done():
+            return False
+
+        async with self._lock:
+            if self._interaction.type is discord.InteractionType.component:
+                # Components usually edit their message so the update is
+                # deferred, a "thinking" state would need a new message.
+                await self._response.defer()
+            else:
+                await self._response.defer(thinking=True)
+            self.auto_deferred = True
+            return True
+
+
+class AutoDefer:
+    """Defers the response of an interaction that has not responded within the budget.
+
+    Discord requires interactions to be responded to within three seconds.
+    Commands that do database work before responding can exceed this when the
+    database is contended; the guard acknowledges the interaction on their
+    behalf so that they can finish with followups.
+
+    Parameters
+    ----------
+    interaction: :class:`discord.Interaction`
+        The interaction to guard. Its response is replaced by :class:`GuardedResponse`.
+    budget: :class:`float`
+        The number of seconds to wait for a response before deferring.
+    on_defer: Optional[Callable[[], None]]
+        Called when the interaction is deferred automatically.
+    """
+
+    def __init__(self, interaction: Interaction, budget: float, *, on_defer: Optional[Callable[[], None]] = None) -> None:
+        self.response = GuardedResponse(interaction, interaction.response)
+        self.on_defer = on_defer
+        self._budget = budget
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task[None]] = None
+
+        # Interaction.response is a cached slot so replacing the cached value
+        # makes the command (and everything else) use the guarded response.
+        interaction._cs_response = self.response  # type: ignore
+
+    @property
+    def deferred(self) -> bool:
+        """Whether the interaction was deferred automatically."""
+        return self.response.auto_deferred
+
+    def start(self) -> None:
+        """Starts the budget timer."""
+        # A timer handle instead of a task per interaction; commands usually
+        # respond in time and the task is only created when they don't.
+        self._handle = asyncio.get_running_loop().call_later(self._budget, self._expire)
+
+    def stop(self) -> None:
+        """Stops the budget timer. Any in progress deferral is left to complete."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _expire(self) -> None:
+        self._handle = None
+        self._task = asyncio.create_task(self._defer())
+
+    async def _defer(self) -> None:
+        try:
+            deferred = await self.response._auto_defer()
+        except Exception:
+            _log.exception("Failed to automatically defer an interaction")
+            return
+
+        if deferred and self.on_defer is not None:
+            self.on_defer()
@@ -0,0 +1,98 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import Callable, Hashable, Optional, Tuple
+from core.cache import LRUCache
+
+import copy
+import discord
+
+__all__ = (
+    'EmbedCache',
+)
+
+
+class EmbedCache:
+    """A cache for embeds that only depend on static data or the bot's metadata.
+
+    The embeds are keyed by the template name, the ID of the entity they are
+    rendered for (e.g. item ID) and the metadata version. The cache is
+    invalidated (and version bumped) whenever the metadata is reloaded.
+
+    The returned embeds are shared between invocations and must not be modified.
+    Use :meth:`overlay` to apply per-user data.
+
+    Parameters
+    ----------
+    maxsize: :class:`int`
+        The maximum number of embeds to keep.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.version = 0
+        self._embeds: LRUCache[Tuple[str, Hashable, int], discord.Embed] = LRUCache(maxsize)
+
+    def __len__(self) -> int:
+        return len(self._embeds)
+
+    def get(self, template: str, key: Hashable, factory: Callable[[], discord.Embed]) -> discord.Embed:
+        """Returns the embed for the given template and key.
+
+        The `factory` is only called to render the embed if it isn't cached.
+        """
+        cache_key = (template, key, self.version)
+        embed = self._embeds.get(cache_key)
+        if embed is None:
+            embed = self._embeds[cache_key] = factory()
+
+        return embed
+
+    def invalidate(self) -> None:
+        """Invalidates all the cached embeds."""
+        self.version += 1
+        self._embeds.clear()
+
+    @staticmethod
+    def overlay(
+            embed: discord.Embed,
+            *,
+            author: Optional[discord.abc.User] = None,
+            thumbnail: Optional[str] = None,
+            footer: Optional[str] = None,
+        ) -> discord.Embed:
+        """Returns a copy of the cached embed with the given per-user fields set.
+
+        This is a shallow copy so it is cheap. It's safe since setting these
+        fields replaces the underlying data instead of modifying it.
+        """
+        embed = copy.copy(embed)
+
+        if author is not None:
+            embed.set_author(name=author.display_name, icon_url=author.display_avatar.url)
+        if thumbnail is not None:
+            embed.set_thumbnail(url=thumbnail)
+        if footer is not None:
+            embed.set_footer(text=footer)
+
+        return embed
@@ -0,0 +1,322 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from core.cache import LRUCache
+from core import unit_of_work
+
+import asyncio
+import time
+
+if TYPE_CHECKING:
+    from core.models.inventory import InventoryItem
+
+__all__ = (
+    'PlayerInventory',
+    'InventoryCache',
+    'OwnedItem',
+    'OwnedItemsIndex',
+    'current',
+)
+
+_cache: Optional[InventoryCache] = None
+
+
+class PlayerInventory:
+    """The cached inventory of a player.
+
+    Items are grouped by item ID. Stackable items have a single entry while
+    durable items have an entry per unit, in the order they were added.
+
+    The ``version`` is incremented whenever an item is tracked (i.e. saved)
+    or forgotten (i.e. deleted).
+    """
+
+    __slots__ = ('player_id', 'version', '_items')
+
+    def __init__(self, player_id: int, items: Iterable[InventoryItem] = ()) -> None:
+        self.player_id = player_id
+        self.version = 0
+        self._items: Dict[str, List[InventoryItem]] = {}
+
+        for item in items:
+            self.track(item)
+
+    def __len__(self) -> int:
+        return sum(len(units) for units in self._items.values())
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._items
+
+    def first(self, item_id: str) -> Optional[InventoryItem]:
+        """Returns the stack (or the first durable unit) of the given item."""
+        units = self._items.get(item_id)
+        return units[0] if units else None
+
+    def all(self, *item_ids: str) -> List[InventoryItem]:
+        """Returns the items with the given IDs or all items if no IDs are given."""
+        if not item_ids:
+            return [item for units in self._items.values() for item in units]
+
+        return [item for item_id in item_ids for item in self._items.get(item_id, ())]
+
+    def quantity(self, item_id: str) -> int:
+        """Returns the owned quantity of the given item (number of units for durable items)."""
+        return sum(item.quantity for item in self._items.get(item_id, ()))
+
+    def quantities(self) -> Dict[str, int]:
+        """Returns the owned quantities, mapped by item ID."""
+        return {item_id: sum(item.quantity for item in units) for item_id, units in self._items.items()}
+
+    def track(self, item: InventoryItem) -> bool:
+        """Adds an item to the cached inventory.
+
+        Returns False if another instance of the same item is cached.
+        """
+        self.version += 1
+        units = self._items.setdefault(item.item_id, [])
+        for unit in units:
+            if unit is item:
+                return True
+            if item.pk is not None and unit.pk == item.pk:
+                return False
+
+        units.append(item)
+        return True
+
+    def forget(self, item: InventoryItem) -> bool:
+        """Removes an item from the cached inventory.
+
+        Returns False if the exact item instance is not cached.
+        """
+        units = self._items.get(item.item_id, [])
+        for idx, unit in enumerate(units):
+            if unit is item:
+                self.version += 1
+                del units[idx]
+                if not units:
+                    del self._items[item.item_id]
+                return True
+
+        return False
+
+
+class InventoryCache:
+    """Caches the inventories of players so that repeated reads don't query database.
+
+    The inventory of a player is loaded with a single query on first access.
+    It is kept up to date by the mutations of :class:`InventoryItem`, and the
+    changes themselves are written by the unit of work of the command. If
+    those changes are not written (e.g. the command failed), or another copy
+    of the inventory got cached in the meantime, the inventory is evicted and
+    loaded again on next access.
+
+    Parameters
+    ----------
+    maxsize: :class:`int`
+        The maximum number of cached inventories. The least recently used are
+        evicted first.
+    idle_ttl: :class:`float`
+        The number of seconds after which an inventory that isn't accessed is
+        evicted.
+    """
+
+    def __init__(self, maxsize: int = 10000, *, idle_ttl: float = 600.0) -> None:
+        self._entries: LRUCache[int, PlayerInventory] = LRUCache(maxsize, ttl=idle_ttl)
+        self._loading: Dict[int, asyncio.Future[PlayerInventory]] = {}
+        self._expired_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def install(self) -> None:
+        """Makes this the cache used by :class:`InventoryItem`."""
+        global _cache
+        _cache = self
+
+    def peek(self, player_id: int) -> Optional[PlayerInventory]:
+        """Returns the cached inventory of a player without loading it."""
+        return self._entries.get(player_id)
+
+    async def get(self, player_id: int) -> PlayerInventory:
+        """Returns the inventory of a player, loading it if not cached."""
+        inventory = self._entries.get(player_id)
+        if inventory is not None:
+            self.hits += 1
+            # Re-inserting refreshes the idle timer.
+            self._entries[player_id] = inventory
+            return inventory
+
+        self.misses += 1
+        future = self._loading.get(player_id)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = self._loading[player_id] = asyncio.get_running_loop().create_future()
+        try:
+            inventory = await self._load(player_id)
+        except Exception as err:
+            future.set_exception(err)
+            # Don't warn about unretrieved exceptions if there were no waiters.
+            future.exception()
+            raise
+        else:
+            future.set_result(inventory)
+        finally:
+            del self._loading[player_id]
+            if not future.done():
+                future.cancel()
+
+        self._entries[player_id] = inventory
+        self._expire()
+        return inventory
+
+    async def _load(self, player_id: int) -> PlayerInventory:
+        # Circular import
+        from core.models.inventory import InventoryItem
+
+        items = await InventoryItem.filter(player_id=player_id).order_by("id")
+        return PlayerInventory(player_id, items)
+
+    def _expire(self) -> None:
+        # Idle inventories are otherwise only dropped when accessed or when
+        # the cache is full.
+        now = time.monotonic()
+        if now - self._expired_at > 60:
+            self._expired_at = now
+            self._entries.expire()
+
+    def invalidate(self, player_id: int) -> None:
+        """Evicts the inventory of a player."""
+        self._entries.pop(player_id)
+
+    def mutated(self, player_id: int) -> None:
+        """Marks the inventory of a player as modified by the current unit of work.
+
+        Once the unit of work completes, the inventory is evicted unless the
+        changes were written and it is still the cached copy.
+        """
+        uow = unit_of_work.current()
+        if uow is None:
+            return
+
+        inventory = self._entries.get(player_id)
+
+        def callback(written: bool) -> None:
+            if not written or self._entries.get(player_id) is not inventory:
+                self.invalidate(player_id)
+
+        uow.on_complete((self, player_id), callback)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class OwnedItem(NamedTuple):
+    item_id: str
+    quantity: int
+
+
+class OwnedItemsIndex:
+    """A short-lived index of the items owned by players, mainly for autocompletes.
+
+    The index of a player is built from the cached inventory when the inventory
+    cache is installed and is rebuilt as soon as the cached inventory changes.
+    Otherwise, it is built with a single query and may be stale for up to
+    ``ttl`` seconds.
+
+    Parameters
+    ----------
+    inventories: :class:`InventoryCache`
+        The inventory cache to build the index from, if installed.
+    maxsize: :class:`int`
+        The maximum number of indexed players.
+    ttl: :class:`float`
+        The number of seconds for which the index of a player is used.
+    """
+
+    def __init__(self, inventories: InventoryCache, maxsize: int = 10000, *, ttl: float = 30.0) -> None:
+        self._inventories = inventories
+        self._entries: LRUCache[int, Tuple[Optional[PlayerInventory], int, Tuple[OwnedItem, ...]]] = LRUCache(maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, player_id: int) -> Tuple[OwnedItem, ...]:
+        """Returns the items owned by a player, sorted by item ID.
+
+        Durable items are counted by the number of units.
+        """
+        installed = self._inventories is _cache
+        entry = self._entries.get(player_id)
+        if entry is not None:
+            inventory, version, items = entry
+            if not installed or (inventory is self._inventories.peek(player_id) and inventory.version == version):  # type: ignore
+                self.hits += 1
+                return items
+
+        self.misses += 1
+        if installed:
+            inventory = await self._inventories.get(player_id)
+            version = inventory.version
+            quantities = inventory.quantities()
+        else:
+            inventory, version = None, 0
+            quantities = await self._load(player_id)
+
+        items = tuple(OwnedItem(item_id, quantity) for item_id, quantity in sorted(quantities.items()))
+        self._entries[player_id] = (inventory, version, items)
+        return items
+
+    async def _load(self, player_id: int) -> Dict[str, int]:
+        # Circular import
+        from core.models.inventory import InventoryItem
+
+        quantities: Dict[str, int] = {}
+        for item_id, quantity in await InventoryItem.filter(player_id=player_id).values_list("item_id", "quantity"):
+            quantities[item_id] = quantities.get(item_id, 0) + quantity
+        return quantities
+
+    def invalidate(self, player_id: int) -> None:
+        """Drops the index of a player."""
+        self._entries.pop(player_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def current() -> Optional[InventoryCache]:
+    """Returns the installed inventory cache, if any."""
+    return _cache
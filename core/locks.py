@@ -0,0 +1,166 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import Any, Dict, FrozenSet
+from contextvars import ContextVar
+from core.checks import GenericError
+
+import asyncio
+import time
+
+__all__ = (
+    'PlayerBusy',
+    'PlayerLocks',
+    'holding',
+)
+
+# The players whose locks are held by the current task.
+_held: ContextVar[FrozenSet[int]] = ContextVar("_held", default=frozenset())
+
+
+class PlayerBusy(GenericError):
+    """Raised when a player's command could not acquire the player lock in time."""
+
+
+class _PlayerLock:
+    __slots__ = ('lock', 'users')
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0  # holder + waiters
+
+
+class PlayerLocks:
+    """Keyed locks serializing the state changing commands of each player.
+
+    Commands from different players run fully in parallel while the commands of
+    the same player run one after another. Locks are created lazily and removed
+    as soon as no command holds or waits on them.
+
+    The locks are local to the process; they don't serialize the commands of
+    a player handled by different clusters.
+
+    Parameters
+    ----------
+    max_queue_size: :class:`int`
+        The maximum number of commands that can wait for a player's lock at once.
+        Further commands are rejected with :class:`PlayerBusy`.
+    timeout: :class:`float`
+        The number of seconds to wait for the lock before giving up. This should
+        be kept below Discord's three second interaction response deadline.
+    """
+
+    def __init__(self, *, max_queue_size: int = 2, timeout: float = 2.5) -> None:
+        self.max_queue_size = max_queue_size
+        self.timeout = timeout
+
+        self._locks: Dict[int, _PlayerLock] = {}
+
+        # Metrics
+        self.acquired = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.max_queue_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def queue_depth(self) -> int:
+        """Returns the number of commands currently waiting for a lock across all players."""
+        return sum(entry.users - 1 for entry in self._locks.values())
+
+    def locked(self, player_id: int) -> bool:
+        """Indicates whether a command of the given player is currently running."""
+        entry = self._locks.get(player_id)
+        return entry is not None and entry.lock.locked()
+
+    def _discard(self, player_id: int, entry: _PlayerLock) -> None:
+        entry.users -= 1
+        if entry.users == 0:
+            del self._locks[player_id]
+
+    async def acquire(self, player_id: int) -> None:
+        """Acquires the lock for the given player.
+
+        Raises :exc:`PlayerBusy` if too many commands are already queued for the
+        player or if the lock couldn't be acquired within the timeout.
+        """
+        entry = self._locks.get(player_id)
+        if entry is None:
+            entry = self._locks[player_id] = _PlayerLock()
+
+        # One command holds the lock while the rest are waiting for it.
+        if entry.users > self.max_queue_size:
+            self.rejected += 1
+            raise PlayerBusy("You have too many commands in progress. Please wait for them to finish.")
+
+        if entry.users:
+            self.max_queue_depth = max(self.max_queue_depth, entry.users)
+
+        entry.users += 1
+        started_at = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(entry.lock.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self._discard(player_id, entry)
+            raise PlayerBusy("Another command of yours is still in progress. Please finish it first.") from None
+        except BaseException:
+            self._discard(player_id, entry)
+            raise
+
+        _held.set(_held.get() | {player_id})
+
+        waited = time.perf_counter() - started_at
+        self.acquired += 1
+        self.total_wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+
+    def release(self, player_id: int) -> None:
+        """Releases the lock for the given player acquired using :meth:`acquire`."""
+        entry = self._locks[player_id]
+        entry.lock.release()
+        self._discard(player_id, entry)
+        _held.set(_held.get() - {player_id})
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the metrics for the player locks."""
+        return {
+            "active_players": len(self._locks),
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_time": (self.total_wait_time / self.acquired) if self.acquired else 0.0,
+            "max_wait_time": self.max_wait_time,
+        }
+
+
+def holding(player_id: int) -> bool:
+    """Indicates whether the current task holds the lock of the given player (e.g. in a serialized command)."""
+    return player_id in _held.get()
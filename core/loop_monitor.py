@@ -0,0 +1,168 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import Any, Deque, Dict, List, Optional
+from collections import deque
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+__all__ = (
+    'LoopMonitor',
+)
+
+_log = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Monitors the lag of the event loop and detects blocking calls.
+
+    A background task repeatedly sleeps for `interval` seconds and records how
+    late it was woken up. Meanwhile, a watchdog thread checks that the task keeps
+    running; if the loop is blocked for more than `threshold` seconds, the stack
+    of the loop thread (i.e. of whatever is blocking it) is captured and logged.
+
+    Parameters
+    ----------
+    interval: :class:`float`
+        The interval between two lag measurements.
+    threshold: :class:`float`
+        The number of seconds after which the loop is considered blocked. This is
+        also set as the loop's ``slow_callback_duration`` used in debug mode.
+    history: :class:`int`
+        The number of recent measurements used for calculating percentiles.
+    """
+
+    def __init__(self, *, interval: float = 0.5, threshold: float = 0.5, history: int = 1200) -> None:
+        self.interval = interval
+        self.threshold = threshold
+
+        self.lags: Deque[float] = deque(maxlen=history)
+        self.max_lag = 0.0
+        self.blocked = 0
+        self.last_blocking_stack: Optional[str] = None
+
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, *, debug: bool = False) -> None:
+        """Starts monitoring the running event loop.
+
+        If `debug` is True, the loop's debug mode is enabled as well which makes
+        asyncio log every callback taking longer than the threshold.
+        """
+        if self.running:
+            return
+
+        loop = asyncio.get_running_loop()
+        loop.slow_callback_duration = self.threshold
+        if debug:
+            loop.set_debug(True)
+
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop_event.clear()
+        self._task = loop.create_task(self._measure(), name="cobble-loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="cobble-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        if self._watchdog is not None:
+            self._stop_event.set()
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _measure(self) -> None:
+        while True:
+            started_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+
+            lag = max(now - started_at - self.interval, 0.0)
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            self._heartbeat = now
+
+    def _watch(self) -> None:
+        reported = False
+        check_interval = min(self.threshold, self.interval) / 2
+
+        while not self._stop_event.wait(check_interval):
+            blocked_for = time.monotonic() - self._heartbeat - self.interval
+            if blocked_for < self.threshold:
+                reported = False
+                continue
+            if reported:
+                # Only report once per blocking call.
+                continue
+
+            reported = True
+            self.blocked += 1
+
+            assert self._loop_thread_id is not None
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+
+            self.last_blocking_stack = "".join(traceback.format_stack(frame))
+            _log.warning(
+                "Event loop blocked for more than %.3f seconds. Current stack of the loop thread:\n%s",
+                blocked_for,
+                self.last_blocking_stack,
+            )
+
+    def percentiles(self, *percentiles: float) -> List[float]:
+        """Returns the given percentiles (between 0 and 100) of the recent lag measurements."""
+        if not self.lags:
+            return [0.0 for _ in percentiles]
+
+        ordered = sorted(self.lags)
+        last = len(ordered) - 1
+        return [ordered[min(round(p / 100 * last), last)] for p in percentiles]
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the metrics for the event loop lag."""
+        p50, p95, p99 = self.percentiles(50, 95, 99)
+        return {
+            "lag_p50": p50,
+            "lag_p95": p95,
+            "lag_p99": p99,
+            "lag_max": self.max_lag,
+            "blocked": self.blocked,
+        }
@@ -0,0 +1,294 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from contextvars import ContextVar
+
+import aiohttp
+import bisect
+import contextlib
+import logging
+import time
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+__all__ = (
+    'Histogram',
+    'Invocation',
+    'CommandStats',
+    'Metrics',
+    'current_invocation',
+    'record_query',
+    'record_http',
+)
+
+_log = logging.getLogger(__name__)
+_invocation: ContextVar[Optional[Invocation]] = ContextVar("cobble_invocation", default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """A cumulative histogram similar to the Prometheus histogram type."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Returns the (upper bound, cumulative count) pairs including the +Inf bucket."""
+        result: List[Tuple[str, int]] = []
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Estimates the given quantile as the upper bound of the bucket it falls in."""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        total = 0
+        for idx, count in enumerate(self.counts):
+            total += count
+            if total >= rank:
+                return self.buckets[idx] if idx < len(self.buckets) else float("inf")
+
+        return float("inf")
+
+    @property
+    def mean(self) -> float:
+        return (self.sum / self.count) if self.count else 0.0
+
+
+class Invocation:
+    """Time and query accounting of a single command invocation."""
+
+    __slots__ = ('db_time', 'db_queries', 'http_time', 'http_requests')
+
+    def __init__(self) -> None:
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.http_time = 0.0
+        self.http_requests = 0
+
+
+class CommandStats:
+    """The metrics collected for a single command."""
+
+    __slots__ = ('total', 'db', 'http', 'compute', 'queries', 'errors', 'cooldowns', 'auto_defers')
+
+    def __init__(self) -> None:
+        self.total = Histogram(LATENCY_BUCKETS)
+        self.db = Histogram(LATENCY_BUCKETS)
+        self.http = Histogram(LATENCY_BUCKETS)
+        self.compute = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.errors = 0
+        self.cooldowns = 0
+        self.auto_defers = 0
+
+    @property
+    def invocations(self) -> int:
+        return self.total.count
+
+
+def current_invocation() -> Optional[Invocation]:
+    """Returns the invocation being tracked in the current context, if any."""
+    return _invocation.get()
+
+
+def record_query(duration: float) -> None:
+    """Records a database query for the invocation being tracked, if any."""
+    invocation = _invocation.get()
+    if invocation is not None:
+        invocation.db_time += duration
+        invocation.db_queries += 1
+
+
+def record_http(duration: float) -> None:
+    """Records an HTTP request for the invocation being tracked, if any."""
+    invocation = _invocation.get()
+    if invocation is not None:
+        invocation.http_time += duration
+        invocation.http_requests += 1
+
+
+class Metrics:
+    """Collects the per-command metrics of the bot.
+
+    The time taken by each command invocation is split into time spent waiting
+    on database, time spent waiting on Discord HTTP requests and the remaining
+    local compute time.
+    """
+
+    def __init__(self) -> None:
+        self.commands: Dict[str, CommandStats] = {}
+        self._gauges: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    def get(self, command: str) -> CommandStats:
+        try:
+            return self.commands[command]
+        except KeyError:
+            stats = self.commands[command] = CommandStats()
+            return stats
+
+    def register_gauges(self, name: str, func: Callable[[], Dict[str, Any]]) -> None:
+        """Registers a function returning gauge values to export with the metrics.
+
+        The function should return a mapping of gauge names to numbers. Non
+        numeric values are ignored.
+        """
+        self._gauges[name] = func
+
+    def gauges(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the current values of registered gauges."""
+        return {name: func() for name, func in self._gauges.items()}
+
+    @contextlib.contextmanager
+    def track(self, command: str) -> Iterator[Invocation]:
+        """Tracks an invocation of the given command in the current context."""
+        invocation = Invocation()
+        token = _invocation.set(invocation)
+        started_at = time.perf_counter()
+
+        try:
+            yield invocation
+        finally:
+            elapsed = time.perf_counter() - started_at
+            _invocation.reset(token)
+
+            stats = self.get(command)
+            stats.total.observe(elapsed)
+            stats.db.observe(invocation.db_time)
+            stats.http.observe(invocation.http_time)
+            stats.compute.observe(max(elapsed - invocation.db_time - invocation.http_time, 0.0))
+            stats.queries.observe(invocation.db_queries)
+
+    def record_error(self, command: str) -> None:
+        self.get(command).errors += 1
+
+    def record_cooldown(self, command: str) -> None:
+        self.get(command).cooldowns += 1
+
+    def record_auto_defer(self, command: str) -> None:
+        self.get(command).auto_defers += 1
+
+    def http_trace_config(self) -> aiohttp.TraceConfig:
+        """Returns the aiohttp trace configuration measuring the HTTP time of invocations."""
+        async def on_request_start(session: Any, ctx: Any, params: Any) -> None:
+            ctx.started_at = time.perf_counter()
+
+        async def on_request_end(session: Any, ctx: Any, params: Any) -> None:
+            record_http(time.perf_counter() - ctx.started_at)
+
+        config = aiohttp.TraceConfig()
+        config.on_request_start.append(on_request_start)
+        config.on_request_end.append(on_request_end)
+        config.on_request_exception.append(on_request_end)
+        return config
+
+    def render_prometheus(self) -> str:
+        """Renders the metrics in Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def histogram(name: str, help: str, values: Dict[Tuple[Tuple[str, str], ...], Histogram]) -> None:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in values.items():
+                base = ",".join(f'{k}="{v}"' for k, v in labels)
+                for bound, count in hist.cumulative():
+                    lines.append(f'{name}_bucket{{{base},le="{bound}"}} {count}')
+                lines.append(f"{name}_sum{{{base}}} {hist.sum}")
+                lines.append(f"{name}_count{{{base}}} {hist.count}")
+
+        def counter(name: str, help: str, values: Dict[str, int]) -> None:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} counter")
+            for command, value in values.items():
+                lines.append(f'{name}{{command="{command}"}} {value}')
+
+        durations: Dict[Tuple[Tuple[str, str], ...], Histogram] = {}
+        for command, stats in self.commands.items():
+            for phase in ("total", "db", "http", "compute"):
+                durations[(("command", command), ("phase", phase))] = getattr(stats, phase)
+
+        histogram("cobble_command_duration_seconds", "Time taken by command invocations.", durations)
+        histogram(
+            "cobble_command_db_queries",
+            "Database queries made per command invocation.",
+            {(("command", command),): stats.queries for command, stats in self.commands.items()},
+        )
+        counter("cobble_command_errors_total", "Failed command invocations.", {c: s.errors for c, s in self.commands.items()})
+        counter("cobble_command_cooldowns_total", "Command invocations rejected by cooldowns.", {c: s.cooldowns for c, s in self.commands.items()})
+        counter(
+            "cobble_command_auto_defers_total",
+            "Command invocations deferred automatically for not responding in time.",
+            {c: s.auto_defers for c, s in self.commands.items()},
+        )
+
+        for group, values in self.gauges().items():
+            for key, value in values.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"cobble_{group}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {float(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    async def start_server(self, host: str, port: int) -> None:
+        """Starts the HTTP server exposing the metrics on ``/metrics``."""
+        # aiohttp.web is only needed when the endpoint is enabled.
+        from aiohttp import web
+
+        async def handler(request: web.Request) -> web.Response:
+            return web.Response(text=self.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handler)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        _log.info("Serving metrics on http://%s:%d/metrics", host, port)
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -25,6 +25,9 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Optional, Union, List
 from tortoise.models import Model
 from tortoise import fields
+from core import inventory_cache, unit_of_work
+
+import copy
 
 if TYPE_CHECKING:
     from core.models.player import Player
@@ -50,6 +53,39 @@ class InventoryItem(Model):
     durability = fields.IntField(null=True)
     """The durability of item."""
 
+    @classmethod
+    async def fetch(cls, player: Player, item_id: str) -> Optional[InventoryItem]:
+        """Returns the player's stack (or first durable unit) of the given item.
+
+        The player's cached inventory is used if the inventory cache is installed.
+        Callers that don't hold the player's lock get a copy of the cached item.
+        """
+        cache = inventory_cache.current()
+        if cache is None:
+            return await cls.filter(player=player, item_id=item_id).first()
+
+        inventory = await cache.get(player.pk)
+        item = inventory.first(item_id)
+        if item is None:
+            return None
+        return _for_caller(player, [item])[0]
+
+    @classmethod
+    async def fetch_all(cls, player: Player, *item_ids: str) -> List[InventoryItem]:
+        """Returns the player's items with the given IDs or all items if no IDs are given.
+
+        The player's cached inventory is used if the inventory cache is installed.
+        Callers that don't hold the player's lock get copies of the cached items.
+        """
+        cache = inventory_cache.current()
+        if cache is None:
+            if item_ids:
+                return await cls.filter(player=player, item_id__in=item_ids)
+            return await cls.filter(player=player)
+
+        inventory = await cache.get(player.pk)
+        return _for_caller(player, inventory.all(*item_ids))
+
     async def edit_durability(self, durability: int) -> bool:
         """Edits the durability. The passed durability must be a signed integer.
 
@@ -57,11 +93,11 @@ class InventoryItem(Model):
         True is returned otherwise False.
         """
         if (self.durability + durability) <= 0:
-            await self.delete()
+            await self._delete()
             return True
         else:
             self.durability += durability
-            await self.save()
+            await self._save()
 
         return False
 
@@ -72,14 +108,36 @@ class InventoryItem(Model):
         (i.e no more left), True is returned otherwise False.
         """
         if (self.quantity - quantity) <= 0:
-            await self.delete()
+            await self._delete()
             return True
 
         self.quantity -= quantity
-        await self.save()
+        await self._save()
 
         return False
 
+    async def _save(self) -> None:
+        cache = inventory_cache.current()
+        if cache is not None:
+            inventory = cache.peek(self.player_id)  # type: ignore
+            if inventory is not None and not inventory.track(self):
+                # Some other copy of this item is cached.
+                cache.invalidate(self.player_id)  # type: ignore
+            cache.mutated(self.player_id)  # type: ignore
+
+        await unit_of_work.save(self)
+
+    async def _delete(self) -> None:
+        cache = inventory_cache.current()
+        if cache is not None:
+            inventory = cache.peek(self.player_id)  # type: ignore
+            if inventory is not None and not inventory.forget(self):
+                # Some other copy of this item is cached.
+                cache.invalidate(self.player_id)  # type: ignore
+            cache.mutated(self.player_id)  # type: ignore
+
+        await unit_of_work.delete(self)
+
     @classmethod
     async def add(
         cls,
@@ -92,18 +150,42 @@ class InventoryItem(Model):
             items: List[InventoryItem] = []
             # Anything with durability cannot be stacked
             for _ in range(quantity):
-                item = await InventoryItem.create(
+                item = InventoryItem(
                     player=player,
                     item_id=item_id,
                     quantity=1,
                     durability=durability,
                 )
+                await item._save()
                 items.append(item)
             return items
         else:
-            item = await InventoryItem.filter(player=player, item_id=item_id).first()
+            item = None
+            uow = unit_of_work.current()
+            if uow is not None:
+                # The stack may have been removed earlier in this unit of work,
+                # it is revived instead of loading the row that is about to be
+                # deleted again.
+                item = uow.find(InventoryItem, deleted=True, player_id=player.pk, item_id=item_id, durability=None)
+                if item is not None:
+                    item.quantity = quantity
+                    await item._save()
+                    return item
+
+            if inventory_cache.current() is not None:
+                # The cached inventory includes the items added earlier in this
+                # unit of work that aren't written to database yet.
+                item = await InventoryItem.fetch(player, item_id)
+            else:
+                if uow is not None:
+                    # The item may have been added earlier in this unit of work
+                    # and not written to database yet.
+                    item = uow.find(InventoryItem, player_id=player.pk, item_id=item_id, durability=None)
+                if item is None:
+                    item = await InventoryItem.filter(player=player, item_id=item_id).first()
+
             if item is None:
-                return await InventoryItem.create(
+                item = InventoryItem(
                     player=player,
                     item_id=item_id,
                     quantity=quantity,
@@ -111,6 +193,20 @@ class InventoryItem(Model):
                 )
             else:
                 item.quantity += quantity
-                await item.save()
-            
+
+            await item._save()
             return item
+
+
+def _for_caller(player: Player, items: List[InventoryItem]) -> List[InventoryItem]:
+    # Serialized commands (holding the player lock) change the cached items in
+    # place. Other callers (e.g. /inventory view) run concurrently with them so
+    # they get copies, which keeps them from changing the cached items behind
+    # the back of the lock holder. The copies are not isolated: one taken while
+    # a command is running includes its changes that aren't written yet (and
+    # may be rolled back). Saving a copy evicts the cached inventory.
+    from core import locks  # Circular import
+
+    if locks.holding(player.pk):
+        return items
+    return [copy.copy(item) for item in items]
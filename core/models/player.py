@@ -27,7 +27,7 @@ from core.datamodels import Achievements, PlayerFlags
 from tortoise.models import Model
 from tortoise import fields
 from discord import Embed, Color
-from core import cosmetics, utils, constants
+from core import cosmetics, constants, rendering, responses, unit_of_work
 
 if TYPE_CHECKING:
     from discord import Interaction
@@ -96,7 +96,7 @@ class Player(Model):
         old_level = self.level
 
         self.xp += xp
-        await self.save()
+        await unit_of_work.save(self)
 
         if old_level < self.level:
             level_up = True
@@ -107,7 +107,7 @@ class Player(Model):
                 description=f"You have advanced to level {self.level}!",
                 color=Color.dark_embed(),
             )
-            await interaction.followup.send(embed=embed, content=f"{interaction.user.mention}")
+            await responses.notify(interaction, embed, mention=True)
 
         return level_up
 
@@ -119,7 +119,7 @@ class Player(Model):
         if self.health > constants.MAX_HEALTH:
             self.health = constants.MAX_HEALTH
 
-        await self.save()
+        await unit_of_work.save(self)
 
 
     async def remove_hp(
@@ -161,18 +161,18 @@ class Player(Model):
 
             embed.add_field(
                 name="Statistics",
-                value=f"**Level {self.level} ({self.xp} points)**\n{utils.progress_bar(self.level_xp, self.get_required_xp())} " \
+                value=f"**Level {self.level} ({self.xp} points)**\n{rendering.progress_bar(self.level_xp, self.get_required_xp())} " \
                       f"({self.level_xp}/{self.get_required_xp()})"
             )
 
             embed.set_footer(text="The level and XP statistics reset upon dying.")
-            await interaction.followup.send(embed=embed, content=interaction.user.mention)
+            await responses.notify(interaction, embed, mention=True)
 
         if died:
             self.xp = 0
 
 
-        await self.save()
+        await unit_of_work.save(self)
         return died
 
 
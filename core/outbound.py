@@ -0,0 +1,360 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Coroutine, Dict, List, Optional, Set, Tuple
+from discord.webhook.async_ import AsyncWebhookAdapter
+from core.metrics import record_http
+
+import asyncio
+import contextvars
+import discord
+import itertools
+import logging
+import time
+
+if TYPE_CHECKING:
+    from discord.http import Route
+
+    import aiohttp
+
+__all__ = (
+    'TokenBucket',
+    'OutboundScheduler',
+)
+
+_log = logging.getLogger(__name__)
+
+# Request priorities (lower is more urgent)
+PRIORITY_INITIAL = 0
+"""Initial interaction responses, these must be sent within 3 seconds."""
+
+PRIORITY_FOLLOWUP = 1
+"""Followup messages and deletions."""
+
+PRIORITY_EDIT = 2
+"""Edits of messages, mostly cosmetic (e.g. loading messages being replaced)."""
+
+PRIORITY_NAMES = {
+    PRIORITY_INITIAL: "initial",
+    PRIORITY_FOLLOWUP: "followup",
+    PRIORITY_EDIT: "edit",
+}
+
+SUPPORTED_VERSIONS = ((2, 0), (3, 0))
+"""The range of discord.py versions (inclusive, exclusive) that :meth:`OutboundScheduler.install` supports."""
+
+
+def _create_task(coro: Coroutine[Any, Any, Any]) -> asyncio.Task[Any]:
+    # The scheduler's tasks are shared by every command so they run in an empty
+    # context rather than the one of the command that happened to start them.
+    # Otherwise context variables (e.g. the invocation tracked by the metrics)
+    # would leak into requests made for other commands.
+    return contextvars.Context().run(asyncio.create_task, coro)
+
+
+class TokenBucket:
+    """A token bucket allowing `rate` requests per second with bursts up to `capacity`."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def consume(self) -> bool:
+        """Takes a token if one is available. Returns whether a token was taken."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def delay(self) -> float:
+        """Returns the number of seconds until a token is available."""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class _Request:
+    __slots__ = ('priority', 'seq', 'route', 'session', 'kwargs', 'bucket_key', 'edit_key', 'future', 'superseded', 'enqueued_at')
+
+    def __init__(self, priority: int, seq: int, route: Route, session: aiohttp.ClientSession, kwargs: Dict[str, Any]) -> None:
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.session = session
+        self.kwargs = kwargs
+        self.bucket_key = f"{route.key}:{route.major_parameters}"
+        self.edit_key: Optional[Tuple[Any, ...]] = None
+        self.future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self.superseded: List[_Request] = []
+        self.enqueued_at = time.monotonic()
+
+
+class OutboundScheduler(AsyncWebhookAdapter):
+    """Schedules the interaction responses (and other webhook requests) sent by the bot.
+
+    discord.py sends interaction responses through the webhook adapter so this
+    replaces the default adapter (see :meth:`install`). Requests are queued and
+    sent in the order of priority:
+
+    - Initial responses are always sent first and aren't rate limited by the
+      scheduler since Discord requires them within 3 seconds.
+    - Followups are sent next.
+    - Message edits are sent last. An edit of a message that is still queued
+      when another edit of the same message is requested is merged into the
+      later one so only one request is sent.
+
+    Other requests are limited by a token bucket per route (and its major
+    parameters i.e. the interaction's webhook) and optionally a global token
+    bucket. Discord does not apply its global rate limit to interaction
+    webhooks so the global bucket is disabled by default and is only a
+    self-imposed cap.
+
+    The time a command spends waiting for its requests (queueing included) is
+    recorded for the command's invocation in the metrics.
+
+    Parameters
+    ----------
+    route_rate: :class:`float`
+        The number of requests per second allowed for each route.
+    route_burst: :class:`int`
+        The number of requests that can be sent at once for each route.
+    global_rate: :class:`float`
+        The number of requests per second allowed across all routes. Zero (the
+        default) disables the global limit.
+    """
+
+    def __init__(self, *, route_rate: float = 2.5, route_burst: int = 5, global_rate: float = 0.0) -> None:
+        super().__init__()
+
+        self.route_rate = route_rate
+        self.route_burst = route_burst
+        self.global_bucket: Optional[TokenBucket] = TokenBucket(global_rate, global_rate) if global_rate > 0 else None
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._queue: List[_Request] = []
+        self._edits: Dict[Tuple[Any, ...], _Request] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._sending: Set[asyncio.Task[None]] = set()
+        self._in_flight = 0
+
+        self.dispatched = 0
+        self.coalesced = 0
+        self.delayed = 0
+
+    def install(self) -> bool:
+        """Makes the scheduler the webhook adapter of the current context.
+
+        This must be called before the gateway connection is started so that
+        the tasks handling interactions inherit the context.
+
+        discord.py has no public API for replacing the adapter so this sets its
+        private ``discord.webhook.async_.async_context`` variable. The scheduler
+        is only installed on the versions in :data:`SUPPORTED_VERSIONS` that
+        still have it, otherwise a warning is logged and the default adapter
+        is kept.
+
+        Returns
+        -------
+        :class:`bool`
+            Whether the scheduler was installed.
+        """
+        from discord.webhook import async_
+
+        version = (discord.version_info.major, discord.version_info.minor)
+        minimum, maximum = SUPPORTED_VERSIONS
+        async_context = getattr(async_, "async_context", None)
+        if not minimum <= version < maximum or not isinstance(async_context, contextvars.ContextVar):
+            _log.warning("The outbound scheduler does not support discord.py %s, using the default webhook adapter", discord.__version__)
+            return False
+
+        async_context.set(self)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the queue depths and counters of the scheduler."""
+        depths = {f"queued_{name}": 0 for name in PRIORITY_NAMES.values()}
+        for request in self._queue:
+            depths[f"queued_{PRIORITY_NAMES[request.priority]}"] += 1
+
+        return {
+            **depths,
+            "in_flight": self._in_flight,
+            "buckets": len(self._buckets),
+            "dispatched": self.dispatched,
+            "coalesced": self.coalesced,
+            "delayed": self.delayed,
+        }
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _classify(self, route: Route) -> int:
+        if route.method == "POST" and route.path.startswith("/interactions/"):
+            return PRIORITY_INITIAL
+        if route.method == "PATCH" and "/messages/" in route.path:
+            return PRIORITY_EDIT
+        return PRIORITY_FOLLOWUP
+
+    async def request(self, route: Route, session: aiohttp.ClientSession, **kwargs: Any) -> Any:  # type: ignore
+        priority = self._classify(route)
+        request = _Request(priority, next(self._counter), route, session, kwargs)
+
+        if priority == PRIORITY_EDIT and not kwargs.get("multipart") and not kwargs.get("files"):
+            request.edit_key = (route.url, tuple(sorted((kwargs.get("params") or {}).items())))
+            previous = self._edits.get(request.edit_key)
+            if previous is not None:
+                # The queued edit is superseded, its fields are merged into
+                # this one (later fields take precedence) and it completes
+                # along with this edit.
+                self._queue.remove(previous)
+                request.kwargs["payload"] = {**(previous.kwargs.get("payload") or {}), **(kwargs.get("payload") or {})}
+                request.superseded.extend((previous, *previous.superseded))
+                request.seq = previous.seq
+                self.coalesced += 1
+
+            self._edits[request.edit_key] = request
+
+        self._queue.append(request)
+        self._wakeup.set()
+
+        if self._task is None or self._task.done():
+            self._task = _create_task(self._run())
+
+        started_at = time.perf_counter()
+        try:
+            return await request.future
+        finally:
+            record_http(time.perf_counter() - started_at)
+
+    def _bucket(self, key: str) -> TokenBucket:
+        try:
+            return self._buckets[key]
+        except KeyError:
+            bucket = self._buckets[key] = TokenBucket(self.route_rate, self.route_burst)
+            return bucket
+
+    def _dispatch_ready(self) -> Optional[float]:
+        """Dispatches the requests that can be sent now.
+
+        Returns the number of seconds until the next request can be sent or
+        None if the queue is empty.
+        """
+        self._queue.sort(key=lambda request: (request.priority, request.seq))
+        remaining: List[_Request] = []
+        delay: Optional[float] = None
+
+        for request in self._queue:
+            if request.future.cancelled() and not request.superseded:
+                # The caller is no longer waiting for it.
+                if request.edit_key is not None and self._edits.get(request.edit_key) is request:
+                    del self._edits[request.edit_key]
+                continue
+
+            if request.priority != PRIORITY_INITIAL:
+                bucket = self._bucket(request.bucket_key)
+                wait = bucket.delay()
+                if self.global_bucket is not None:
+                    wait = max(wait, self.global_bucket.delay())
+                if wait > 0:
+                    remaining.append(request)
+                    delay = wait if delay is None else min(delay, wait)
+                    continue
+
+                bucket.consume()
+                if self.global_bucket is not None:
+                    self.global_bucket.consume()
+
+            if request.edit_key is not None and self._edits.get(request.edit_key) is request:
+                del self._edits[request.edit_key]
+
+            task = _create_task(self._send(request))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+        self._queue = remaining
+        return delay
+
+    async def _send(self, request: _Request) -> None:
+        self._in_flight += 1
+        self.dispatched += 1
+        waited = time.monotonic() - request.enqueued_at
+        if waited > 1.0:
+            self.delayed += 1
+            _log.debug("%s %s was queued for %.2f seconds", request.route.method, request.route.path, waited)
+
+        futures = [request.future, *(superseded.future for superseded in request.superseded)]
+        try:
+            result = await self._perform(request)
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight -= 1
+
+    async def _perform(self, request: _Request) -> Any:
+        return await super().request(request.route, request.session, **request.kwargs)
+
+    def _prune_buckets(self) -> None:
+        # A full bucket is no different from a new one.
+        for key in [key for key, bucket in self._buckets.items() if bucket.full]:
+            del self._buckets[key]
+
+    async def _run(self) -> None:
+        last_pruned = time.monotonic()
+        while True:
+            self._wakeup.clear()
+            delay = self._dispatch_ready()
+
+            now = time.monotonic()
+            if now - last_pruned > 60.0:
+                self._prune_buckets()
+                last_pruned = now
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,210 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Counter as CounterT, Dict, List, Optional, Tuple
+from collections import Counter
+
+import os
+import sys
+import time
+import threading
+import tracemalloc
+
+if TYPE_CHECKING:
+    from types import FrameType
+
+__all__ = (
+    'SamplingProfiler',
+    'MemoryTracker',
+    'PROFILES_DIRECTORY',
+)
+
+PROFILES_DIRECTORY = "profiles"
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _output_path(prefix: str, extension: str) -> str:
+    os.makedirs(PROFILES_DIRECTORY, exist_ok=True)
+    return os.path.join(PROFILES_DIRECTORY, f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.{extension}")
+
+
+class SamplingProfiler:
+    """A low overhead sampling profiler for the thread running the event loop.
+
+    A background thread periodically takes the stack of the profiled thread
+    and counts identical stacks. Since the profiled thread is never interrupted
+    or traced, the overhead is limited to the sampling thread itself.
+
+    Parameters
+    ----------
+    interval: :class:`float`
+        The number of seconds between two samples.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.samples: CounterT[Tuple[str, ...]] = Counter()
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, thread_id: Optional[int] = None) -> None:
+        """Starts sampling the thread with given ID (the calling thread by default)."""
+        if self.running:
+            raise RuntimeError("profiler is already running")
+
+        target = thread_id or threading.get_ident()
+        self.samples.clear()
+        self.started_at = time.perf_counter()
+        self.stopped_at = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(target,), name="cobble-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops the profiler. The collected samples are kept until next start."""
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.stopped_at = time.perf_counter()
+
+    def _run(self, thread_id: int) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                break
+
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+
+            stack.reverse()
+            self.samples[tuple(stack)] += 1
+
+    @property
+    def total_samples(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        """Returns the samples in collapsed stack format (as used by flamegraph tools)."""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common())
+
+    def dump(self) -> str:
+        """Writes the collapsed stacks to the profiles directory and returns the file path."""
+        path = _output_path("cpu", "collapsed")
+        with open(path, "w") as f:
+            f.write(self.collapsed())
+        return path
+
+    def top(self, limit: int = 10) -> List[Tuple[str, int, int]]:
+        """Returns the top functions as (name, self samples, total samples) tuples.
+
+        The functions are sorted by the number of samples in which they were at the
+        top of the stack (self samples).
+        """
+        own: CounterT[str] = Counter()
+        total: CounterT[str] = Counter()
+
+        for stack, count in self.samples.items():
+            own[stack[-1]] += count
+            for name in set(stack):
+                total[name] += count
+
+        return [(name, count, total[name]) for name, count in own.most_common(limit)]
+
+
+class MemoryTracker:
+    """Captures :mod:`tracemalloc` snapshots and compares them.
+
+    Each snapshot is compared with the one taken before it so that growing
+    allocation sites (potential leaks) show up in the difference.
+    """
+
+    def __init__(self) -> None:
+        self.last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        tracemalloc.start(frames)
+        self.last_snapshot = None
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self.last_snapshot = None
+
+    def snapshot(self) -> Tuple[tracemalloc.Snapshot, Optional[tracemalloc.Snapshot]]:
+        """Takes a snapshot. Returns the new snapshot and the previous one (if any)."""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        previous, self.last_snapshot = self.last_snapshot, snapshot
+        return snapshot, previous
+
+    def dump(self, snapshot: tracemalloc.Snapshot) -> str:
+        """Writes the snapshot to the profiles directory and returns the file path.
+
+        The dumped file can be loaded again using :meth:`tracemalloc.Snapshot.load`.
+        """
+        path = _output_path("memory", "snapshot")
+        snapshot.dump(path)
+        return path
+
+    @staticmethod
+    def top(snapshot: tracemalloc.Snapshot, limit: int = 10) -> List[Tuple[str, int, int]]:
+        """Returns the top allocation sites as (location, size, count) tuples."""
+        return [
+            (str(stat.traceback), stat.size, stat.count)
+            for stat in snapshot.statistics("lineno")[:limit]
+        ]
+
+    @staticmethod
+    def diff(snapshot: tracemalloc.Snapshot, previous: tracemalloc.Snapshot, limit: int = 10) -> List[Tuple[str, int, int]]:
+        """Returns the top changed allocation sites as (location, size diff, count diff) tuples."""
+        return [
+            (str(stat.traceback), stat.size_diff, stat.count_diff)
+            for stat in snapshot.compare_to(previous, "lineno")[:limit]
+        ]
+
+    @staticmethod
+    def traced_memory() -> Dict[str, int]:
+        current, peak = tracemalloc.get_traced_memory()
+        return {"current": current, "peak": peak}
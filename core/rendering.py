@@ -0,0 +1,98 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import Dict, Tuple
+from core import cosmetics, constants
+
+import math
+
+__all__ = (
+    'progress_bar',
+    'health_bar',
+)
+
+# The lengths of progress bars that are rendered ahead of time. Bars of other
+# lengths are rendered once upon first use.
+PROGRESS_BAR_LENGTHS = (10,)
+
+
+def _render_progress_bar(filled: int, length: int) -> str:
+    if filled == 0:
+        return (
+            cosmetics.EMOJI_PROGRESS_BAR_START_UNFILLED
+            + cosmetics.EMOJI_PROGRESS_BAR_MID_UNFILLED * (length - 2)
+            + cosmetics.EMOJI_PROGRESS_BAR_END_UNFILLED
+        )
+    if filled == length:
+        return (
+            cosmetics.EMOJI_PROGRESS_BAR_START_FILLED
+            + cosmetics.EMOJI_PROGRESS_BAR_MID_FILLED * (length - 2)
+            + cosmetics.EMOJI_PROGRESS_BAR_END_FILLED
+        )
+
+    return (
+        cosmetics.EMOJI_PROGRESS_BAR_START_FILLED
+        + cosmetics.EMOJI_PROGRESS_BAR_MID_FILLED * (filled - 1)
+        + cosmetics.EMOJI_PROGRESS_BAR_MID_UNFILLED * (length - filled - 1)
+        + cosmetics.EMOJI_PROGRESS_BAR_END_UNFILLED
+    )
+
+
+def _render_progress_bars(length: int) -> Tuple[str, ...]:
+    return tuple(_render_progress_bar(filled, length) for filled in range(length + 1))
+
+
+def _render_health_bar(half_hearts: int) -> str:
+    full, half = divmod(half_hearts, 2)
+    empty = constants.MAX_HEALTH - full - half
+    return cosmetics.EMOJI_HEALTH * full + cosmetics.EMOJI_HEALTH_HALF * half + cosmetics.EMOJI_HEALTH_EMPTY * empty
+
+
+# length -> bars indexed by the number of filled emojis
+_PROGRESS_BARS: Dict[int, Tuple[str, ...]] = {length: _render_progress_bars(length) for length in PROGRESS_BAR_LENGTHS}
+
+# Indexed by the number of half hearts.
+_HEALTH_BARS: Tuple[str, ...] = tuple(_render_health_bar(half_hearts) for half_hearts in range(constants.MAX_HEALTH * 2 + 1))
+
+
+def progress_bar(progress: float, total: float, *, length: int = 10) -> str:
+    """Returns a progress bar made of emojis for the given progress and total values.
+
+    The length parameter determines the total length of the progress bar (inclusive
+    of the two terminals). The progress is clamped between zero and total.
+    """
+    bars = _PROGRESS_BARS.get(length)
+    if bars is None:
+        bars = _PROGRESS_BARS[length] = _render_progress_bars(length)
+
+    filled = math.floor((progress / total) * length) if total != 0 else 0
+    return bars[min(max(filled, 0), length)]
+
+
+def health_bar(health: float) -> str:
+    """Returns the hearts representing the given health.
+
+    The health is rounded down to the nearest half heart.
+    """
+    return _HEALTH_BARS[min(max(int(health * 2), 0), len(_HEALTH_BARS) - 1)]
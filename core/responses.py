@@ -0,0 +1,192 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, List
+
+import logging
+
+if TYPE_CHECKING:
+    from discord import Embed, Interaction
+
+__all__ = (
+    'ResponseComposer',
+    'ComposedResponse',
+    'begin',
+    'notify',
+)
+
+_log = logging.getLogger(__name__)
+
+# The maximum number of embeds that a single message can have.
+MAX_EMBEDS = 10
+
+
+class ResponseComposer:
+    """Collects the notices (level ups, deaths, discoveries etc.) sent during a command.
+
+    Instead of sending a followup for each notice, the notices are sent together
+    with :meth:`flush` once the command completes, using as few messages as
+    possible (multiple embeds per message). Notices added before the command
+    sends its initial response are folded into that response instead (so they
+    are shown even if the command fails afterwards).
+
+    Parameters
+    ----------
+    interaction: :class:`discord.Interaction`
+        The interaction the notices are sent for.
+    """
+
+    def __init__(self, interaction: Interaction) -> None:
+        self.interaction = interaction
+        self.mention = False
+        self._embeds: List[Embed] = []
+
+    @property
+    def pending(self) -> int:
+        """The number of notices waiting to be sent."""
+        return len(self._embeds)
+
+    def add(self, embed: Embed, *, mention: bool = False) -> None:
+        """Adds a notice.
+
+        If `mention` is True, the user is mentioned in the message containing
+        the notices.
+        """
+        self._embeds.append(embed)
+        self.mention = self.mention or mention
+
+    def fold(self, kwargs: Any) -> None:
+        """Adds the pending notices to the keyword arguments of an outgoing message.
+
+        As many notices as the message has room for are moved to its embeds,
+        the rest are left for :meth:`flush`.
+        """
+        if not self._embeds:
+            return
+
+        embeds = list(kwargs.pop("embeds", None) or ())
+        embed = kwargs.pop("embed", None)
+        if embed is not None:
+            embeds.append(embed)
+
+        room = max(MAX_EMBEDS - len(embeds), 0)
+        folded, self._embeds = self._embeds[:room], self._embeds[room:]
+        if embeds or folded:
+            kwargs["embeds"] = embeds + folded
+        if not folded:
+            return
+
+        if self.mention:
+            content = kwargs.get("content")
+            mention = self.interaction.user.mention
+            kwargs["content"] = f"{mention} {content}" if content else mention
+            self.mention = False
+
+        _log.debug("Folded %d notices into the initial response", len(folded))
+
+    def discard(self) -> None:
+        """Discards the pending notices (e.g. when the command fails)."""
+        self._embeds.clear()
+        self.mention = False
+
+    async def flush(self) -> None:
+        """Sends the pending notices."""
+        if not self._embeds:
+            return
+
+        interaction = self.interaction
+        embeds, self._embeds = self._embeds, []
+        content = interaction.user.mention if self.mention else None
+        self.mention = False
+
+        for idx in range(0, len(embeds), MAX_EMBEDS):
+            chunk = embeds[idx:idx + MAX_EMBEDS]
+            if interaction.response.is_done():
+                await interaction.followup.send(content=content, embeds=chunk)
+            else:
+                await interaction.response.send_message(content=content, embeds=chunk)
+
+            # Only the first message mentions the user.
+            content = None
+
+        _log.debug("Sent %d notices in %d message(s)", len(embeds), -(-len(embeds) // MAX_EMBEDS))
+
+
+class ComposedResponse:
+    """Wraps the response of an interaction with a :class:`ResponseComposer`.
+
+    The pending notices are folded into the message sent through
+    :meth:`send_message`. Other attributes are looked up on the wrapped
+    response.
+    """
+
+    __slots__ = ('_response', '_composer')
+
+    def __init__(self, composer: ResponseComposer, response: Any) -> None:
+        self._composer = composer
+        self._response = response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+    def is_done(self) -> bool:
+        return self._response.is_done()
+
+    async def send_message(self, content: Any = None, **kwargs: Any) -> Any:
+        # Ephemeral messages can't carry the notices since they are meant to be
+        # seen in the channel.
+        if not kwargs.get("ephemeral", False):
+            kwargs["content"] = content
+            self._composer.fold(kwargs)
+            content = kwargs.pop("content")
+        return await self._response.send_message(content, **kwargs)
+
+
+def begin(interaction: Interaction) -> ResponseComposer:
+    """Creates a response composer and binds it to the given interaction.
+
+    The composer is stored in ``interaction.extras["responses"]`` and the
+    interaction's response is replaced by :class:`ComposedResponse`.
+    """
+    composer = ResponseComposer(interaction)
+    interaction.extras["responses"] = composer
+    # Interaction.response is a cached slot, see AutoDefer.
+    interaction._cs_response = ComposedResponse(composer, interaction.response)  # type: ignore
+    return composer
+
+
+async def notify(interaction: Interaction, embed: Embed, *, mention: bool = False) -> None:
+    """Sends a notice for the interaction.
+
+    If the interaction has a response composer, the notice is sent with the
+    command's initial response if that isn't sent yet, or along with other
+    notices once the command completes. Otherwise it is sent as a followup
+    right away.
+    """
+    composer = interaction.extras.get("responses")
+    if composer is not None:
+        composer.add(embed, mention=mention)
+        return
+
+    await interaction.followup.send(content=interaction.user.mention if mention else None, embed=embed)
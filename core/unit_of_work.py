@@ -0,0 +1,235 @@
+# MIT License
+
+# Copyright (c) 2023 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type, TypeVar
+from contextvars import ContextVar
+from contextlib import asynccontextmanager
+from tortoise.transactions import in_transaction
+
+import logging
+
+if TYPE_CHECKING:
+    from tortoise.models import Model
+    from discord import Interaction
+
+    ModelT = TypeVar("ModelT", bound=Model)
+
+__all__ = (
+    'UnitOfWork',
+    'current',
+    'begin',
+    'transaction',
+    'save',
+    'delete',
+)
+
+_log = logging.getLogger(__name__)
+_current: ContextVar[Optional[UnitOfWork]] = ContextVar("cobble_unit_of_work", default=None)
+
+
+class UnitOfWork:
+    """Tracks model mutations made during an interaction and flushes them at once.
+
+    Instead of saving or deleting models directly, the changes are recorded and
+    written in a single transaction by :meth:`commit`. If the command fails,
+    :meth:`rollback` discards the recorded changes so that no partially applied
+    command ever reaches the database.
+    """
+
+    def __init__(self) -> None:
+        self._new: List[Model] = []
+        # Persisted models are tracked by their row so that two instances
+        # loaded for the same row are never both saved and deleted.
+        self._dirty: Dict[Tuple[Type[Model], Any], Model] = {}
+        self._deleted: Dict[Tuple[Type[Model], Any], Model] = {}
+        self._callbacks: Dict[Any, Callable[[bool], None]] = {}
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        """Whether this unit of work has been committed or rolled back."""
+        return self._closed
+
+    @property
+    def pending(self) -> int:
+        """The number of pending changes."""
+        return len(self._new) + len(self._dirty) + len(self._deleted)
+
+    def save(self, model: Model) -> None:
+        """Marks the given model as to be saved (or created if it's not saved yet)."""
+        if model.pk is None:
+            if not any(m is model for m in self._new):
+                self._new.append(model)
+            return
+
+        key = (type(model), model.pk)
+        self._deleted.pop(key, None)
+        self._dirty[key] = model
+
+    def delete(self, model: Model) -> None:
+        """Marks the given model as to be deleted."""
+        if model.pk is None:
+            # Never written to database, simply forget about it.
+            self._new = [m for m in self._new if m is not model]
+            return
+
+        key = (type(model), model.pk)
+        self._dirty.pop(key, None)
+        self._deleted[key] = model
+
+    def on_complete(self, key: Any, callback: Callable[[bool], None]) -> None:
+        """Registers a callback to call once the unit of work completes.
+
+        The callback is passed whether the changes were written to database.
+        Only one callback is kept per key.
+        """
+        self._callbacks.setdefault(key, callback)
+
+    def _complete(self, written: bool) -> None:
+        callbacks = self._callbacks
+        self._callbacks = {}
+
+        for callback in callbacks.values():
+            try:
+                callback(written)
+            except Exception:
+                _log.exception("Ignoring exception in unit of work callback")
+
+    def find(self, model_cls: Type[ModelT], *, deleted: bool = False, **attrs: Any) -> Optional[ModelT]:
+        """Finds a tracked model instance (not marked as deleted) with the given attributes.
+
+        This allows the models to see the changes made earlier in the same unit
+        of work that aren't flushed to database yet. If ``deleted`` is True, the
+        models marked as deleted are searched instead.
+        """
+        models = self._deleted.values() if deleted else (*self._new, *self._dirty.values())
+        for model in models:
+            if not isinstance(model, model_cls):
+                continue
+            if all(getattr(model, k) == v for k, v in attrs.items()):
+                return model
+
+        return None
+
+    def _clear(self) -> None:
+        self._new = []
+        self._dirty = {}
+        self._deleted = {}
+
+    def rollback(self) -> None:
+        """Discards all the pending changes and closes the unit of work."""
+        self._clear()
+        self._closed = True
+        self._complete(False)
+
+    async def commit(self) -> None:
+        """Flushes all the pending changes to database in a single transaction.
+
+        Once committed, the unit of work is closed and any further changes are
+        written to the database directly.
+        """
+        self._closed = True
+        if not self.pending:
+            return self._complete(True)
+
+        new = self._new
+        dirty = list(self._dirty.values())
+        deleted = list(self._deleted.values())
+        self._clear()
+
+        try:
+            async with in_transaction() as conn:
+                for model in new:
+                    await model.save(using_db=conn)
+                for model in dirty:
+                    await model.save(using_db=conn)
+                for model in deleted:
+                    await model.delete(using_db=conn)
+        except BaseException:
+            self._complete(False)
+            raise
+
+        self._complete(True)
+
+        _log.debug("Committed unit of work (%d new, %d updated, %d deleted)", len(new), len(dirty), len(deleted))
+
+
+def current() -> Optional[UnitOfWork]:
+    """Returns the unit of work for the interaction currently being processed, if any."""
+    uow = _current.get()
+    if uow is None or uow.closed:
+        return None
+    return uow
+
+
+def begin(interaction: Interaction) -> UnitOfWork:
+    """Creates a unit of work and binds it to the given interaction.
+
+    The unit of work is stored in ``interaction.extras["unit_of_work"]`` and is
+    also made current for the calling task.
+    """
+    uow = UnitOfWork()
+    interaction.extras["unit_of_work"] = uow
+    _current.set(uow)
+    return uow
+
+
+@asynccontextmanager
+async def transaction() -> AsyncIterator[UnitOfWork]:
+    """Runs the enclosed block in its own unit of work.
+
+    The changes are committed when the block exits and rolled back if it
+    raises. The previously current unit of work (if any) is restored
+    afterwards, so this can be used for changes that must be written before
+    the interaction's own unit of work completes.
+    """
+    uow = UnitOfWork()
+    token = _current.set(uow)
+    try:
+        yield uow
+    except BaseException:
+        uow.rollback()
+        raise
+    else:
+        await uow.commit()
+    finally:
+        _current.reset(token)
+
+
+async def save(model: Model) -> None:
+    """Saves the model or defers the save to the current unit of work."""
+    uow = current()
+    if uow is None:
+        await model.save()
+    else:
+        uow.save(model)
+
+
+async def delete(model: Model) -> None:
+    """Deletes the model or defers the deletion to the current unit of work."""
+    uow = current()
+    if uow is None:
+        await model.delete()
+    else:
+        uow.delete(model)
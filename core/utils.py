@@ -22,23 +22,34 @@
 
 from __future__ import annotations
 
-from typing import Any, Callable, Optional, List
-from core import cosmetics
-from discord.utils import MISSING
+from typing import Any, Callable, Optional
 
-import dotenv
-import math
 import os
 
 __all__ = (
     "get_config",
 )
 
-dotenv.load_dotenv()
+# This module is imported by almost everything so it intentionally does not
+# import discord.py (importing discord.utils imports the whole library) and
+# only loads the .env file once a configuration value is first requested.
+_MISSING: Any = object()
+_dotenv_loaded = False
+
+
+def _load_dotenv() -> None:
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+
+    import dotenv
+    dotenv.load_dotenv()
+    _dotenv_loaded = True
+
 
 def get_config(
     key: str,
-    default: Any = MISSING,
+    default: Any = _MISSING,
     factory: Optional[Callable[[Any], Any]] = None,
     cast_bool: bool = False,
 ) -> Any:
@@ -51,10 +62,12 @@ def get_config(
 
     Raises :exc:`KeyError` if key is not found in the environment variables.
     """
+    _load_dotenv()
+
     try:
         val = os.environ[key]
     except KeyError:
-        if default is not MISSING:
+        if default is not _MISSING:
             return default
         raise
     else:
@@ -67,38 +80,3 @@ def get_config(
                 return False
             raise ValueError(f'the value for variable "{key}" must be either true or false.')
         return val
-
-def progress_bar(progress: float, total: float, *, length: int = 10) -> str:
-    """Creates a progress bar using emojis from the given progress and total values.
-    
-    The length parameter determines the total length of the progress bar (inclusive
-    of the two terminals).
-    """
-    filled_emojis = math.floor((progress / total) * length) if total != 0 else 0
-    unfilled_emojis = length - filled_emojis
-
-    emojis: List[str] = []
-
-    if filled_emojis == 0:
-        emojis.append(cosmetics.EMOJI_PROGRESS_BAR_START_UNFILLED)
-        unfilled_emojis -= 1
-    else:
-        for x in range(filled_emojis):
-            if x == 0:
-                # start of progress bar
-                emojis.append(cosmetics.EMOJI_PROGRESS_BAR_START_FILLED)
-            else:
-                emojis.append(cosmetics.EMOJI_PROGRESS_BAR_MID_FILLED)
-
-    if unfilled_emojis == 0:
-        emojis.pop()  # maintain the provided length
-        emojis.append(cosmetics.EMOJI_PROGRESS_BAR_END_FILLED)
-    else:
-        for x in range(unfilled_emojis):
-            if x == (unfilled_emojis - 1):
-                # end of progress bar reached
-                emojis.append(cosmetics.EMOJI_PROGRESS_BAR_END_UNFILLED)
-            else:
-                emojis.append(cosmetics.EMOJI_PROGRESS_BAR_MID_UNFILLED)
-
-    return "".join(emojis)
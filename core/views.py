@@ -22,26 +22,23 @@
 
 from __future__ import annotations
 
-from typing import Optional, Any, Dict, TYPE_CHECKING
+from typing import NamedTuple, Optional, Any, Dict, List, Tuple, TYPE_CHECKING
 from typing_extensions import Self
-from discord.ext import menus
-from discord.utils import MISSING
 from discord import ui, ButtonStyle
+from core.components import RoutedView
 from core import cosmetics
 
 import discord
 
-from core.bot import CobbleBot
-
 if TYPE_CHECKING:
     from core.bot import CobbleBot
+    from core.components import ComponentRouter
 
 __all__ = (
     'AuthorizedView',
-    'Confirmation',
-    'Paginator',
-    'LazyPaginationSource',
-    'LazyPaginator',
+    'RoutedConfirmation',
+    'Page',
+    'RoutedPaginator',
 )
 
 
@@ -58,181 +55,200 @@ class AuthorizedView(ui.View):
         return True
 
 
-class Confirmation(AuthorizedView):
-    def __init__(self, *, timeout: Optional[float] = 180, user: discord.abc.Snowflake):
-        super().__init__(timeout=timeout, user=user)
-        self.confirmed: Optional[bool] = None
-
-    @ui.button(label='Confirm', style=ButtonStyle.green)
-    async def confirm_button(self, interaction: discord.Interaction, button: ui.Button[Self]) -> None:
-        await interaction.response.defer()
-        self.confirmed = True
-        self.stop()
-
-    @ui.button(label='Cancel', style=ButtonStyle.gray)
-    async def cancel_button(self, interaction: discord.Interaction, button: ui.Button[Self]) -> None:
-        await interaction.response.defer()
-        self.confirmed = False
-        self.stop()
-
-# This class implementation is too hacky and overrides a lot of internals of
-# the discord.ext.menus package and that is the reason why the typing is so
-# messed up here. Unfortunately, there is no other "good" solution to avoid
-# this typing dumpster fire.
-class Paginator(AuthorizedView, menus.MenuPages):
+class RoutedConfirmation(RoutedView):
+    """Confirm and cancel buttons handled by a route of the :class:`ComponentRouter`.
+
+    The route's handler receives :attr:`CONFIRM` or :attr:`CANCEL` followed by
+    the given arguments. The route should be single use so that only one of
+    the buttons can be used.
+
+    Parameters
+    ----------
+    router: :class:`ComponentRouter`
+        The router of the bot.
+    name: :class:`str`
+        The name of the route.
+    user: :class:`discord.abc.Snowflake`
+        The user that can use the buttons.
+    *args:
+        The arguments passed to the route's handler.
+    style: :class:`discord.ButtonStyle`
+        The style of the confirm button.
+    """
+
+    CONFIRM = "confirm"
+    CANCEL = "cancel"
+
     def __init__(
             self,
-            *,
-            timeout: Optional[float] = 180,
-            bot: CobbleBot,
+            router: ComponentRouter,
+            name: str,
             user: discord.abc.Snowflake,
-            source: menus.PageSource,
+            *args: Any,
+            style: ButtonStyle = ButtonStyle.green,
         ):
 
-        super().__init__(timeout=timeout, user=user)
-
-        self.bot = bot
-        self._source = source
-        self.current_page = 0
-        self.ctx = None
-        self.interaction: discord.Interaction = discord.utils.MISSING
-        self.message: Optional[discord.Message] = None
-
-    async def start_pagination(self, interaction: discord.Interaction) -> None:
-        await self._source._prepare_once()  # type: ignore
-        self.interaction = interaction
-        await self.send_initial_response(interaction)
-
-    async def show_page(self, page_number: int):
-        if page_number < 0:
-            return
-
-        page = await self._source.get_page(page_number)  # type: ignore
-        self.current_page = page_number
-        self._update_buttons_state()
-
-        kwargs = await self._get_kwargs_from_page(page)  # type: ignore
-        await self.interaction.edit_original_response(**kwargs)
-
-    async def send_initial_response(self, interaction: discord.Interaction) -> None:
-        page = await self._source.get_page(0)  # type: ignore
-        kwargs = await self._get_kwargs_from_page(page)  # type: ignore
-
-        self._update_buttons_state()
-        if interaction.response.is_done():
-            await interaction.followup.send(**kwargs)
-        else:
-            await interaction.response.send_message(**kwargs)
-
-    async def _get_kwargs_from_page(self, page: menus.PageSource) -> Any:
-        value: Dict[str, Any] = await super()._get_kwargs_from_page(page)  # type: ignore
-        if 'view' not in value:
-            value.update({'view': self})
-        return value
+        super().__init__()
 
-    def _update_buttons_state(self) -> None:
-        max_pages = self._source.get_max_pages()
-        if max_pages is None:
-            self.last_page.disabled = True
-            return
+        self.confirm_button: ui.Button[Self] = ui.Button(
+            label='Confirm',
+            style=style,
+            custom_id=router.custom_id(name, user, self.CONFIRM, *args),
+        )
+        self.cancel_button: ui.Button[Self] = ui.Button(
+            label='Cancel',
+            style=ButtonStyle.gray,
+            custom_id=router.custom_id(name, user, self.CANCEL, *args),
+        )
+        self.add_item(self.confirm_button)
+        self.add_item(self.cancel_button)
 
-        last_page_idx = max_pages - 1
-        if self.current_page == 0:
-            self.next_page.disabled = False
-            self.last_page.disabled = False
-            self.first_page.disabled = True
-            self.prev_page.disabled = True
-        elif self.current_page == last_page_idx:
-            self.next_page.disabled = True
-            self.last_page.disabled = True
-            self.first_page.disabled = False
-            self.prev_page.disabled = False
-        else:
-            self.next_page.disabled = False
-            self.last_page.disabled = False
-            self.first_page.disabled = False
-            self.prev_page.disabled = False
-
-    @ui.button(emoji='\U000023ea', style=discord.ButtonStyle.blurple)
-    async def first_page(self, interaction: discord.Interaction, button: ui.Button[Self]):
-        await interaction.response.defer()
-        await self.show_page(0)
-
-    @ui.button(emoji='\U000025c0', style=discord.ButtonStyle.blurple)
-    async def prev_page(self, interaction: discord.Interaction, button: ui.Button[Self]):
-        await interaction.response.defer()
-        await self.show_checked_page(self.current_page - 1)  # type: ignore
-
-    @ui.button(emoji='\U000023f9', style=discord.ButtonStyle.blurple)
-    async def stop_page(self, interaction: discord.Interaction, button: ui.Button[Self]):
-        await interaction.response.defer()
-        self.stop()
-
-        if interaction.message:
-            await interaction.message.delete()
-
-    @ui.button(emoji='\U000025b6', style=discord.ButtonStyle.blurple)
-    async def next_page(self, interaction: discord.Interaction, button: ui.Button[Self]):
-        await interaction.response.defer()
-        await self.show_checked_page(self.current_page + 1)  # type: ignore
-
-    @ui.button(emoji='\U000023e9', style=discord.ButtonStyle.blurple)
-    async def last_page(self, interaction: discord.Interaction, button: ui.Button[Self]):
-        max_pages = self._source.get_max_pages()
-        if max_pages is None:
-            # probably unexhausted lazy pagination source
-            return
 
-        await interaction.response.defer()
-        await self.show_page(max_pages - 1)  # type: ignore  # should never be None
+class Page(NamedTuple):
+    """A page of :class:`RoutedPaginator`."""
 
+    number: int
+    """The number of the page, starting from 0."""
 
-class LazyPaginationSource(menus.PageSource):
-    """Abstract class for source of lazy pagination."""
-    def __init__(self) -> None:
-        self._last_page: Optional[int] = None
-        self.menu: LazyPaginator = MISSING
+    entries: Any
+    """The entries shown on the page."""
 
-        super().__init__()
+    last: Optional[int]
+    """The number of the last page, None if not known yet."""
 
     @property
-    def last_page(self) -> Optional[int]:
-        return self._last_page
+    def has_next(self) -> bool:
+        return self.last is None or self.number < self.last
 
-    def set_last_page(self, page_number: int, initial: bool = True) -> None:
-        self._last_page = page_number
 
-        if self.menu is not MISSING and initial:
-            self.menu.current_page = page_number
+class RoutedPaginator:
+    """Paginates a message with buttons handled by the :class:`ComponentRouter`.
 
-    def exhausted(self) -> bool:
-        return self._last_page is not None
+    Unlike views, nothing is held in memory while the message is shown. The
+    buttons encode the page they lead to along with the arguments passed to
+    :meth:`start`, and each click fetches and formats that page again.
 
-    def is_paginating(self) -> bool:
-        return True
+    Subclasses implement :meth:`get_page` and :meth:`format_page` and can add
+    components of their own with :meth:`extra_items`.
 
+    Parameters
+    ----------
+    bot: :class:`CobbleBot`
+        The bot.
+    name: :class:`str`
+        The name of the route handling the buttons.
+    ttl: :class:`float`
+        The number of seconds after the last navigation after which the
+        buttons expire.
+    """
 
-class LazyPaginator(Paginator):
-    """Similar to views.Paginator but allows pagination for lazily fetched data.
+    FIRST = "first"
+    PREVIOUS = "prev"
+    STOP = "stop"
+    NEXT = "next"
+    LAST = "last"
 
-    The source passed must be compatible with the LazyPaginationSource protocol.
-    """
-    _source: LazyPaginationSource
+    EMOJIS = {
+        FIRST: '\U000023ea',
+        PREVIOUS: '\U000025c0',
+        STOP: '\U000023f9',
+        NEXT: '\U000025b6',
+        LAST: '\U000023e9',
+    }
 
-    async def start_pagination(self, interaction: discord.Interaction) -> None:
-        self._source.menu = self
-        await super().start_pagination(interaction)
+    buttons: Tuple[str, ...] = (FIRST, PREVIOUS, STOP, NEXT, LAST)
+    """The navigation buttons shown, in order."""
 
-    async def show_page(self, page_number: int):
-        if page_number < 0:
-            return
+    def __init__(self, bot: CobbleBot, name: str, *, ttl: float = 180.0) -> None:
+        self.bot = bot
+        self.name = name
+
+        bot.components.add_route(name, self._navigate, ttl=ttl, clear_on_expire=False)
+
+    def close(self) -> None:
+        """Unregisters the route of the paginator."""
+        self.bot.components.remove_route(self.name)
+
+    async def get_page(self, interaction: discord.Interaction, page_number: int, *args: str) -> Page:
+        """Returns the page with the given number.
+
+        The returned page may have a lower number if the given one is past the end.
+        """
+        raise NotImplementedError
+
+    async def format_page(self, interaction: discord.Interaction, page: Page, *args: str) -> Dict[str, Any]:
+        """Returns the keyword arguments (e.g. ``embed``) for showing a page.
+
+        The navigation buttons are added unless a ``view`` is returned (e.g.
+        None when there is nothing to paginate).
+        """
+        raise NotImplementedError
+
+    def extra_items(self, interaction: discord.Interaction, page: Page, *args: str) -> List[ui.Item[Any]]:
+        """Returns the components added after the navigation buttons."""
+        return []
+
+    def view(self, interaction: discord.Interaction, page: Page, *args: str) -> RoutedView:
+        """Returns the view with the components for the given page."""
+        targets = {
+            self.FIRST: 0,
+            self.PREVIOUS: page.number - 1,
+            self.STOP: page.number,
+            self.NEXT: page.number + 1,
+            self.LAST: page.number if page.last is None else page.last,
+        }
+        disabled = {
+            self.FIRST: page.number == 0,
+            self.PREVIOUS: page.number == 0,
+            self.STOP: False,
+            self.NEXT: not page.has_next,
+            self.LAST: page.last is None or page.number >= page.last,
+        }
+
+        router = self.bot.components
+        view = RoutedView()
+        for button in self.buttons:
+            view.add_item(ui.Button(
+                emoji=self.EMOJIS[button],
+                style=ButtonStyle.blurple,
+                disabled=disabled[button],
+                custom_id=router.custom_id(self.name, interaction.user, button, targets[button], *args),
+            ))
+
+        for item in self.extra_items(interaction, page, *args):
+            view.add_item(item)
+
+        return view
+
+    async def render(self, interaction: discord.Interaction, page_number: int, *args: str) -> Dict[str, Any]:
+        """Returns the keyword arguments for showing a page, including its view."""
+        page = await self.get_page(interaction, page_number, *args)
+        kwargs = await self.format_page(interaction, page, *args)
+        if "view" not in kwargs:
+            kwargs["view"] = self.view(interaction, page, *args)
+        return kwargs
+
+    async def start(self, interaction: discord.Interaction, *args: Any) -> None:
+        """Sends the first page in response to an interaction.
+
+        The arguments are converted to strings and passed to the methods of
+        the paginator on every navigation.
+        """
+        kwargs = await self.render(interaction, 0, *map(str, args))
+        if kwargs["view"] is None:
+            # Only edits take None for no components.
+            del kwargs["view"]
 
-        if self._source.last_page is not None and page_number > self._source.last_page:
-            page_number = self._source.last_page
+        if interaction.response.is_done():
+            await interaction.followup.send(**kwargs)
+        else:
+            await interaction.response.send_message(**kwargs)
 
-        self.current_page = page_number
-        page = await self._source.get_page(page_number)  # type: ignore
+    async def _navigate(self, interaction: discord.Interaction, button: str, page_number: str, *args: str) -> None:
+        if button == self.STOP:
+            await interaction.response.defer()
+            await interaction.delete_original_response()
+            return
 
-        self._update_buttons_state()
-        kwargs = await self._get_kwargs_from_page(page)  # type: ignore
-        await self.interaction.edit_original_response(**kwargs)
+        kwargs = await self.render(interaction, max(int(page_number), 0), *args)
+        await interaction.response.edit_message(**kwargs)